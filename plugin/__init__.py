@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+import sublime
+
 # import all listeners and commands
 from .commands.copy_uri import CopyUriFromContextMenuCommand, CopyUriFromCursorsCommand, CopyUriFromViewCommand
 from .commands.open_uri import OpenUriFromCursorsCommand, OpenUriFromViewCommand
 from .commands.select_uri import SelectUriFromCursorsCommand, SelectUriFromViewCommand
 from .constants import PLUGIN_NAME
+from .detector import UriDetectorsManager
 from .helpers import compile_uri_regex
-from .listener import OpenUriViewEventListener
+from .launcher import UriLauncher
+from .listener import OpenUriTextChangeListener, OpenUriViewEventListener
 from .logger import apply_user_log_level, init_plugin_logger, log
-from .renderer import RendererThread
-from .settings import get_image_info, get_setting_renderer_interval, get_settings_object
+from .renderer import Renderer
+from .scanner_pool import ScannerPoolManager
+from .settings import SettingsSnapshot, get_image_info, get_setting, get_settings_object, get_settings_snapshot
 from .shared import global_get, global_set
+from .ui.image import (
+    IMAGE_DECODING_ERRORS,
+    ColoredImagesManager,
+    ScopeColorResolver,
+    clear_image_caches,
+    color_code_to_rgba,
+    decode_png_bytes,
+    prune_colored_image_cache_dir,
+)
+from .ui.image_prewarmer import ImagePrewarmer
+from .ui.phantom_set import generate_phantom_html_by_uri
 from .ui.phatom_sets_manager import PhatomSetsManager
-from .utils import is_processable_view, list_all_views, view_is_dirty_val
+from .ui.popup import generate_popup_html_by_uri
+from .utils import list_foreground_views
 
 __all__ = (
     # ST: core
@@ -27,6 +44,7 @@ __all__ = (
     "SelectUriFromCursorsCommand",
     "SelectUriFromViewCommand",
     # ST: listeners
+    "OpenUriTextChangeListener",
     "OpenUriViewEventListener",
 )
 
@@ -34,44 +52,80 @@ __all__ = (
 def plugin_loaded() -> None:
     global_set("settings", get_settings_object())
     global_set("logger", init_plugin_logger())
-    global_set("renderer_thread", RendererThread())
+    global_set("renderer", Renderer())
     _settings_changed_callback()
 
     global_get("settings").add_on_change(PLUGIN_NAME, _settings_changed_callback)
-    global_get("renderer_thread").start()
+    global_get("renderer").start()
 
 
 def plugin_unloaded() -> None:
     global_get("settings").clear_on_change(PLUGIN_NAME)
-    global_get("renderer_thread").cancel()
+    global_get("renderer").cancel()
     PhatomSetsManager.clear()
+    UriDetectorsManager.clear()
+    ScannerPoolManager.shutdown()
+    UriLauncher.clear()
+    clear_image_caches()
+    ScopeColorResolver.clear()
+    ImagePrewarmer.clear()
+    global_set("image_settings", {})
 
 
 def _settings_changed_callback() -> None:
+    global_set("settings_snapshot", SettingsSnapshot.from_settings())
     apply_user_log_level(global_get("logger"))
-    global_get("renderer_thread").set_interval(get_setting_renderer_interval())
+    global_get("renderer").set_interval(get_settings_snapshot().renderer_interval)
 
     uri_regex_obj, activated_schemes = compile_uri_regex()
     global_set("activated_schemes", activated_schemes)
     global_set("uri_regex_obj", uri_regex_obj)
     log("info", f"Activated schemes: {activated_schemes}")
 
-    _init_images()
-    _set_is_dirty_for_all_views(True)
+    image_settings = {
+        key: get_setting(key) for key in ("image_files", "image_colors", "image_source", "image_prewarming_budget_ms")
+    }
+    if image_settings != global_get("image_settings"):
+        global_set("image_settings", image_settings)
+        # loading images is not needed for detecting URIs so don't let it block
+        sublime.set_timeout_async(_init_images)
 
+    # "popup_text_html" may be changed
+    generate_popup_html_by_uri.cache_clear()
 
-def _init_images() -> None:
-    for img_name in global_get("images").keys():
-        if not img_name.startswith("@"):
-            global_set(f"images.{img_name}", get_image_info(img_name))
+    # known URI regions may be outdated due to regex changes
+    UriDetectorsManager.clear()
+    global_get("renderer").request_rerender_all()
 
 
-def _set_is_dirty_for_all_views(is_dirty: bool) -> None:
+def _init_images() -> None:
     """
-    @brief Set is_dirty for all views.
-
-    @param is_dirty Indicate if views are dirty
+    @brief Load images. Their colored variants are prepared in the background afterwards.
     """
-    for view in list_all_views():
-        if is_processable_view(view):
-            view_is_dirty_val(view, is_dirty)
+    for img_name in global_get("images").keys():
+        if not img_name.startswith("@"):
+            img_info = get_image_info(img_name)
+            # decode it now so that coloring it won't have to when it's rendered the first time
+            try:
+                decode_png_bytes(img_info["bytes"])
+            except IMAGE_DECODING_ERRORS as e:
+                # it can't be colored so the original image will be used
+                log("error", f"Failed to decode image {img_info['path']}: {e}")
+            global_set(f"images.{img_name}", img_info)
+
+    # things colored with previous images are outdated
+    prune_colored_image_cache_dir()
+    clear_image_caches()
+    generate_phantom_html_by_uri.cache_clear()
+    generate_popup_html_by_uri.cache_clear()
+    ImagePrewarmer.clear()
+
+    for img_name, color_code in get_setting("image_colors").items():
+        # colors of scopes are unknown until being rendered
+        if rgba_code := color_code_to_rgba(color_code, sublime.Region(0), None):
+            ColoredImagesManager.prepare(img_name, rgba_code)
+
+    for view in list_foreground_views():
+        ImagePrewarmer.request(view)
+
+    global_get("renderer").request_rerender_all()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, Hashable, TypeVar
+
+KT = TypeVar("KT", bound=Hashable)
+VT = TypeVar("VT")
+
+
+class SizedLruCache(Generic[KT, VT]):
+    """
+    A thread-safe LRU cache whose values are bounded by their total size in bytes and optionally by their amount.
+    The least recently used values are evicted when the budget is exceeded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int,
+        sizeof: Callable[[VT], int] = sys.getsizeof,
+        max_items: int = 0,
+    ) -> None:
+        """
+        @brief Create a cache.
+
+        @param name      The name shown in logs
+        @param max_bytes The max total size of values
+        @param sizeof    The function which calculates the size of a value
+        @param max_items The max amount of values, no limit if not positive
+        """
+        self.name = name
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.max_items = max_items
+
+        self._lock = threading.Lock()
+        self._items: OrderedDict[KT, tuple[VT, int]] = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.name}: {len(self)} items, {self._bytes}/{self.max_bytes} bytes, "
+            f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions"
+        )
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def keys(self) -> list[KT]:
+        """
+        @brief Get keys of cached values, from the least recently used one.
+
+        @return The keys
+        """
+        with self._lock:
+            return list(self._items)
+
+    def get(self, key: KT) -> VT | None:
+        """
+        @brief Get the cached value and mark it as the most recently used.
+
+        @param key The key
+
+        @return The value, or `None` if it's not cached.
+        """
+        with self._lock:
+            if (item := self._items.get(key)) is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: KT, value: VT) -> None:
+        """
+        @brief Cache the value. Values which are larger than the whole budget are not cached.
+
+        @param key   The key
+        @param value The value
+        """
+        if (size := self.sizeof(value)) > self.max_bytes:
+            return
+
+        with self._lock:
+            if (item := self._items.pop(key, None)) is not None:
+                self._bytes -= item[1]
+            self._items[key] = (value, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes or 0 < self.max_items < len(self._items):
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def discard_if(self, predicate: Callable[[KT], bool]) -> None:
+        """
+        @brief Remove cached values whose keys satisfy the predicate.
+
+        @param predicate The predicate which is called with a key
+        """
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                self._bytes -= self._items.pop(key)[1]
+
+    def clear(self) -> None:
+        """Remove all cached values. Statistics are kept."""
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
@@ -8,7 +8,7 @@ import sublime
 import sublime_plugin
 
 from ..helpers import find_uri_regions_by_regions
-from ..shared import is_plugin_ready
+from ..shared import global_get, is_plugin_ready
 from ..types import EventDict, RegionLike
 
 
@@ -22,6 +22,10 @@ class UriSource(enum.Enum):
 class AbstractUriCommand(sublime_plugin.TextCommand, ABC):
     source = UriSource.NONE
 
+    # class-level (shared across objects)
+    # ((view ID, change count, point, regex object), found URI regions)
+    _event_lookup: tuple[tuple[int, int, int, object], list[sublime.Region]] | None = None
+
     def is_enabled(self) -> bool:
         return is_plugin_ready()
 
@@ -34,8 +38,7 @@ class AbstractUriCommand(sublime_plugin.TextCommand, ABC):
             pass
         elif self.source == UriSource.CONTEXT_MENU:
             if event:
-                point = self.view.window_to_text((event["x"], event["y"]))
-                regions = ((point, point),)
+                return self._find_uri_regions_by_event(event)
         elif self.source == UriSource.CURSORS:
             regions = self.view.sel()
         elif self.source == UriSource.FILE:
@@ -43,3 +46,22 @@ class AbstractUriCommand(sublime_plugin.TextCommand, ABC):
         else:
             raise RuntimeError(f"Invalid UriSource type: {self.source}")
         return find_uri_regions_by_regions(self.view, regions)
+
+    def _find_uri_regions_by_event(self, event: EventDict) -> list[sublime.Region]:
+        """
+        @brief Find URI regions at the event's point. The result of the last event is reused since ST asks
+               `is_visible()`, `description()`, etc. for the same event several times while building a menu.
+
+        @param event The event
+
+        @return Found URI regions
+        """
+        point = self.view.window_to_text((event["x"], event["y"]))
+        key = (self.view.id(), self.view.change_count(), point, global_get("uri_regex_obj"))
+
+        if (lookup := AbstractUriCommand._event_lookup) and lookup[0] == key:
+            return list(lookup[1])
+
+        uri_regions = find_uri_regions_by_regions(self.view, ((point, point),))
+        AbstractUriCommand._event_lookup = (key, uri_regions)
+        return list(uri_regions)
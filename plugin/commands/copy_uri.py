@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from abc import ABC
 from collections.abc import Iterable
+from pathlib import Path
 
 import sublime
 
+from ..constants import PLUGIN_NAME
+from ..extractor import AbstractUriWriter, ClipboardUriWriter, FileUriWriter, ViewUriWriter, extract_uris
 from ..types import EventDict
 from .abstract import AbstractUriCommand, UriSource
 
@@ -29,6 +32,65 @@ class AbstractCopyUriCommand(AbstractUriCommand, ABC):
 class CopyUriFromViewCommand(AbstractCopyUriCommand):
     source = UriSource.FILE
 
+    def run(  # type: ignore
+        self,
+        _: sublime.Edit,
+        event: EventDict | None = None,
+        unique: bool = True,
+        sort: bool | None = None,
+        output: str = "clipboard",
+        output_path: str = "",
+    ) -> None:
+        """
+        @brief Extract URIs from the whole view chunk by chunk in the background, so huge files won't block.
+
+        @param sort        Sort URIs, which remembers all of them. By default, only URIs for the clipboard are sorted
+                           and others are streamed to the output.
+        @param output      Where URIs are written to, which is "clipboard", "view" or "file"
+        @param output_path The file path for the "file" output, which is asked if not given
+        """
+        if sort is None:
+            sort = output == "clipboard"
+
+        if output == "file" and not output_path:
+            if window := self.view.window():
+                window.show_input_panel(
+                    "Write URIs to the file:",
+                    self._get_default_output_path(),
+                    # the edit object is only valid during this "run()" call so run a new command
+                    lambda path: self.view.run_command(
+                        self.name(),
+                        {"event": event, "unique": unique, "sort": sort, "output": output, "output_path": path},
+                    ),
+                    None,
+                    None,
+                )
+            return
+
+        try:
+            writer = self._create_writer(output, output_path)
+        except (OSError, ValueError) as e:
+            sublime.status_message(f"{PLUGIN_NAME}: {e}")
+            return
+
+        sublime.set_timeout_async(lambda: extract_uris(self.view, writer, unique, sort))
+
+    def _get_default_output_path(self) -> str:
+        if file_name := self.view.file_name():
+            return f"{file_name}.uris.txt"
+        # a relative path would be resolved against the working directory of ST, which is unexpected
+        folders = window.folders() if (window := self.view.window()) else []
+        return str(Path(folders[0] if folders else Path.home()) / "untitled.uris.txt")
+
+    def _create_writer(self, output: str, output_path: str) -> AbstractUriWriter:
+        if output == "clipboard":
+            return ClipboardUriWriter()
+        if output == "view" and (window := self.view.window()):
+            return ViewUriWriter(window, f"URIs in {self.view.file_name() or self.view.name() or 'untitled'}")
+        if output == "file":
+            return FileUriWriter(output_path)
+        raise ValueError(f"Invalid output: {output}")
+
 
 class CopyUriFromCursorsCommand(AbstractCopyUriCommand):
     source = UriSource.CURSORS
@@ -0,0 +1,582 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Generator, Iterable, Sequence
+from concurrent.futures import Executor, Future
+from contextlib import closing
+from itertools import accumulate
+from typing import Pattern
+
+import sublime
+
+from .prefilter import PrefilteredPattern
+from .scanner_pool import find_uri_spans
+from .utils import get_timestamp, view_expand_region, view_find_all
+
+SCAN_MARGIN_MIN = 100
+"""the margin should be able to cover a URI's scheme at least"""
+WHITESPACE_LOOKAHEAD = 2048
+"""the max amount of chars after a text region where a whitespace is looked for to end the text"""
+WHITESPACE_REGEX_OBJ = re.compile(r"\s")
+PENDING_CHANGES_TIMEOUT_S = 0.1
+"""the max period to wait for text changes which have been made but not reported yet"""
+UNORDERED_CHANGES_MAX = 64
+"""the max amount of unordered text changes which are replayed one by one rather than scanned again"""
+
+
+class UriDetector:
+    """
+    Incrementally detects URI regions for a buffer.
+
+    Known URI regions are kept in sync with the buffer by replaying text changes on them.
+    Only text which has not been scanned since it's changed will be scanned again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._changes_pushed = threading.Condition(self._lock)
+
+        self.uri_regions: list[tuple[int, int]] = []
+        """sorted known URI regions"""
+        self.scanned_regions: list[tuple[int, int]] = []
+        """sorted, non-overlapped regions whose URIs are known"""
+        self.change_count = -1
+        """the buffer's change count which the known regions correspond to"""
+
+        self._pending_changes: list[tuple[int, list[tuple[int, int, int]]]] = [
+            # (change count, [(begin, end, new_len), ...]),
+        ]
+        self._index: UriRegionIndex | None = None
+
+    def invalidate(self) -> None:
+        """
+        @brief Forget everything. The whole buffer will be scanned again.
+        """
+        with self._lock:
+            self._forget()
+
+    def push_changes(self, changes: Iterable[sublime.TextChange], change_count: int) -> None:
+        """
+        @brief Record a batch of text changes. Batches are applied in the order they are reported
+               before the next detection.
+
+               If the detection has adopted the buffer at or after the batch's change count, whether the batch
+               has been included can't be told. For example, two batches may be reported with the same change
+               count and the detection may run between them. Everything is forgotten in that case.
+
+        @param changes      The text changes
+        @param change_count The buffer's change count when these changes are reported
+        """
+        with self._lock:
+            if change_count <= self.change_count:
+                self._forget()
+                return
+            self._pending_changes.append((change_count, [(c.a.pt, c.b.pt, len(c.str)) for c in changes]))
+            self._changes_pushed.notify_all()
+
+    def detect(
+        self,
+        view: sublime.View,
+        regex_obj: Pattern[str] | PrefilteredPattern,
+        expand_selectors: Iterable[str] = tuple(),
+        margin: int = 0,
+        region: tuple[int, int] | None = None,
+        chunk_size: int = 0,
+        time_budget_ms: float = 0,
+        executor: Executor | None = None,
+        parallel_chunks: int = 1,
+    ) -> bool:
+        """
+        @brief Scan regions which are not scanned yet in the view chunk by chunk.
+
+        @param view             The view
+        @param regex_obj        The compiled regex object
+        @param expand_selectors The selectors used to expand found regions
+        @param margin           The amount of extra chars around a region to be scanned
+        @param region           The region to be detected, the whole view if not given
+        @param chunk_size       The amount of chars scanned at a time, no limit if not positive
+        @param time_budget_ms   Stop scanning more chunks after this period, no limit if not positive
+        @param executor         The executor where the regex runs, the current thread if not given
+        @param parallel_chunks  The amount of chunks which are scanned in parallel by the executor
+
+        @return `True` if the region is completely detected, `False` otherwise.
+        """
+        deadline_s = get_timestamp() + time_budget_ms / 1000 if time_budget_ms > 0 else float("inf")
+        margin = max(margin, SCAN_MARGIN_MIN)
+
+        with self._lock:
+            # changes are reported a bit later than they are made, wait for them rather than scan everything again
+            if self.change_count >= 0 and self._get_reported_change_count() < view.change_count():
+                self._changes_pushed.wait_for(
+                    lambda: self._get_reported_change_count() >= view.change_count(),
+                    PENDING_CHANGES_TIMEOUT_S,
+                )
+
+            change_count = view.change_count()
+            changes = [change for _, batch in self._pending_changes for change in batch]
+            # some changes are missed so we can't trust known regions anymore
+            if self._get_reported_change_count() != change_count or not self._replay_changes(changes, margin):
+                self._forget()
+            self.change_count = change_count
+            self._pending_changes = []
+
+            todo_regions = regions_subtract((region or (0, view.size()),), self.scanned_regions)
+
+        for todo_region in todo_regions:
+            with self._lock:
+                uri_begin_min = self._get_uri_begin_min(todo_region[0])
+
+            with closing(
+                self.scan_region(
+                    view,
+                    regex_obj,
+                    expand_selectors,
+                    todo_region,
+                    chunk_size,
+                    margin,
+                    uri_begin_min,
+                    executor,
+                    parallel_chunks,
+                )
+            ) as scanner:
+                for scanned_region, uri_regions in scanner:
+                    with self._lock:
+                        # the view has been modified during scanning, results may be outdated
+                        if view.change_count() != change_count or self._pending_changes:
+                            return False
+                        self._add_scanned_region(scanned_region, uri_regions)
+
+                    if get_timestamp() > deadline_s:
+                        return False
+                    # yield to other threads between chunks
+                    time.sleep(0)
+
+        return True
+
+    def is_scanned(self, region: tuple[int, int]) -> bool:
+        """
+        @brief Determine if the region has been scanned and there is no pending change.
+
+        @param region The region
+
+        @return `True` if the region has been scanned, `False` otherwise.
+        """
+        with self._lock:
+            return not self._pending_changes and not regions_subtract((region,), self.scanned_regions)
+
+    def find_uri_regions(
+        self,
+        view: sublime.View,
+        regions: Iterable[tuple[int, int]],
+        margin: int = 0,
+    ) -> list[tuple[int, int]] | None:
+        """
+        @brief Find known URI regions which intersect (or touch) any of the regions.
+
+        @param view    The view
+        @param regions The sorted regions, whose `region[0] <= region[1]`
+        @param margin  The amount of extra chars around regions which have to be scanned as well
+
+        @return Sorted URI regions, or `None` if known URI regions are stale for these regions.
+        """
+        regions = tuple(regions)
+        change_count = view.change_count()
+        view_size = view.size()
+
+        with self._lock:
+            if (
+                self.change_count != change_count
+                or self._pending_changes
+                or regions_subtract(
+                    ((max(0, a - margin), min(view_size, b + margin)) for a, b in regions),
+                    self.scanned_regions,
+                )
+            ):
+                return None
+            if self._index is None:
+                self._index = UriRegionIndex(self.uri_regions)
+            index = self._index
+
+        return index.find_intersected(regions)
+
+    def _get_reported_change_count(self) -> int:
+        """
+        @brief Get the change count which known regions will correspond to after pending changes are applied.
+
+        @return The change count
+        """
+        return self._pending_changes[-1][0] if self._pending_changes else self.change_count
+
+    def _forget(self) -> None:
+        """
+        @brief Forget everything. The caller must hold the lock.
+        """
+        self.uri_regions = []
+        self.scanned_regions = []
+        self.change_count = -1
+        self._pending_changes = []
+        self._index = None
+
+    def _replay_changes(self, changes: Sequence[tuple[int, int, int]], margin: int = 0) -> bool:
+        """
+        @brief Replay text changes on known regions in the order they are made.
+
+        @param changes The text changes as `(begin, end, new_len)`
+        @param margin  The amount of extra chars around a change to be marked as not scanned
+
+        @return `True` if they are replayed, `False` if there are too many unordered changes to be replayed.
+        """
+        if (sorted_changes := sort_text_changes(changes)) is not None:
+            self._apply_changes(sorted_changes, margin)
+            return True
+        if len(changes) <= UNORDERED_CHANGES_MAX:
+            for change in changes:
+                self._apply_changes((change,), margin)
+            return True
+        return False
+
+    def _apply_changes(self, changes: Sequence[tuple[int, int, int]], margin: int = 0) -> None:
+        """
+        @brief Replay text changes on known regions at once. Each change replaces `[begin, end)` with `new_len` chars.
+
+        @param changes Sorted, non-overlapped `(begin, end, new_len)` whose points are all before any change
+        @param margin  The amount of extra chars around a change to be marked as not scanned
+        """
+        begins = [begin for begin, _, _ in changes]
+        ends = [end for _, end, _ in changes]
+        # the total length delta of changes before the i-th change
+        deltas = list(accumulate((new_len - (end - begin) for begin, end, new_len in changes), initial=0))
+
+        def shift_point(point: int) -> int:
+            # the last change which begins before the point
+            idx = bisect_left(begins, point) - 1
+            if idx < 0:
+                return point
+            begin, end, new_len = changes[idx]
+            if point >= end:
+                return point + deltas[idx + 1]
+            return begin + deltas[idx] + new_len
+
+        dirty_regions = [
+            (begin + delta, begin + delta + new_len) for (begin, _, new_len), delta in zip(changes, deltas)
+        ]
+        uri_regions: list[tuple[int, int]] = []
+        for a, b in self.uri_regions:
+            # URI regions touching the changed text may be changed so forget them
+            idx = bisect_left(ends, a)
+            if idx < len(changes) and begins[idx] <= b:
+                dirty_regions.append((shift_point(a), shift_point(b)))
+            else:
+                uri_regions.append((shift_point(a), shift_point(b)))
+
+        self.uri_regions = uri_regions
+        self._index = None
+        self.scanned_regions = regions_subtract(
+            ((shift_point(a), shift_point(b)) for a, b in self.scanned_regions),
+            # neighbor URIs may be affected as well, such as "\b" in the regex
+            ((begin - margin, end + margin) for begin, end in dirty_regions),
+        )
+
+    def _get_uri_begin_min(self, point: int) -> int:
+        """
+        @brief Get the min point where a URI may begin since the point. If the point is within a known URI
+               which begins in a scanned region, no other URI can begin within that known URI.
+
+        @param point The point
+
+        @return The min point where a URI may begin.
+        """
+        idx = bisect_left(self.uri_regions, (point,))
+        if idx > 0 and (uri_region := self.uri_regions[idx - 1])[1] > point:
+            idx_scanned = bisect_right(self.scanned_regions, (uri_region[0], float("inf"))) - 1
+            if idx_scanned >= 0 and self.scanned_regions[idx_scanned][1] > uri_region[0]:
+                return uri_region[1]
+        return point
+
+    @staticmethod
+    def scan_region(
+        view: sublime.View,
+        regex_obj: Pattern[str] | PrefilteredPattern,
+        expand_selectors: Iterable[str],
+        region: tuple[int, int],
+        chunk_size: int,
+        overlap: int,
+        uri_begin_min: int = 0,
+        executor: Executor | None = None,
+        parallel_chunks: int = 1,
+    ) -> Generator[tuple[tuple[int, int], list[tuple[int, int]]], None, None]:
+        """
+        @brief Scan the region chunk by chunk. Each chunk is scanned with overlapped text around it
+               so that URIs across the chunk boundary are still found correctly.
+
+        @param view             The view
+        @param regex_obj        The compiled regex object
+        @param expand_selectors The selectors used to expand found regions
+        @param region           The region
+        @param chunk_size       The amount of chars scanned at a time, no limit if not positive
+        @param overlap          The amount of overlapped chars around a chunk
+        @param uri_begin_min    The min point where a URI may begin
+        @param executor         The executor where the regex runs, the current thread if not given
+                                or the region is not larger than a chunk
+        @param parallel_chunks  The amount of chunks which are scanned in parallel by the executor
+
+        @return A generator for (scanned region, found URI regions)
+        """
+        region_begin, end = region
+        view_size = view.size()
+        chunk_size = chunk_size if chunk_size > 0 else end - region_begin
+
+        def get_chunk_idx(point: int) -> int:
+            # chunks are aligned so that their text regions can be prepared before they are scanned
+            return (point - region_begin) // chunk_size
+
+        def extend_to_whitespace(point: int) -> int:
+            # URIs never contain whitespaces so text which ends with a whitespace never truncates a URI
+            if point >= view_size or point <= 0:
+                return min(point, view_size)
+            text = view.substr(sublime.Region(point - 1, min(view_size, point + WHITESPACE_LOOKAHEAD)))
+            if m := WHITESPACE_REGEX_OBJ.search(text):
+                return point + m.start()
+            return point - 1 + len(text)
+
+        def get_chunk_end(chunk_idx: int) -> int:
+            return min(end, region_begin + (chunk_idx + 1) * chunk_size)
+
+        def get_text_region(chunk_idx: int) -> tuple[int, int]:
+            return (
+                max(0, region_begin + chunk_idx * chunk_size - overlap),
+                extend_to_whitespace(min(view_size, get_chunk_end(chunk_idx) + overlap)),
+            )
+
+        def submit(text_region: tuple[int, int]) -> Future[array[int]]:
+            assert executor
+            return executor.submit(find_uri_spans, regex_obj, view.substr(sublime.Region(*text_region)))
+
+        def find_uri_regions(text_region: tuple[int, int], future: Future[array[int]] | None) -> list[tuple[int, int]]:
+            if not executor:
+                return list(map(sublime.Region.to_tuple, view_find_all(view, regex_obj, expand_selectors, text_region)))
+
+            text_begin = text_region[0]
+            spans = (future or submit(text_region)).result()
+            return [
+                view_expand_region(view, sublime.Region(text_begin + a, text_begin + b), expand_selectors).to_tuple()
+                for a, b in zip(spans[::2], spans[1::2])
+            ]
+
+        # it's not worth sending a region which is not larger than a chunk to the executor
+        if end - region_begin <= chunk_size:
+            executor = None
+
+        futures: dict[int, tuple[tuple[int, int], Future[array[int]]]] = {
+            # chunk_idx: (text region, future),
+        }
+
+        try:
+            begin = region_begin
+            while begin < end:
+                chunk_idx = get_chunk_idx(begin)
+                chunk_end = get_chunk_end(chunk_idx)
+                text_begin, text_end = get_text_region(chunk_idx)
+
+                future = None
+                if executor:
+                    for idx in tuple(futures):
+                        if idx < chunk_idx:
+                            futures.pop(idx)[1].cancel()
+                    # later chunks are scanned in parallel
+                    for idx in range(chunk_idx, chunk_idx + max(1, parallel_chunks)):
+                        if idx not in futures and region_begin + idx * chunk_size < end:
+                            futures[idx] = (text_region := get_text_region(idx), submit(text_region))
+                    future = futures.pop(chunk_idx)[1]
+
+                while True:
+                    uri_regions = [
+                        uri_region
+                        for uri_region in find_uri_regions((text_begin, text_end), future)
+                        if max(begin, uri_begin_min) <= uri_region[0] < chunk_end
+                    ]
+                    future = None
+
+                    # the last URI may be truncated by the text boundary, which is possible only if the text
+                    # doesn't end with a whitespace. Note that a truncated URI may end before the boundary
+                    # because the regex backtracks, such as trailing punctuations or an unclosed bracket.
+                    if not (
+                        uri_regions
+                        and text_end < view_size
+                        and uri_regions[-1][1] >= text_end - overlap
+                        and not view.substr(text_end - 1).isspace()
+                    ):
+                        break
+                    # leave it for the next chunk
+                    if uri_regions[-1][0] > begin:
+                        chunk_end = uri_regions.pop()[0]
+                        break
+                    # it's the only URI in this chunk, scan it with more text
+                    text_end = extend_to_whitespace(min(view_size, text_end + chunk_size + overlap))
+
+                # no other URI begins within a found URI
+                if uri_regions and uri_regions[-1][1] > chunk_end:
+                    chunk_end = uri_regions[-1][1]
+
+                yield ((begin, chunk_end), uri_regions)
+                begin = chunk_end
+        finally:
+            for _, future in futures.values():
+                future.cancel()
+
+    def _add_scanned_region(self, region: tuple[int, int], uri_regions: Sequence[tuple[int, int]]) -> None:
+        """
+        @brief Replace known URI regions within the region with newly found ones.
+
+        @param region      The scanned region
+        @param uri_regions The URI regions found in the region
+        """
+        # known URIs overlapped with a found one are outdated as well
+        end = max(region[1], uri_regions[-1][1] if uri_regions else 0)
+
+        idx_begin = bisect_left(self.uri_regions, (region[0],))
+        idx_end = idx_begin
+        while idx_end < len(self.uri_regions) and self.uri_regions[idx_end][0] < end:
+            idx_end += 1
+
+        self.uri_regions[idx_begin:idx_end] = uri_regions
+        self._index = None
+        self.scanned_regions = merge_region_tuples((*self.scanned_regions, region))
+
+
+class UriRegionIndex:
+    """
+    A read-only snapshot of sorted non-overlapped URI regions for fast lookups.
+    Begin/end points are stored in compact arrays and both of them are sorted.
+    """
+
+    __slots__ = ("begins", "ends")
+
+    def __init__(self, uri_regions: Iterable[tuple[int, int]]) -> None:
+        self.begins = array("q")
+        self.ends = array("q")
+        for a, b in uri_regions:
+            self.begins.append(a)
+            self.ends.append(b)
+
+    def __len__(self) -> int:
+        return len(self.begins)
+
+    def find_intersected(self, regions: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        @brief Find URI regions which intersect (or touch) any of the regions.
+
+        @param regions The sorted regions, whose `region[0] <= region[1]`
+
+        @return Sorted URI regions
+        """
+        found: list[tuple[int, int]] = []
+        idx_min = 0
+        for a, b in regions:
+            idx_begin = max(idx_min, bisect_left(self.ends, a))
+            idx_end = bisect_right(self.begins, b)
+            found.extend(zip(self.begins[idx_begin:idx_end], self.ends[idx_begin:idx_end]))
+            # do not report a URI twice
+            idx_min = max(idx_min, idx_end)
+        return found
+
+
+class UriDetectorsManager:
+    # class-level (shared across objects)
+    _detectors: dict[int, UriDetector] = {
+        # buffer_id: UriDetector object,
+    }
+
+    @classmethod
+    def get_detector(cls, buffer_id: int) -> UriDetector:
+        if not (detector := cls._detectors.get(buffer_id)):
+            detector = cls._detectors[buffer_id] = UriDetector()
+        return detector
+
+    @classmethod
+    def delete_detector(cls, buffer_id: int) -> None:
+        cls._detectors.pop(buffer_id, None)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._detectors = {}
+
+
+def merge_region_tuples(regions: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    @brief Merge overlapped or touched regions.
+
+    @param regions The regions, whose `region[0] <= region[1]`
+
+    @return Sorted merged regions
+    """
+    merged: list[tuple[int, int]] = []
+    for a, b in sorted(regions):
+        if merged and a <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+
+def regions_subtract(
+    regions: Iterable[tuple[int, int]],
+    subtrahends: Iterable[tuple[int, int]],
+) -> list[tuple[int, int]]:
+    """
+    @brief Calculate the parts of regions which are not covered by subtrahends.
+
+    @param regions     The regions
+    @param subtrahends The regions to be subtracted
+
+    @return Sorted non-empty remaining regions
+    """
+    merged_subtrahends = merge_region_tuples(subtrahends)
+    remains: list[tuple[int, int]] = []
+    for a, b in merge_region_tuples(regions):
+        # don't slice subtrahends, which copies them for every region
+        for idx in range(max(0, bisect_left(merged_subtrahends, (a,)) - 1), len(merged_subtrahends)):
+            sa, sb = merged_subtrahends[idx]
+            if sa >= b:
+                break
+            if sb <= a:
+                continue
+            if sa > a:
+                remains.append((a, sa))
+            a = max(a, sb)
+        if a < b:
+            remains.append((a, b))
+    return remains
+
+
+def sort_text_changes(changes: Sequence[tuple[int, int, int]]) -> list[tuple[int, int, int]] | None:
+    """
+    @brief Convert text changes, which are made one after another, into changes which are all made on the text
+           before any change. That's possible if changes are made from the begin to the end or the other way,
+           such as those made by multiple cursors.
+
+    @param changes The text changes as `(begin, end, new_len)` in the order they are made
+
+    @return Sorted, non-overlapped changes if they are ordered, `None` otherwise.
+    """
+    if len(changes) <= 1:
+        return list(changes)
+
+    # from the end to the begin, each change doesn't move points of the following changes
+    if all(c[1] <= prev_c[0] and c[0] < prev_c[0] for prev_c, c in zip(changes, changes[1:])):
+        return list(reversed(changes))
+
+    # from the begin to the end, each change moves points of the following changes by its length delta
+    sorted_changes: list[tuple[int, int, int]] = []
+    delta = 0
+    for begin, end, new_len in changes:
+        begin, end = begin - delta, end - delta
+        if sorted_changes and not (begin >= sorted_changes[-1][1] and begin > sorted_changes[-1][0]):
+            return None
+        sorted_changes.append((begin, end, new_len))
+        delta += new_len - (end - begin)
+    return sorted_changes
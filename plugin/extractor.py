@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from collections.abc import Generator
+from contextlib import closing
+from pathlib import Path
+
+import sublime
+
+from .constants import PLUGIN_NAME
+from .detector import SCAN_MARGIN_MIN, UriDetector
+from .settings import get_settings_snapshot
+from .shared import global_get
+
+# the amount of URIs which are written at a time
+WRITE_BATCH_SIZE = 1000
+
+
+class AbstractUriWriter(ABC):
+    """Writes URIs line by line to somewhere."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        """the amount of written URIs"""
+
+    def write(self, uris: list[str]) -> None:
+        if uris:
+            self._write(("\n" if self.count else "") + "\n".join(uris))
+            self.count += len(uris)
+
+    def close(self) -> None:
+        """Finish writing. It's only called when all URIs have been written."""
+
+    def abort(self) -> None:
+        """Give up writing. Written URIs are discarded if possible."""
+
+    @property
+    @abstractmethod
+    def target(self) -> str:
+        """The description of where URIs are written to."""
+
+    @abstractmethod
+    def _write(self, text: str) -> None: ...
+
+
+class ClipboardUriWriter(AbstractUriWriter):
+    def __init__(self) -> None:
+        super().__init__()
+        # the clipboard can only be set at once
+        self._texts: list[str] = []
+
+    @property
+    def target(self) -> str:
+        return "the clipboard"
+
+    def close(self) -> None:
+        # don't wipe the clipboard if there is nothing to be copied
+        if self._texts:
+            sublime.set_clipboard("".join(self._texts))
+        self._texts = []
+
+    def abort(self) -> None:
+        self._texts = []
+
+    def _write(self, text: str) -> None:
+        self._texts.append(text)
+
+
+class ViewUriWriter(AbstractUriWriter):
+    def __init__(self, window: sublime.Window, name: str) -> None:
+        super().__init__()
+        self.view = window.new_file()
+        self.view.set_name(name)
+
+    @property
+    def target(self) -> str:
+        return "a new view"
+
+    def abort(self) -> None:
+        self.view.set_scratch(True)
+        self.view.close()
+
+    def _write(self, text: str) -> None:
+        self.view.run_command("append", {"characters": text})
+
+
+class FileUriWriter(AbstractUriWriter):
+    def __init__(self, path: str | Path) -> None:
+        super().__init__()
+        self.path = Path(path).expanduser()
+        # the target file is only replaced when all URIs have been written
+        self._temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = self._temp_path.open("w", encoding="utf-8", newline="\n")
+
+    @property
+    def target(self) -> str:
+        return f'"{self.path}"'
+
+    def close(self) -> None:
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        self._temp_path.unlink(missing_ok=True)
+
+    def _write(self, text: str) -> None:
+        self._file.write(text)
+
+
+def hash_uri(uri: str) -> int:
+    """
+    @brief Get a 64-bit hash of the URI, which is much smaller than the URI itself for being remembered.
+
+    @param uri The URI
+
+    @return The hash
+    """
+    return int.from_bytes(hashlib.blake2b(uri.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def iter_uris_by_chunks(view: sublime.View, unique: bool = True) -> Generator[tuple[int, list[str]], None, None]:
+    """
+    @brief Find URIs in the view chunk by chunk, so the whole text is never loaded at once.
+
+    @param view   The view
+    @param unique Skip URIs which have been found
+
+    @return A generator for (scanned point, URIs in the chunk in the order of their positions)
+    """
+    view_size = view.size()
+    change_count = view.change_count()
+    settings = get_settings_snapshot()
+    seen_hashes: set[int] = set()
+
+    with closing(
+        UriDetector.scan_region(
+            view,
+            global_get("uri_regex_obj"),
+            settings.expand_uri_regions_selectors,
+            (0, view_size),
+            settings.detection_chunk_size,
+            max(settings.uri_search_radius, SCAN_MARGIN_MIN),
+        )
+    ) as scanner:
+        for (_, scanned_end), uri_regions in scanner:
+            if view.change_count() != change_count:
+                raise RuntimeError("The view has been modified during extracting URIs.")
+
+            uris: list[str] = []
+            for uri_region in uri_regions:
+                uri = view.substr(sublime.Region(*uri_region))
+                if unique:
+                    if (uri_hash := hash_uri(uri)) in seen_hashes:
+                        continue
+                    seen_hashes.add(uri_hash)
+                uris.append(uri)
+            yield scanned_end, uris
+
+
+def extract_uris(view: sublime.View, writer: AbstractUriWriter, unique: bool = True, sort: bool = False) -> None:
+    """
+    @brief Extract URIs in the view with bounded memory and write them with the writer.
+           Each chunk is scanned in its own async callback, so other async tasks won't wait for the whole view.
+           The progress is shown in the status bar. Sorting URIs needs to remember all of them though.
+
+    @param view   The view
+    @param writer The writer
+    @param unique Skip duplicate URIs
+    @param sort   Sort URIs
+    """
+    steps = _extract_uris_step_by_step(view, writer, unique, sort)
+
+    def extract_chunk() -> None:
+        try:
+            next(steps)
+        except StopIteration:
+            return
+        sublime.set_timeout_async(extract_chunk)
+
+    extract_chunk()
+
+
+def _extract_uris_step_by_step(
+    view: sublime.View,
+    writer: AbstractUriWriter,
+    unique: bool,
+    sort: bool,
+) -> Generator[None, None, None]:
+    """
+    @brief The implementation of `extract_uris()`, which yields after each chunk.
+    """
+    status_key = f"{PLUGIN_NAME}.extractor"
+    view_size = view.size()
+
+    uris: list[str] = []
+    is_completed = False
+    try:
+        for scanned_end, chunk_uris in iter_uris_by_chunks(view, unique):
+            uris += chunk_uris
+            if not sort and len(uris) >= WRITE_BATCH_SIZE:
+                writer.write(uris)
+                uris = []
+            view.set_status(status_key, f"{PLUGIN_NAME}: extracting URIs... {scanned_end * 100 // max(1, view_size)}%")
+            yield
+        if sort:
+            uris.sort()
+        writer.write(uris)
+        is_completed = True
+    except RuntimeError as e:
+        sublime.status_message(f"{PLUGIN_NAME}: {e}")
+        return
+    finally:
+        # an aborted extraction must not leave partial results behind
+        if is_completed:
+            writer.close()
+        else:
+            writer.abort()
+        view.erase_status(status_key)
+
+    if writer.count:
+        sublime.status_message(f"{PLUGIN_NAME}: {writer.count} URIs are written to {writer.target}.")
+    else:
+        sublime.status_message(f"{PLUGIN_NAME}: no URI is found.")
@@ -2,23 +2,30 @@ from __future__ import annotations
 
 import re
 import urllib.parse as urllib_parse
-import webbrowser
 from collections.abc import Iterable
-from typing import Any, Pattern
+from typing import Any
 
 import sublime
 
+from .detector import UriDetectorsManager, merge_region_tuples
+from .launcher import UriLauncher
 from .libs import triegex
 from .logger import log
-from .settings import get_setting
+from .prefilter import PrefilteredPattern, get_regex_leading_literal
+from .settings import get_setting, get_settings_snapshot
 from .shared import global_get
 from .types import RegionLike
-from .utils import convert_to_st_region, is_regions_intersected, merge_regions, region_expand, region_shift
+from .utils import convert_to_region_tuple, view_expand_region
+
+# search regions which are closer than this are scanned as one span of text
+SEARCH_SPAN_MAX_GAP = 4096
+# the max length of a span of text, which bounds the memory used by a `view.substr()`
+SEARCH_SPAN_MAX_LENGTH = 4 * 1024 * 1024
 
 
 def open_uri_with_browser(uri: str, browser: str | None = "") -> None:
     """
-    @brief Open the URI with the browser.
+    @brief Open the URI with the browser in the background.
 
     @param uri     The uri
     @param browser The browser
@@ -39,24 +46,22 @@ def open_uri_with_browser(uri: str, browser: str | None = "") -> None:
     if browser == "":
         browser = None
 
-    try:
-        # https://docs.python.org/3.3/library/webbrowser.html#webbrowser.get
-        webbrowser.get(browser).open(uri, autoraise=True)
-    except Exception as e:
-        log("critical", f'Failed to open browser "{browser}" to "{uri}" because {e}')
+    # browsers may take a while to be launched so never let them block
+    UriLauncher.open(uri, browser)
 
 
-def compile_uri_regex() -> tuple[Pattern[str] | None, tuple[str, ...]]:
+def compile_uri_regex() -> tuple[PrefilteredPattern | None, tuple[str, ...]]:
     """
     @brief Get the compiled regex object for matching URIs.
 
-    @return (compiled regex object, activated schemes)
+    @return (compiled regex object with a literal prefilter, activated schemes)
     """
     detect_schemes: dict[str, dict[str, Any]] = get_setting("detect_schemes")
     uri_path_regexes: dict[str, str] = get_setting("uri_path_regexes")
 
     activated_schemes: list[str] = []
     uri_regexes: list[str] = []
+    scheme_literals: list[str] = []
     # longest scheme first
     for scheme in sorted(detect_schemes.keys(), key=len, reverse=True):
         if not (scheme_settings := detect_schemes[scheme]).get("enabled", False):
@@ -68,6 +73,8 @@ def compile_uri_regex() -> tuple[Pattern[str] | None, tuple[str, ...]]:
             continue
 
         activated_schemes.append(scheme)
+        # every URI begins with its scheme, or with the leading literal of the path regex if there is no scheme
+        scheme_literals.append(scheme or get_regex_leading_literal(uri_path_regexes[path_regex_name]))
         uri_regexes.append(re.escape(scheme) + rf"(?:(?#{path_regex_name}))")
 
     # fmt: off
@@ -89,7 +96,8 @@ def compile_uri_regex() -> tuple[Pattern[str] | None, tuple[str, ...]]:
 
     regex_obj = None
     try:
-        regex_obj = re.compile(regex, re.IGNORECASE)
+        regex_obj = PrefilteredPattern(re.compile(regex, re.IGNORECASE), scheme_literals)
+        log("debug", f"URI prefilter literals: {regex_obj.literals}")
     except Exception as e:
         log(
             "critical", f'Cannot compile regex `{regex}` because {e}. Please check "uri_path_regex" in plugin settings.'
@@ -127,39 +135,66 @@ def find_uri_regions_by_regions(
 
     @return Found URI regions
     """
-    st_regions = sorted(convert_to_st_region(region, sort=True) for region in regions)
-    search_regions = merge_regions(
-        (
-            # ...
-            region_expand(st_region, int(search_radius or get_setting("uri_search_radius")))
-            for st_region in st_regions
-        ),
-        True,
+    region_tuples = sorted(convert_to_region_tuple(region, sort=True) for region in regions)
+    settings = get_settings_snapshot()
+    search_radius = int(search_radius or settings.uri_search_radius)
+
+    # use the last detection result if it's still up-to-date for these regions
+    uri_region_tuples = UriDetectorsManager.get_detector(view.buffer_id()).find_uri_regions(
+        view,
+        region_tuples,
+        search_radius,
     )
+    if uri_region_tuples is not None:
+        return [sublime.Region(*uri_region) for uri_region in uri_region_tuples]
 
-    uri_regions: list[sublime.Region] = []
-    for search_region in search_regions:
+    # regions are handled as tuples since comparing "sublime.Region"s is slow with lots of cursors
+    search_regions = merge_region_tuples((max(0, a - search_radius), b + search_radius) for a, b in region_tuples)
+
+    uri_regex_obj = global_get("uri_regex_obj")
+    uri_regions: list[tuple[int, int]] = []
+    for span_begin, span_end in group_search_regions(search_regions):
         uri_regions.extend(
             # convert "finditer()" coordinate into ST's coordinate
-            sublime.Region(*region_shift(m.span(), max(0, search_region.a)))
-            for m in global_get("uri_regex_obj").finditer(view.substr(search_region))
+            (span_begin + m.start(), span_begin + m.end())
+            for m in uri_regex_obj.finditer(view.substr(sublime.Region(span_begin, span_end)))
+        )
+    # expand found regions like the detector does, so the result doesn't depend on which path is taken
+    if selectors := settings.expand_uri_regions_selectors:
+        uri_regions = sorted(
+            view_expand_region(view, sublime.Region(*uri_region), selectors).to_tuple() for uri_region in uri_regions
         )
 
-    # only pick up "uri_region"s that are intersected with "st_regions"
-    # note that both "st_regions" and "uri_regions" are guaranteed sorted here
-    regions_idx = 0
+    # only pick up URI regions that are intersected with (or touch) "regions"
+    # both of "target_regions" and "uri_regions" are sorted and non-overlapped so they can be merged linearly
+    target_regions = merge_region_tuples(region_tuples)
+    target_idx = 0
     uri_regions_intersected: list[sublime.Region] = []
+    for uri_begin, uri_end in uri_regions:
+        # later URI regions begin even later so skipped target regions are useless since now
+        while target_idx < len(target_regions) and target_regions[target_idx][1] < uri_begin:
+            target_idx += 1
+        if target_idx == len(target_regions):
+            break
+        if target_regions[target_idx][0] <= uri_end:
+            uri_regions_intersected.append(sublime.Region(uri_begin, uri_end))
 
-    for uri_region in uri_regions:
-        for idx in range(regions_idx, len(st_regions)):
-            region = st_regions[idx]
+    return uri_regions_intersected
 
-            # later "uri_region" is always even larger so this "idx" is useless since now
-            if uri_region.a > region.b:
-                regions_idx = idx + 1
 
-            if is_regions_intersected(uri_region, region, True):
-                uri_regions_intersected.append(uri_region)
-                break
+def group_search_regions(search_regions: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    @brief Group nearby search regions into a few large spans, so that the text is fetched and scanned only once
+           per span rather than once per search region.
 
-    return uri_regions_intersected
+    @param search_regions The sorted non-overlapped search regions
+
+    @return Sorted spans of text to be scanned
+    """
+    spans: list[tuple[int, int]] = []
+    for begin, end in search_regions:
+        if spans and begin - spans[-1][1] <= SEARCH_SPAN_MAX_GAP and end - spans[-1][0] <= SEARCH_SPAN_MAX_LENGTH:
+            spans[-1] = (spans[-1][0], end)
+        else:
+            spans.append((begin, end))
+    return spans
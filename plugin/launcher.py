@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+import time
+import webbrowser
+from collections import deque
+
+from .logger import log
+from .settings import get_settings_snapshot
+
+
+class UriLauncher:
+    """
+    Opens URIs with browsers in background threads so that the UI thread never waits for browsers.
+    Queued URIs are deduplicated and launched with limited concurrency and rate.
+    """
+
+    # class-level (shared across objects)
+    _lock = threading.Lock()
+    _generation = 0
+    # (uri, browser)
+    _queue: deque[tuple[str, str | None]] = deque()
+    _in_flight: set[tuple[str, str | None]] = set()
+    _worker_count = 0
+    _next_launch_s = 0.0
+    _controllers: dict[str | None, webbrowser.BaseBrowser] = {
+        # browser name: controller,
+    }
+
+    @classmethod
+    def open(cls, uri: str, browser: str | None = None) -> None:
+        """
+        @brief Queue the URI to be opened. It's ignored if the same URI is being opened with the same browser.
+
+        @param uri     The URI
+        @param browser The browser name, or `None` to use the system's default
+        """
+        with cls._lock:
+            if (uri, browser) in cls._in_flight:
+                log("debug", f'Skip opening "{uri}" because it is being opened.')
+                return
+            cls._in_flight.add((uri, browser))
+            cls._queue.append((uri, browser))
+
+            if cls._worker_count < get_settings_snapshot().browser_concurrency:
+                cls._worker_count += 1
+                threading.Thread(target=cls._work, args=(cls._generation,), daemon=True).start()
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop queued URIs and cached browser controllers. URIs which are being opened are not affected."""
+        with cls._lock:
+            cls._generation += 1
+            cls._queue.clear()
+            cls._in_flight.clear()
+            cls._worker_count = 0
+            cls._next_launch_s = 0.0
+            cls._controllers.clear()
+
+    @classmethod
+    def _work(cls, generation: int) -> None:
+        while True:
+            with cls._lock:
+                if generation != cls._generation:
+                    return
+                if not cls._queue:
+                    cls._worker_count -= 1
+                    return
+                uri, browser = cls._queue.popleft()
+
+                # reserve a time slot for launching so that browsers are not flooded
+                rate_limit = get_settings_snapshot().browser_rate_limit
+                now_s = time.perf_counter()
+                launch_s = max(now_s, cls._next_launch_s)
+                cls._next_launch_s = launch_s + (1 / rate_limit if rate_limit > 0 else 0)
+
+            time.sleep(launch_s - now_s)
+            try:
+                cls._get_controller(browser).open(uri, autoraise=True)
+            except Exception as e:
+                log("critical", f'Failed to open browser "{browser}" to "{uri}" because {e}')
+            finally:
+                with cls._lock:
+                    cls._in_flight.discard((uri, browser))
+
+    @classmethod
+    def _get_controller(cls, browser: str | None) -> webbrowser.BaseBrowser:
+        with cls._lock:
+            if controller := cls._controllers.get(browser):
+                return controller
+
+        # https://docs.python.org/3.8/library/webbrowser.html#webbrowser.get
+        controller = webbrowser.get(browser)
+        with cls._lock:
+            return cls._controllers.setdefault(browser, controller)
@@ -1,5 +1,5 @@
 # @see https://github.com/ZhukovAlexander/triegex
-import collections
+import collections.abc
 
 __all__ = ("Triegex",)
 
@@ -92,7 +92,7 @@ class TriegexNode:
         return sub_regexes[0]
 
 
-class Triegex(collections.MutableSet):
+class Triegex(collections.abc.MutableSet):
     def __init__(self, *words):
         """
         Trigex constructor.
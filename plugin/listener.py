@@ -3,8 +3,13 @@ from __future__ import annotations
 import sublime
 import sublime_plugin
 
+from .constants import PLUGIN_NAME
+from .detector import UriDetectorsManager
 from .helpers import find_uri_regions_by_region
-from .settings import get_setting, get_setting_show_open_button
+from .settings import get_setting_show_open_button, get_settings_snapshot
+from .shared import global_get
+from .ui.image import ScopeColorResolver, get_color_scheme_id
+from .ui.image_prewarmer import ImagePrewarmer
 from .ui.phantom_set import delete_phantom_set, init_phantom_set
 from .ui.popup import show_popup
 from .ui.region_drawing import draw_uri_regions
@@ -18,15 +23,49 @@ class OpenUriViewEventListener(sublime_plugin.ViewEventListener):
         init_phantom_set(self.view)
         view_last_typing_timestamp_val(self.view, 0)
 
+        self._color_scheme_setting = self.view.settings().get("color_scheme")
+        self._color_scheme = get_color_scheme_id(self.view)
+        self.view.settings().add_on_change(PLUGIN_NAME, self._on_settings_changed)
+
     def on_pre_close(self) -> None:
+        self.view.settings().clear_on_change(PLUGIN_NAME)
         delete_phantom_set(self.view)
+        if not self.view.clones():
+            UriDetectorsManager.delete_detector(self.view.buffer_id())
 
     def on_load_async(self) -> None:
         view_is_dirty_val(self.view, True)
+        global_get("renderer").request_update(self.view)
+
+    def on_activated_async(self) -> None:
+        # the color scheme may be reloaded or follow the OS theme without changing the setting
+        self._check_color_scheme()
+        global_get("renderer").request_update(self.view)
+        # the color scheme may be different from other views
+        ImagePrewarmer.request(self.view)
 
     def on_modified_async(self) -> None:
         view_is_dirty_val(self.view, True)
         view_last_typing_timestamp_val(self.view, get_timestamp())
+        global_get("renderer").request_update(self.view, get_settings_snapshot().typing_period)
+
+    def _on_settings_changed(self) -> None:
+        # this is called for every view setting change (including ours) so only check the cheap one here
+        if (color_scheme_setting := self.view.settings().get("color_scheme")) != self._color_scheme_setting:
+            self._color_scheme_setting = color_scheme_setting
+            sublime.set_timeout_async(self._check_color_scheme)
+
+    def _check_color_scheme(self) -> None:
+        """
+        @brief Forget colors resolved with the previous color scheme if the view's color scheme has been changed.
+        """
+        if (color_scheme := get_color_scheme_id(self.view)) == self._color_scheme:
+            return
+        ScopeColorResolver.forget_color_scheme(self._color_scheme)
+        ImagePrewarmer.forget_color_scheme(self._color_scheme)
+        self._color_scheme = color_scheme
+        ImagePrewarmer.request(self.view)
+        global_get("renderer").request_rerender_all()
 
     def on_hover(self, point: int, hover_zone: int) -> None:
         if hover_zone != sublime.HOVER_TEXT:
@@ -37,5 +76,32 @@ class OpenUriViewEventListener(sublime_plugin.ViewEventListener):
         if uri_regions and get_setting_show_open_button(self.view) == "hover":
             show_popup(self.view, uri_regions[0], point)
 
-        if get_setting("draw_uri_regions.enabled") == "hover":
+        if get_settings_snapshot().draw_uri_regions_enabled == "hover":
             draw_uri_regions(self.view, uri_regions)
+
+
+class OpenUriTextChangeListener(sublime_plugin.TextChangeListener):
+    @classmethod
+    def is_applicable(cls, buffer: sublime.Buffer) -> bool:
+        return True
+
+    def on_text_changed(self, changes: list[sublime.TextChange]) -> None:
+        if self.buffer:
+            # the change count when changes are reported, which is never less than the one they produce
+            UriDetectorsManager.get_detector(self.buffer.id()).push_changes(
+                changes,
+                self.buffer.primary_view().change_count(),
+            )
+
+    def on_revert_async(self) -> None:
+        self._invalidate()
+
+    def on_reload_async(self) -> None:
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        if self.buffer:
+            UriDetectorsManager.get_detector(self.buffer.id()).invalidate()
+            for view in self.buffer.views():
+                view_is_dirty_val(view, True)
+                global_get("renderer").request_update(view)
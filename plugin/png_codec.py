@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import struct
+import zlib
+from functools import lru_cache
+from itertools import accumulate
+
+from .libs import png
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# color type: samples per pixel
+COLOR_TYPE_PLANES = {
+    0: 1,  # grey
+    2: 3,  # RGB
+    3: 1,  # palette
+    4: 2,  # grey with alpha
+    6: 4,  # RGBA
+}
+
+
+def decode_png_to_rgba8(img_bytes: bytes) -> tuple[int, int, bytes]:
+    """
+    @brief Decode the PNG bytes into RGBA pixels with 8-bit samples.
+           Common 8-bit non-interlaced images are decoded by a fast path. Others are decoded by the general codec.
+
+    @param img_bytes The PNG image bytes
+
+    @return (width, height, RGBA pixels)
+    """
+    try:
+        if decoded := _decode_simple_png(img_bytes):
+            return decoded
+    except (ValueError, struct.error, zlib.error):
+        pass
+
+    w, h, rows, _ = png.Reader(bytes=img_bytes).asRGBA8()
+    return w, h, b"".join(map(bytes, rows))
+
+
+def encode_rgba8_to_png(width: int, height: int, pixels: bytes | bytearray) -> bytes:
+    """
+    @brief Encode RGBA pixels with 8-bit samples into PNG bytes.
+
+    @param width  The width
+    @param height The height
+    @param pixels The RGBA pixels
+
+    @return The PNG image bytes
+    """
+    stride = width * 4
+    # every scanline is prefixed with filter type 0 (None)
+    scanlines = b"".join(b"\x00" + pixels[y * stride : (y + 1) * stride] for y in range(height))
+
+    return b"".join((
+        PNG_SIGNATURE,
+        _pack_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        _pack_chunk(b"IDAT", zlib.compress(scanlines)),
+        _pack_chunk(b"IEND", b""),
+    ))
+
+
+def _pack_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def _decode_simple_png(img_bytes: bytes) -> tuple[int, int, bytes] | None:
+    """
+    @brief Decode 8-bit non-interlaced grey/RGB/palette images, with or without alpha.
+
+    @param img_bytes The PNG image bytes
+
+    @return (width, height, RGBA pixels), or `None` if the image is not supported.
+    """
+    if not img_bytes.startswith(PNG_SIGNATURE):
+        return None
+
+    header = b""
+    palette = b""
+    transparency: bytes | None = None
+    idat_chunks: list[bytes] = []
+
+    pos = len(PNG_SIGNATURE)
+    while pos < len(img_bytes):
+        (length,) = struct.unpack_from(">I", img_bytes, pos)
+        chunk_type = img_bytes[pos + 4 : pos + 8]
+        data = img_bytes[pos + 8 : pos + 8 + length]
+        (crc,) = struct.unpack_from(">I", img_bytes, pos + 8 + length)
+        pos += 12 + length
+
+        if zlib.crc32(chunk_type + data) != crc:
+            raise ValueError(f"Checksum error in {chunk_type!r} chunk")
+
+        if chunk_type == b"IHDR":
+            header = data
+        elif chunk_type == b"PLTE":
+            palette = data
+        elif chunk_type == b"tRNS":
+            transparency = data
+        elif chunk_type == b"IDAT":
+            idat_chunks.append(data)
+        elif chunk_type == b"IEND":
+            break
+
+    width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", header)
+    if bit_depth != 8 or interlace or color_type not in COLOR_TYPE_PLANES:
+        return None
+    # transparent colors for non-palette images are rare
+    if transparency is not None and color_type != 3:
+        return None
+
+    planes = COLOR_TYPE_PLANES[color_type]
+    samples = _unfilter_scanlines(zlib.decompress(b"".join(idat_chunks)), width, height, planes)
+
+    if color_type == 6:
+        return width, height, bytes(samples)
+
+    pixel_count = width * height
+    pixels = bytearray(pixel_count * 4)
+    if color_type == 2:
+        for channel in range(3):
+            pixels[channel::4] = samples[channel::3]
+        pixels[3::4] = b"\xff" * pixel_count
+    elif color_type == 0:
+        for channel in range(3):
+            pixels[channel::4] = samples
+        pixels[3::4] = b"\xff" * pixel_count
+    elif color_type == 4:
+        for channel in range(3):
+            pixels[channel::4] = samples[0::2]
+        pixels[3::4] = samples[1::2]
+    else:
+        # lookup tables from palette indexes to channel values, where unknown indexes are mapped to 0
+        luts = [palette[channel::3].ljust(256, b"\x00")[:256] for channel in range(3)]
+        luts.append((transparency or b"").ljust(len(palette) // 3, b"\xff").ljust(256, b"\x00")[:256])
+        for channel, lut in enumerate(luts):
+            pixels[channel::4] = samples.translate(lut)
+
+    return width, height, bytes(pixels)
+
+
+def _unfilter_scanlines(data: bytes, width: int, height: int, planes: int) -> bytearray:
+    """
+    @brief Reverse filters of scanlines.
+    @see   https://www.w3.org/TR/png/#9Filters
+
+    @param data   The decompressed image data
+    @param width  The width
+    @param height The height
+    @param planes The amount of samples per pixel, which is also bytes per pixel for 8-bit images
+
+    @return Unfiltered samples
+    """
+    stride = width * planes
+    if len(data) < (stride + 1) * height:
+        raise ValueError("Image data is truncated")
+
+    samples = bytearray(stride * height)
+    prev_line = bytes(stride)
+    for y in range(height):
+        pos = y * (stride + 1)
+        filter_type = data[pos]
+        line = data[pos + 1 : pos + 1 + stride]
+
+        if filter_type == 1:  # Sub
+            line = _undo_filter_sub(line, planes)
+        elif filter_type == 2:  # Up
+            line = _add_bytes(line, prev_line)
+        elif filter_type == 3:  # Average
+            line = _undo_filter_average(line, prev_line, planes)
+        elif filter_type == 4:  # Paeth
+            line = _undo_filter_paeth(line, prev_line, planes)
+        elif filter_type != 0:
+            raise ValueError(f"Unknown filter type: {filter_type}")
+
+        samples[y * stride : (y + 1) * stride] = line
+        prev_line = line
+
+    return samples
+
+
+@lru_cache(maxsize=16)
+def _get_add_masks(length: int) -> tuple[int, int]:
+    return int.from_bytes(b"\x7f" * length, "little"), int.from_bytes(b"\x80" * length, "little")
+
+
+def _add_bytes(a: bytes, b: bytes) -> bytes:
+    """Add bytes pairwise modulo 256, where all bytes are added at once as big integers."""
+    low_mask, high_mask = _get_add_masks(len(a))
+    x, y = int.from_bytes(a, "little"), int.from_bytes(b, "little")
+    # add the lower 7 bits so there is no carry between bytes, then fix the highest bits by XOR
+    return (((x & low_mask) + (y & low_mask)) ^ ((x ^ y) & high_mask)).to_bytes(len(a), "little")
+
+
+def _undo_filter_sub(line: bytes, planes: int) -> bytes:
+    # each channel is a prefix sum modulo 256
+    result = bytearray(len(line))
+    for channel in range(planes):
+        result[channel::planes] = bytes(map((0xFF).__and__, accumulate(line[channel::planes])))
+    return bytes(result)
+
+
+def _undo_filter_average(line: bytes, prev_line: bytes, planes: int) -> bytes:
+    result = bytearray(line)
+    for i in range(len(result)):
+        left = result[i - planes] if i >= planes else 0
+        result[i] = (result[i] + ((left + prev_line[i]) >> 1)) & 0xFF
+    return bytes(result)
+
+
+def _undo_filter_paeth(line: bytes, prev_line: bytes, planes: int) -> bytes:
+    result = bytearray(line)
+    for i in range(len(result)):
+        if i >= planes:
+            a, c = result[i - planes], prev_line[i - planes]
+        else:
+            a = c = 0
+        b = prev_line[i]
+        p = a + b - c
+        pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+        if pa <= pb and pa <= pc:
+            predictor = a
+        elif pb <= pc:
+            predictor = b
+        else:
+            predictor = c
+        result[i] = (result[i] + predictor) & 0xFF
+    return bytes(result)
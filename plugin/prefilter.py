@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from typing import Match, Pattern
+
+REGEX_META_CHARS = frozenset(".^$*+?{}[]|()")
+
+CASE_FOLD_TABLE = str.maketrans({
+    # non-ASCII chars which match ASCII letters case-insensitively in the "re" module
+    "\u0130": "i",  # "İ", whose lowercase has 2 chars
+    "\u0131": "i",  # "ı"
+    "\u017f": "s",  # "ſ"
+    "\u212a": "k",  # Kelvin sign
+})
+
+
+class PrefilteredPattern:
+    """
+    Wraps a compiled regex whose every match begins with one of the given literals (case-insensitively).
+    Candidate positions are found by fast literal searches and the regex only runs at those positions.
+    If there is no literal, it's just the same as the wrapped regex.
+    """
+
+    def __init__(self, regex_obj: Pattern[str], literals: Iterable[str] = tuple()) -> None:
+        self.regex_obj = regex_obj
+        self.literals = tuple(sorted({literal.lower() for literal in literals}))
+
+        # an empty literal can be found everywhere so prefiltering is useless
+        if "" in self.literals:
+            self.literals = tuple()
+
+    @property
+    def pattern(self) -> str:
+        return self.regex_obj.pattern
+
+    def finditer(self, string: str) -> Iterator[Match[str]]:
+        """
+        @brief The same as `Pattern.finditer()` but much faster if there are only a few matches.
+
+        @param string The string
+
+        @return An iterator for matches
+        """
+        if not self.literals:
+            yield from self.regex_obj.finditer(string)
+            return
+
+        lowered = string.translate(CASE_FOLD_TABLE).lower()
+        # positions in the lowered string won't be the same as the original one
+        if len(lowered) != len(string):
+            yield from self.regex_obj.finditer(string)
+            return
+
+        next_hits = [lowered.find(literal) for literal in self.literals]
+        pos = 0
+        while True:
+            hit = -1
+            for idx, literal in enumerate(self.literals):
+                if 0 <= next_hits[idx] < pos:
+                    next_hits[idx] = lowered.find(literal, pos)
+                if next_hits[idx] >= 0 and (hit < 0 or next_hits[idx] < hit):
+                    hit = next_hits[idx]
+
+            if hit < 0:
+                return
+
+            # unlike slicing, "\b" and lookbehinds still see chars before "hit"
+            if m := self.regex_obj.match(string, hit):
+                yield m
+                pos = max(m.end(), hit + 1)
+            else:
+                pos = hit + 1
+
+
+def get_regex_leading_literal(regex: str) -> str:
+    """
+    @brief Get the literal which every match of the regex begins with.
+
+    @param regex The regex
+
+    @return The literal. An empty string if it can't be determined.
+    """
+    if has_regex_top_level_alternation(regex):
+        return ""
+
+    # leading word boundaries are zero-width
+    while regex.startswith(r"\b"):
+        regex = regex[2:]
+
+    literal: list[str] = []
+    idx = 0
+    while idx < len(regex):
+        char = regex[idx]
+        if char == "\\":
+            # "\d", "\w", "\1", etc. are not literals
+            if (char := regex[idx + 1 : idx + 2]).isalnum() or not char:
+                break
+            idx += 2
+        elif char in REGEX_META_CHARS:
+            break
+        else:
+            idx += 1
+
+        quantifier = regex[idx : idx + 1]
+        # the char is optional
+        if quantifier in ("?", "*", "{"):
+            break
+        literal.append(char)
+        if quantifier == "+":
+            break
+
+    return "".join(literal)
+
+
+def has_regex_top_level_alternation(regex: str) -> bool:
+    """
+    @brief Determine if the regex has a "|" which is not enclosed by any group.
+
+    @param regex The regex
+
+    @return `True` if the regex has top-level alternation, `False` otherwise.
+    """
+    depth = 0
+    idx = 0
+    while idx < len(regex):
+        char = regex[idx]
+        if char == "\\":
+            idx += 2
+            continue
+        if char == "[":
+            # skip the char class, where "]" is literal if it's the first char
+            idx += 1
+            if regex[idx : idx + 1] == "^":
+                idx += 1
+            if regex[idx : idx + 1] == "]":
+                idx += 1
+            while idx < len(regex) and regex[idx] != "]":
+                idx += 2 if regex[idx] == "\\" else 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return True
+        idx += 1
+    return False
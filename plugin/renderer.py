@@ -1,106 +1,243 @@
 from __future__ import annotations
 
 import threading
-from collections.abc import Callable
-from typing import Any
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from math import inf
 
 import sublime
 
+from .detector import UriDetectorsManager
 from .logger import log
-from .settings import get_setting, get_setting_show_open_button, is_view_too_large, is_view_typing
+from .scanner_pool import ScannerPoolManager
+from .settings import (
+    get_setting_show_open_button,
+    get_settings_snapshot,
+    get_view_detection_region,
+    get_view_typing_remaining_ms,
+    is_view_too_large,
+    is_view_typing,
+)
 from .shared import global_get
 from .ui.phantom_set import erase_phantom_set, update_phantom_set
 from .ui.region_drawing import draw_uri_regions, erase_uri_regions
-from .utils import is_processable_view, is_transient_view, list_foreground_views, view_find_all, view_is_dirty_val
+from .utils import (
+    get_timestamp,
+    is_processable_view,
+    is_transient_view,
+    list_all_views,
+    list_foreground_views,
+    view_is_dirty_val,
+)
 
+PROGRESSIVE_PUBLISH_INTERVAL_S = 0.5
+"""the min interval to publish URI regions of a view which is still being detected progressively"""
 
-class RepeatingTimer:
-    def __init__(self, interval_ms: int, func: Callable, *args: Any, **kwargs: Any) -> None:
-        self.interval_s = interval_ms / 1000
-        self.timer: threading.Timer | None = None
-        self.is_running = False
-        self.set_func(func, *args, **kwargs)
 
-    def set_func(self, func: Callable, *args: Any, **kwargs: Any) -> None:
-        self.func = func
-        self.args = args
-        self.kwargs = kwargs
+class Renderer:
+    """
+    Renders views on demand. Requests are debounced and handled in the async thread.
+    Nothing is done when there is no request.
+    """
+
+    def __init__(self, interval_ms: int = 1000) -> None:
+        self.interval_ms = interval_ms
+        """the interval for checking visible regions in the "viewport" detection mode"""
+        self.is_running = False
+        self.rerender_generation = 0
+        """increased when views should be re-rendered even if they are not modified"""
+
+        self._lock = threading.Lock()
+        self._is_polling = False
+        self._timer_due_timestamps: set[float] = set()
+        self._view_due_timestamps: dict[int, float] = {
+            # view_id: the timestamp (in sec) when the view should be updated,
+        }
+        self._view_published_timestamps: dict[int, float] = {
+            # view_id: the timestamp (in sec) when URI regions were published while detecting progressively,
+        }
 
     def set_interval(self, interval_ms: int) -> None:
-        self.interval_s = interval_ms / 1000
+        self.interval_ms = interval_ms
 
     def start(self) -> None:
-        self.timer = threading.Timer(self.interval_s, self._callback)
-        self.timer.start()
         self.is_running = True
+        self.request_update_all()
 
     def cancel(self) -> None:
-        if self.timer:
-            self.timer.cancel()
         self.is_running = False
+        with self._lock:
+            self._view_due_timestamps.clear()
+        self._view_published_timestamps.clear()
+
+    def request_update(self, view: sublime.View, delay_ms: float = 0) -> None:
+        """
+        @brief Request to update the view after the delay. An earlier request wins.
+
+        @param view     The view
+        @param delay_ms The delay (in millisecond)
+        """
+        if not self.is_running:
+            return
 
-    def _callback(self) -> None:
-        self.func(*self.args, **self.kwargs)
-        self.start()
-
-
-class RendererThread(RepeatingTimer):
-    def __init__(self, interval_ms: int = 1000) -> None:
-        super().__init__(interval_ms, self._update_foreground_views)
-
-        # to prevent from overlapped processes when using a low interval
-        self._is_rendering = False
+        due_s = get_timestamp() + delay_ms / 1000
+        with self._lock:
+            view_id = view.id()
+            self._view_due_timestamps[view_id] = min(due_s, self._view_due_timestamps.get(view_id, due_s))
+        self._schedule(due_s)
 
-    def _update_foreground_views(self) -> None:
-        if self._is_rendering:
+    def request_update_all(self) -> None:
+        """
+        @brief Request to update all foreground views.
+        """
+        for view in list_foreground_views():
+            self.request_update(view)
+
+        if self.is_running and not self._is_polling and get_settings_snapshot().detection_mode == "viewport":
+            self._is_polling = True
+            sublime.set_timeout_async(self._poll_viewports, self.interval_ms)
+
+    def request_rerender_all(self) -> None:
+        """
+        @brief Request to re-render all views even if they are not modified.
+        """
+        self.rerender_generation += 1
+        for view in list_all_views():
+            if is_processable_view(view):
+                view_is_dirty_val(view, True)
+        self.request_update_all()
+
+    def _schedule(self, due_s: float) -> None:
+        with self._lock:
+            # a timer will be fired earlier and it will schedule the next one
+            if any(timer_due_s <= due_s for timer_due_s in self._timer_due_timestamps):
+                return
+            self._timer_due_timestamps.add(due_s)
+
+        sublime.set_timeout_async(lambda: self._on_timer(due_s), max(0, due_s - get_timestamp()) * 1000)
+
+    def _on_timer(self, timer_due_s: float) -> None:
+        now_s = get_timestamp()
+        with self._lock:
+            self._timer_due_timestamps.discard(timer_due_s)
+            view_ids = [view_id for view_id, due_s in self._view_due_timestamps.items() if due_s <= now_s]
+            for view_id in view_ids:
+                del self._view_due_timestamps[view_id]
+            next_due_s = min(self._view_due_timestamps.values(), default=None)
+
+        if self.is_running:
+            # background views will be requested when they are activated
+            foreground_view_ids = {view.id() for view in list_foreground_views()}
+            for view_id in view_ids:
+                if view_id in foreground_view_ids:
+                    self._update_view(sublime.View(view_id))
+
+        if next_due_s is not None:
+            self._schedule(next_due_s)
+
+    def _poll_viewports(self) -> None:
+        # there is no scrolling event so visible regions have to be polled
+        if not (self.is_running and get_settings_snapshot().detection_mode == "viewport"):
+            self._is_polling = False
             return
 
-        self._is_rendering = True
         for view in list_foreground_views():
-            self._update_view(view)
-        self._is_rendering = False
+            if is_processable_view(view) and self._has_undetected_viewport(view):
+                self.request_update(view)
+
+        sublime.set_timeout_async(self._poll_viewports, self.interval_ms)
 
     def _update_view(self, view: sublime.View) -> None:
         if (
             not is_processable_view(view)
-            or not view_is_dirty_val(view)
-            or is_view_typing(view)
-            or (is_transient_view(view) and not get_setting("work_for_transient_view"))
+            or not (view_is_dirty_val(view) or self._has_undetected_viewport(view))
+            or (is_transient_view(view) and not get_settings_snapshot().work_for_transient_view)
         ):
             return
 
+        if is_view_typing(view):
+            self.request_update(view, get_view_typing_remaining_ms(view))
+            return
+
         if is_view_too_large(view):
             self._clean_up_phantom_set(view)
             self._clean_up_uri_regions(view)
             view_is_dirty_val(view, False)
             return
 
-        self._detect_uris_globally(view)
-        view_is_dirty_val(view, False)
-
-    def _detect_uris_globally(self, view: sublime.View) -> None:
-        uri_regions = tuple(
-            view_find_all(
+        if self._detect_uris_globally(view):
+            view_is_dirty_val(view, False)
+        else:
+            # not finished yet, let other tasks run before continuing
+            self.request_update(view)
+
+    def _detect_uris_globally(self, view: sublime.View) -> bool:
+        change_count = view.change_count()
+        detector = UriDetectorsManager.get_detector(view.buffer_id())
+        executor = self._get_scanner_executor(view)
+        settings = get_settings_snapshot()
+        try:
+            is_completed = detector.detect(
                 view,
                 global_get("uri_regex_obj"),
-                get_setting("expand_uri_regions_selectors"),
+                settings.expand_uri_regions_selectors,
+                settings.uri_search_radius,
+                get_view_detection_region(view),
+                settings.detection_chunk_size,
+                settings.detection_time_budget,
+                executor,
+                settings.process_pool_workers,
             )
-        )
+        except (BrokenExecutor, OSError) as e:
+            # try again later without the process pool
+            ScannerPoolManager.mark_broken(e)
+            return False
+
+        # the view is modified during detecting, try again later
+        if view.change_count() != change_count:
+            return False
+
+        # publishing costs O(all URIs) so it's throttled until completed, or it'd be quadratic for a large file
+        if is_completed:
+            self._view_published_timestamps.pop(view.id(), None)
+        else:
+            now_s = get_timestamp()
+            if now_s - self._view_published_timestamps.get(view.id(), -inf) < PROGRESSIVE_PUBLISH_INTERVAL_S:
+                return False
+            self._view_published_timestamps[view.id()] = now_s
+
+        uri_regions = tuple(sublime.Region(*region) for region in detector.uri_regions)
 
         # handle Phantoms
         if get_setting_show_open_button(view) == "always":
-            update_phantom_set(view, uri_regions)
-            log("debug_low", "re-render phantoms")
+            # images are loaded in the background, this view will be re-rendered after that
+            if global_get("images.phantom"):
+                update_phantom_set(view, uri_regions, self.rerender_generation)
+                log("debug_low", "re-render phantoms")
         else:
             self._clean_up_phantom_set(view)
 
         # handle draw URI regions
-        if get_setting("draw_uri_regions.enabled") == "always":
+        if settings.draw_uri_regions_enabled == "always":
             draw_uri_regions(view, uri_regions)
             log("debug_low", "draw URI regions")
         else:
             self._clean_up_uri_regions(view)
 
+        return is_completed
+
+    def _get_scanner_executor(self, view: sublime.View) -> ProcessPoolExecutor | None:
+        settings = get_settings_snapshot()
+        if (threshold := settings.process_pool_threshold) <= 0 or view.size() < threshold:
+            return None
+        return ScannerPoolManager.get_executor(settings.process_pool_workers)
+
+    def _has_undetected_viewport(self, view: sublime.View) -> bool:
+        if get_settings_snapshot().detection_mode != "viewport":
+            return False
+
+        detector = UriDetectorsManager.get_detector(view.buffer_id())
+        return not detector.is_scanned(get_view_detection_region(view))
+
     def _clean_up_phantom_set(self, view: sublime.View) -> None:
         erase_phantom_set(view)
         log("debug_low", "erase phantoms")
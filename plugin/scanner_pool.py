@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import multiprocessing
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Pattern
+
+from .logger import log
+from .prefilter import PrefilteredPattern
+
+
+class ScannerPoolManager:
+    """
+    Manages a persistent process pool which scans large texts with the URI regex.
+    Since `re` holds the GIL, scanning in other processes keeps the plugin host responsive.
+    """
+
+    # class-level (shared across objects)
+    _executor: ProcessPoolExecutor | None = None
+    _max_workers = 0
+    _is_broken = False
+
+    @classmethod
+    def get_executor(cls, max_workers: int) -> ProcessPoolExecutor | None:
+        """
+        @brief Get the process pool. It's created if it doesn't exist.
+
+        @param max_workers The max amount of worker processes
+
+        @return The process pool, or `None` if it's not available.
+        """
+        if cls._is_broken or max_workers <= 0:
+            return None
+
+        if cls._executor and cls._max_workers != max_workers:
+            cls.shutdown()
+
+        if not cls._executor:
+            # the plugin host is not a Python interpreter so workers can't be spawned by "sys.executable".
+            # forking the multi-threaded plugin host is only safe on Linux, it may crash on macOS.
+            if not sys.platform.startswith("linux") or "fork" not in multiprocessing.get_all_start_methods():
+                log("warning", "Process pool is only supported on Linux.")
+                cls._is_broken = True
+                return None
+            cls._executor = ProcessPoolExecutor(max_workers, multiprocessing.get_context("fork"))
+            cls._max_workers = max_workers
+
+        return cls._executor
+
+    @classmethod
+    def mark_broken(cls, reason: Exception) -> None:
+        """
+        @brief Stop using the process pool since it doesn't work.
+
+        @param reason The reason
+        """
+        log("warning", f"Process pool is disabled because {reason}")
+        cls._is_broken = True
+        cls.shutdown()
+
+    @classmethod
+    def shutdown(cls) -> None:
+        if cls._executor:
+            cls._executor.shutdown(wait=False)
+        cls._executor = None
+        cls._max_workers = 0
+
+
+def find_uri_spans(regex_obj: Pattern[str] | PrefilteredPattern, text: str) -> array[int]:
+    """
+    @brief Find spans of all URIs in the text. This is run in a worker process.
+
+    @param regex_obj The compiled regex object
+    @param text      The text
+
+    @return Spans in the form of `[begin1, end1, begin2, end2, ...]`, which is compact for pickling.
+    """
+    spans = array("q")
+    for m in regex_obj.finditer(text):
+        spans.extend(m.span())
+    return spans
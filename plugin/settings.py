@@ -2,7 +2,11 @@ from __future__ import annotations
 
 import base64
 import tempfile
+from collections.abc import Mapping, Sequence
+from functools import reduce
+from operator import xor
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
 import sublime
@@ -10,7 +14,7 @@ import sublime
 from .constants import PLUGIN_NAME, SETTINGS_FILE_NAME
 from .libs import imagesize
 from .logger import log
-from .shared import global_get
+from .shared import G, global_get
 from .types import ImageDict
 from .utils import get_timestamp, view_last_typing_timestamp_val
 
@@ -50,6 +54,134 @@ def get_setting(dotted: str, default: Any | None = None) -> Any:
     return global_get(f"settings.{dotted}", default)
 
 
+# used when "draw_uri_regions" in user settings doesn't have all keys
+DRAW_URI_REGIONS_DEFAULTS: dict[str, Any] = {
+    "enabled": "never",
+    "scope": "string",
+    "icon": "",
+    "flags": ["HIDE_ON_MINIMAP", "DRAW_SOLID_UNDERLINE", "DRAW_NO_FILL", "DRAW_NO_OUTLINE"],
+}
+
+
+class SettingsSnapshot:
+    """
+    An immutable snapshot of plugin settings which are read in hot paths, whose values are parsed already.
+    It's rebuilt whenever plugin settings are changed so reading a setting is just reading an attribute.
+    """
+
+    __slots__ = (
+        "browser_concurrency",
+        "browser_rate_limit",
+        "detection_chunk_size",
+        "detection_mode",
+        "detection_time_budget",
+        "draw_uri_regions_enabled",
+        "draw_uri_regions_flags",
+        "draw_uri_regions_icon",
+        "draw_uri_regions_scope",
+        "expand_uri_regions_selectors",
+        "image_colors",
+        "image_prewarming_budget_ms",
+        "image_source",
+        "large_file_threshold",
+        "popup_text_html",
+        "process_pool_threshold",
+        "process_pool_workers",
+        "renderer_interval",
+        "show_open_button",
+        "show_open_button_fallback",
+        "typing_period",
+        "uri_search_radius",
+        "viewport_margin",
+        "work_for_transient_view",
+    )
+
+    browser_concurrency: int
+    browser_rate_limit: float
+    detection_chunk_size: int
+    detection_mode: str
+    detection_time_budget: float
+    draw_uri_regions_enabled: str
+    draw_uri_regions_flags: int
+    draw_uri_regions_icon: str
+    draw_uri_regions_scope: str
+    expand_uri_regions_selectors: tuple[str, ...]
+    image_colors: Mapping[str, str]
+    image_prewarming_budget_ms: float
+    image_source: str
+    large_file_threshold: int
+    popup_text_html: str
+    process_pool_threshold: int
+    process_pool_workers: int
+    renderer_interval: int
+    show_open_button: str
+    show_open_button_fallback: str
+    typing_period: float
+    uri_search_radius: int
+    viewport_margin: int
+    work_for_transient_view: bool
+
+    def __init__(self, **values: Any) -> None:
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @classmethod
+    def from_settings(cls) -> SettingsSnapshot:
+        """
+        @brief Take a snapshot of current plugin settings.
+
+        @return The snapshot
+        """
+        draw_uri_regions: dict[str, Any] = {**DRAW_URI_REGIONS_DEFAULTS, **get_setting("draw_uri_regions", {})}
+
+        return cls(
+            browser_concurrency=max(1, int(get_setting("browser_concurrency", 1))),
+            browser_rate_limit=float(get_setting("browser_rate_limit", 0)),
+            detection_chunk_size=get_setting("detection_chunk_size"),
+            detection_mode=get_setting("detection_mode"),
+            detection_time_budget=get_setting("detection_time_budget"),
+            draw_uri_regions_enabled=draw_uri_regions["enabled"],
+            draw_uri_regions_flags=parse_draw_region_flags(draw_uri_regions["flags"]),
+            draw_uri_regions_icon=draw_uri_regions["icon"],
+            draw_uri_regions_scope=draw_uri_regions["scope"],
+            expand_uri_regions_selectors=tuple(get_setting("expand_uri_regions_selectors")),
+            image_colors=MappingProxyType(dict(get_setting("image_colors"))),
+            image_prewarming_budget_ms=max(0, float(get_setting("image_prewarming_budget_ms", 0))),
+            image_source=get_setting("image_source"),
+            large_file_threshold=get_setting("large_file_threshold"),
+            popup_text_html=get_setting("popup_text_html"),
+            process_pool_threshold=get_setting("process_pool_threshold"),
+            process_pool_workers=get_setting("process_pool_workers"),
+            renderer_interval=get_setting_renderer_interval(),
+            show_open_button=get_setting("show_open_button"),
+            show_open_button_fallback=get_setting("show_open_button_fallback"),
+            typing_period=get_setting("typing_period"),
+            uri_search_radius=int(get_setting("uri_search_radius")),
+            viewport_margin=max(0, int(get_setting("viewport_margin", 0))),
+            work_for_transient_view=bool(get_setting("work_for_transient_view")),
+        )
+
+
+def get_settings_snapshot() -> SettingsSnapshot:
+    """
+    @brief Get the snapshot of plugin settings, which is taken whenever plugin settings are changed.
+
+    @return The snapshot
+    """
+    assert G.settings_snapshot
+    return G.settings_snapshot
+
+
+def parse_draw_region_flags(flags: int | Sequence[str]) -> int:
+    if isinstance(flags, int):
+        return flags
+
+    return reduce(xor, map(lambda flag: getattr(sublime, flag, 0), flags), 0)
+
+
 def get_image_path(img_name: str) -> str:
     """
     @brief Get the image resource path from plugin settings.
@@ -112,20 +244,46 @@ def get_setting_renderer_interval() -> int:
 
 
 def get_setting_show_open_button(view: sublime.View) -> str:
-    return get_setting(
-        "show_open_button_fallback" if not view.is_loading() and is_view_too_large(view) else "show_open_button"
-    )
+    settings = get_settings_snapshot()
+    if not view.is_loading() and is_view_too_large(view):
+        return settings.show_open_button_fallback
+    return settings.show_open_button
 
 
 def is_view_too_large(view: sublime.View) -> bool:
     """
     @brief Determine if the view is too large. Note that size will be `0` if the view is loading.
+           A view is never too large in the "viewport" detection mode or if there is no threshold.
 
     @param view The view
 
     @return `True` if the view is too large, `False` otherwise.
     """
-    return view.size() > get_setting("large_file_threshold")
+    settings = get_settings_snapshot()
+    if settings.detection_mode == "viewport" or (threshold := settings.large_file_threshold) <= 0:
+        return False
+
+    return view.size() > threshold
+
+
+def get_view_detection_region(view: sublime.View) -> tuple[int, int]:
+    """
+    @brief Get the region which should be detected for URIs in the view.
+
+    @param view The view
+
+    @return The region in tuple form.
+    """
+    settings = get_settings_snapshot()
+    if settings.detection_mode != "viewport":
+        return (0, view.size())
+
+    visible_region = view.visible_region()
+    margin = settings.viewport_margin
+    row_begin = max(0, view.rowcol(visible_region.begin())[0] - margin)
+    row_end = view.rowcol(visible_region.end())[0] + margin
+
+    return (view.text_point(row_begin, 0), view.line(view.text_point(row_end, 0)).b)
 
 
 def is_view_typing(view: sublime.View) -> bool:
@@ -136,7 +294,18 @@ def is_view_typing(view: sublime.View) -> bool:
 
     @return `True` if the view is typing, `False` otherwise.
     """
+    return get_view_typing_remaining_ms(view) > 0
+
+
+def get_view_typing_remaining_ms(view: sublime.View) -> float:
+    """
+    @brief Get the remaining period before the view is no longer considered typing.
+
+    @param view The view
+
+    @return The remaining period (in millisecond), which is not positive if the view is not typing.
+    """
     now_s = get_timestamp()
     last_typing_s = view_last_typing_timestamp_val(view) or 0
 
-    return (now_s - last_typing_s) * 1000 < get_setting("typing_period")
+    return get_settings_snapshot().typing_period - (now_s - last_typing_s) * 1000
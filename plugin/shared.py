@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import logging
-import threading
-from typing import Any, Pattern
+from typing import TYPE_CHECKING, Any
 
 import sublime
 
+from .prefilter import PrefilteredPattern
 from .types import ImageDict
 from .utils import dotted_get, dotted_set
 
+if TYPE_CHECKING:
+    from .renderer import Renderer
+    from .settings import SettingsSnapshot
+
 
 class G:
     """This class stores application-level global variables."""
@@ -16,14 +20,20 @@ class G:
     settings: sublime.Settings | None = None
     """the plugin settings object"""
 
+    settings_snapshot: SettingsSnapshot | None = None
+    """the parsed plugin settings, which are read in hot paths"""
+
     logger: logging.Logger | None = None
     """the logger to log messages"""
 
-    renderer_thread: threading.Thread | None = None
-    """the background thread for managing phantoms for views"""
+    renderer: Renderer | None = None
+    """the renderer for managing phantoms for views"""
 
     activated_schemes: tuple[str, ...] = tuple()
-    uri_regex_obj: Pattern[str] | None = None
+    uri_regex_obj: PrefilteredPattern | None = None
+
+    image_settings: dict[str, Any] = {}
+    """image-related plugin settings which `images` are loaded with"""
 
     images: dict[str, ImageDict] = {
         "phantom": {},  # type: ignore
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any, Tuple
+
+import sublime
+
+PhantomKey = Tuple[Tuple[int, int], str, int, Any]
+
+
+class DiffPhantomSet:
+    """
+    Works like `sublime.PhantomSet` but phantoms are diffed via a dict rather than `list.index()`.
+    So an update only adds/erases changed phantoms in O(n) rather than O(n^2) comparisons.
+    """
+
+    def __init__(self, view: sublime.View, key: str = "") -> None:
+        self.view = view
+        self.key = key
+        self._phantoms: dict[PhantomKey, sublime.Phantom] = {}
+        # phantoms keyed by the regions which they are built for, only valid with the same context
+        self._region_phantoms: dict[tuple[int, int], sublime.Phantom] = {}
+        self._context: Hashable = None
+
+    def __del__(self) -> None:
+        for phantom in self._phantoms.values():
+            self.view.erase_phantom_by_id(phantom.id)
+
+    def __len__(self) -> int:
+        return len(self._phantoms)
+
+    def update(self, new_phantoms: Iterable[sublime.Phantom]) -> None:
+        """
+        @brief Update phantoms in the view. Phantoms which are already in the view are kept as-is.
+
+        @param new_phantoms The new phantoms
+        """
+        old_phantoms = self._get_refreshed_phantoms()
+        phantoms: dict[PhantomKey, sublime.Phantom] = {}
+
+        for phantom in new_phantoms:
+            if (key := phantom.to_tuple()) in phantoms:
+                continue
+            if old_phantom := old_phantoms.pop(key, None):
+                phantom.id = old_phantom.id
+            else:
+                phantom.id = self.view.add_phantom(
+                    self.key,
+                    phantom.region,
+                    phantom.content,
+                    phantom.layout,
+                    phantom.on_navigate,
+                )
+            phantoms[key] = phantom
+
+        for old_phantom in old_phantoms.values():
+            self.view.erase_phantom_by_id(old_phantom.id)
+
+        self._phantoms = phantoms
+        self._region_phantoms = {}
+        self._context = None
+
+    def update_by_regions(
+        self,
+        regions: Iterable[sublime.Region],
+        new_phantom: Callable[[sublime.Region], sublime.Phantom],
+        context: Hashable,
+    ) -> None:
+        """
+        @brief Update phantoms which are built for regions. If the context is the same as the last update's,
+               only regions which are added/removed since then are handled, so unchanged phantoms are not built.
+
+        @param regions     The regions
+        @param new_phantom The function which builds the phantom for a region
+        @param context     Things which phantoms depend on besides regions, such as the view's change count
+        """
+        region_tuples = dict.fromkeys(region.to_tuple() for region in regions)
+
+        if context is None or context != self._context:
+            phantoms = [new_phantom(sublime.Region(*region)) for region in region_tuples]
+            self.update(phantoms)
+            self._region_phantoms = {
+                region: self._phantoms[phantom.to_tuple()] for region, phantom in zip(region_tuples, phantoms)
+            }
+            self._context = context
+            return
+
+        region_phantoms: dict[tuple[int, int], sublime.Phantom] = {}
+        for region in region_tuples:
+            if (phantom := self._region_phantoms.pop(region, None)) is None:
+                phantom = new_phantom(sublime.Region(*region))
+                phantom.id = self.view.add_phantom(
+                    self.key,
+                    phantom.region,
+                    phantom.content,
+                    phantom.layout,
+                    phantom.on_navigate,
+                )
+                self._phantoms[phantom.to_tuple()] = phantom
+            region_phantoms[region] = phantom
+
+        for phantom in self._region_phantoms.values():
+            self.view.erase_phantom_by_id(phantom.id)
+            if self._phantoms.get(key := phantom.to_tuple()) is phantom:
+                del self._phantoms[key]
+
+        self._region_phantoms = region_phantoms
+
+    def _get_refreshed_phantoms(self) -> dict[PhantomKey, sublime.Phantom]:
+        """
+        @brief Get existing phantoms whose regions are updated since phantoms move with the text.
+
+        @return Phantoms keyed by their tuple form.
+        """
+        if not self._phantoms:
+            return {}
+
+        phantoms = tuple(self._phantoms.values())
+        for phantom, region in zip(phantoms, self.view.query_phantoms([phantom.id for phantom in phantoms])):
+            phantom.region = sublime.Region(*region)
+
+        return {phantom.to_tuple(): phantom for phantom in phantoms}
@@ -1,32 +1,188 @@
 from __future__ import annotations
 
 import base64
-import io
+import hashlib
+import os
 import re
+import shutil
+import struct
+import tempfile
+import threading
+import zlib
 from collections.abc import Sequence
-from functools import lru_cache
+from functools import partial
+from pathlib import Path
 
 import sublime
 
+from ..cache import SizedLruCache
+from ..constants import PLUGIN_NAME
 from ..libs import png
-from ..settings import get_setting
+from ..logger import log
+from ..png_codec import PNG_SIGNATURE, decode_png_to_rgba8, encode_rgba8_to_png
+from ..settings import get_settings_snapshot
 from ..shared import global_get
 from ..utils import simple_decorator
 
+# bump this when the coloring algorithm changes so outdated cached images won't be used
+COLORED_IMAGE_CACHE_VERSION = 1
+# the max total size of colored images cached on the disk, the oldest ones are deleted when it's exceeded
+COLORED_IMAGE_DISK_CACHE_MAX_BYTES = 8 * 1024 * 1024
+# errors raised by decoding or coloring a broken image
+IMAGE_DECODING_ERRORS = (ValueError, png.Error, struct.error, zlib.error)
+
+COLORED_IMAGE_BASE64_CACHE: SizedLruCache[tuple[str, str], str] = SizedLruCache(
+    "colored image base64",
+    max_bytes=4 * 1024 * 1024,
+)
+"""{(image name, color code in #RRGGBBAA): base64 string}"""
+
+COLORED_IMAGE_URL_CACHE: SizedLruCache[tuple[str, str], str] = SizedLruCache(
+    "colored image URL",
+    max_bytes=1024 * 1024,
+)
+"""{(image name, color code in #RRGGBBAA): URL of the cached image file}"""
+
+DECODED_IMAGE_CACHE: SizedLruCache[bytes, DecodedImage] = SizedLruCache(
+    "decoded image",
+    max_bytes=4 * 1024 * 1024,
+    sizeof=lambda img: len(img.grays) + len(img.alphas),
+)
+"""{PNG bytes: decoded image}"""
+
+SCOPE_COLOR_CACHE: SizedLruCache[tuple[str, str], str] = SizedLruCache(
+    "scope color",
+    max_bytes=1024 * 1024,
+    # bound the amount of scopes since scope names (keys) are much larger than colors (values)
+    max_items=4096,
+)
+"""{(color scheme ID, scope name): color in #RRGGBB or #RRGGBBAA}"""
+
+
+def clear_image_caches() -> None:
+    """
+    @brief Clear in-memory image caches. This should be called when images or image colors are changed.
+    """
+    for cache in (COLORED_IMAGE_BASE64_CACHE, COLORED_IMAGE_URL_CACHE, DECODED_IMAGE_CACHE, SCOPE_COLOR_CACHE):
+        log("debug", f"Clear image cache: {cache}")
+        cache.clear()
+    ColoredImagesManager.clear()
+
+
+class ColoredImagesManager:
+    """
+    Prepares colored images in the background so that rendering phantoms never waits for coloring images.
+    Before a colored image is ready, the original image is used instead.
+    """
+
+    # class-level (shared across objects)
+    _lock = threading.Lock()
+    _generation = 0
+    """increased when images are changed so that outdated preparations are discarded"""
+    _ready: set[tuple[str, str]] = set()
+    _pending: set[tuple[str, str]] = set()
+    _failed: set[tuple[str, str]] = set()
+    """colored images which can't be prepared, the original images are used instead"""
+
+    @classmethod
+    def get_ready_color(cls, img_name: str, rgba_code: str) -> str:
+        """
+        @brief Get the color if the colored image is ready. Otherwise, it will be prepared in the background.
+
+        @param img_name  The image name
+        @param rgba_code The color code in #RRGGBBAA
+
+        @return The color code, or an empty string (which means the original image) if it's not ready yet.
+        """
+        if not rgba_code or (key := (img_name, rgba_code)) in cls._ready:
+            return rgba_code
+
+        if key not in cls._failed:
+            cls.prepare(img_name, rgba_code)
+        return ""
 
-def get_image_color(img_name: str, region: sublime.Region) -> str:
+    @classmethod
+    def prepare(cls, img_name: str, rgba_code: str) -> None:
+        """
+        @brief Prepare the colored image in the background.
+               All views will be re-rendered when all pending colored images are ready.
+
+        @param img_name  The image name
+        @param rgba_code The color code in #RRGGBBAA
+        """
+        with cls._lock:
+            if (key := (img_name, rgba_code)) in cls._ready or key in cls._pending or key in cls._failed:
+                return
+            cls._pending.add(key)
+            generation = cls._generation
+
+        sublime.set_timeout_async(partial(cls._prepare, img_name, rgba_code, generation))
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._generation += 1
+            cls._ready.clear()
+            cls._pending.clear()
+            cls._failed.clear()
+
+    @classmethod
+    def warm(cls, img_name: str, rgba_code: str) -> None:
+        """
+        @brief Prepare the colored image right now if it's not ready.
+
+        @param img_name  The image name
+        @param rgba_code The color code in #RRGGBBAA
+        """
+        if rgba_code and (key := (img_name, rgba_code)) not in cls._ready and key not in cls._failed:
+            cls._prepare(img_name, rgba_code, cls._generation, rerender=False)
+
+    @classmethod
+    def _prepare(cls, img_name: str, rgba_code: str, generation: int, rerender: bool = True) -> None:
+        if generation != cls._generation:
+            return
+
+        key = (img_name, rgba_code)
+        is_prepared = False
+        try:
+            get_colored_image_src_by_color(img_name, rgba_code)
+            is_prepared = True
+        except IMAGE_DECODING_ERRORS as e:
+            log("error", f"Failed to color image {img_name}: {e}")
+        finally:
+            # a failed image must leave the pending state as well, or views will never be re-rendered
+            with cls._lock:
+                is_all_ready = False
+                if generation == cls._generation:
+                    cls._pending.discard(key)
+                    (cls._ready if is_prepared else cls._failed).add(key)
+                    is_all_ready = not cls._pending
+
+        if rerender and is_all_ready and (renderer := global_get("renderer")):
+            renderer.request_rerender_all()
+
+
+def get_image_color(
+    view: sublime.View,
+    img_name: str,
+    region: sublime.Region,
+    resolver: ScopeColorResolver | None = None,
+) -> str:
     """
     @brief Get the image color from plugin settings in the form of #RRGGBBAA.
 
+    @param view     The view where the image is rendered
     @param img_name The image name
     @param region   The region
+    @param resolver The scope color resolver of the view. Pass one if there are many regions to be rendered.
 
     @return The color code in the form of #RRGGBBAA
     """
-    return color_code_to_rgba(get_setting("image_colors")[img_name], region)
+    return color_code_to_rgba(
+        get_settings_snapshot().image_colors[img_name], region, resolver or ScopeColorResolver(view)
+    )
 
 
-@lru_cache
 def get_colored_image_base64_by_color(img_name: str, rgba_code: str) -> str:
     """
     @brief Get the colored image in base64 string by RGBA color code.
@@ -39,25 +195,156 @@ def get_colored_image_base64_by_color(img_name: str, rgba_code: str) -> str:
     if not rgba_code:
         return global_get(f"images.{img_name}.base64")
 
-    img_bytes: bytes = global_get(f"images.{img_name}.bytes")
-    img_bytes = change_png_bytes_color(img_bytes, rgba_code)
+    if (img_base64 := COLORED_IMAGE_BASE64_CACHE.get((img_name, rgba_code))) is None:
+        img_bytes: bytes = global_get(f"images.{img_name}.bytes")
+        img_base64 = base64.b64encode(get_colored_png_bytes(img_bytes, rgba_code)).decode()
+        COLORED_IMAGE_BASE64_CACHE.set((img_name, rgba_code), img_base64)
 
-    return base64.b64encode(img_bytes).decode()
+    return img_base64
 
 
-def get_colored_image_base64_by_region(img_name: str, region: sublime.Region) -> str:
+def get_colored_image_url_by_color(img_name: str, rgba_code: str) -> str:
     """
-    @brief Get the colored image in base64 string by region.
+    @brief Get the URL of the colored image file, which is written into the cache directory.
 
-    @param img_name The image name
-    @param region   The region
+    @param img_name  The image name
+    @param rgba_code The color code in #RRGGBBAA
 
-    @return The image base64 string
+    @return The image URL. An empty string if the image file can't be written.
+    """
+    if not rgba_code:
+        return f"res://{global_get(f'images.{img_name}.path')}"
+
+    if (img_url := COLORED_IMAGE_URL_CACHE.get((img_name, rgba_code))) is None:
+        img_bytes: bytes = global_get(f"images.{img_name}.bytes")
+        if not (cache_file := get_colored_image_cache_file(img_bytes, rgba_code)).is_file():
+            get_colored_png_bytes(img_bytes, rgba_code)  # this writes the image file
+            if not cache_file.is_file():
+                return ""
+        img_url = cache_file.as_uri()
+        COLORED_IMAGE_URL_CACHE.set((img_name, rgba_code), img_url)
+
+    return img_url
+
+
+def get_colored_image_src_by_color(img_name: str, rgba_code: str) -> str:
+    """
+    @brief Get the `src` of the colored image, which is used in an `<img>` tag.
+           It's either a file URL or a base64 data URI, depending on the "image_source" setting.
+
+    @param img_name  The image name
+    @param rgba_code The color code in #RRGGBBAA
+
+    @return The image `src`
+    """
+    if get_settings_snapshot().image_source == "file" and (
+        img_url := get_colored_image_url_by_color(img_name, rgba_code)
+    ):
+        return img_url
+
+    return (
+        f"data:{global_get(f'images.{img_name}.mime')};base64,{get_colored_image_base64_by_color(img_name, rgba_code)}"
+    )
+
+
+def get_colored_image_cache_dir() -> Path:
+    """
+    @brief Get the directory where colored images are cached on the disk.
+
+    @return The directory path.
+    """
+    return Path(sublime.cache_path()) / PLUGIN_NAME / "colored_images" / f"v{COLORED_IMAGE_CACHE_VERSION}"
+
+
+def prune_colored_image_cache_dir(max_bytes: int = COLORED_IMAGE_DISK_CACHE_MAX_BYTES) -> None:
+    """
+    @brief Delete colored images of outdated cache versions and the oldest ones when the cache is too large.
+
+    @param max_bytes The max total size of cached colored images
+    """
+    cache_dir = get_colored_image_cache_dir()
+
+    try:
+        for version_dir in cache_dir.parent.iterdir():
+            if version_dir != cache_dir and version_dir.is_dir():
+                shutil.rmtree(version_dir, ignore_errors=True)
+
+        # (mtime, size, path) of cached images
+        files: list[tuple[float, int, Path]] = []
+        for path in cache_dir.iterdir():
+            stat = path.stat()
+            files.append((stat.st_mtime, stat.st_size, path))
+    except OSError:
+        return
+
+    total_bytes = 0
+    for _, size, path in sorted(files, reverse=True):
+        # leftovers of interrupted writes are useless
+        if path.suffix == ".tmp" or (total_bytes := total_bytes + size) > max_bytes:
+            try:
+                path.unlink()
+            except OSError as e:
+                log("debug", f"Failed to delete cached colored image {path}: {e}")
+
+
+def get_colored_image_cache_file(img_bytes: bytes, rgba_code: str) -> Path:
+    """
+    @brief Get the path where the colored image is cached on the disk.
+
+    @param img_bytes The PNG image bytes
+    @param rgba_code The color code in the form of #RRGGBBAA
+
+    @return The file path.
+    """
+    return get_colored_image_cache_dir() / f"{hashlib.sha1(img_bytes).hexdigest()}-{rgba_code[1:].lower()}.png"
+
+
+def get_colored_png_bytes(img_bytes: bytes, rgba_code: str) -> bytes:
     """
-    return get_colored_image_base64_by_color(img_name, get_image_color(img_name, region))
+    @brief Get the color-changed PNG bytes. The result is persisted on the disk so that
+           it doesn't have to be generated again after restarting Sublime Text.
+
+    @param img_bytes The PNG image bytes
+    @param rgba_code The color code in the form of #RRGGBBAA
+
+    @return Color-changed PNG image bytes.
+    """
+    if not rgba_code:
+        return img_bytes
+
+    if not re.match(r"#[0-9a-fA-F]{8}$", rgba_code):
+        raise ValueError("Invalid RGBA color code: " + rgba_code)
+
+    cache_file = get_colored_image_cache_file(img_bytes, rgba_code)
+    cache_dir = cache_file.parent
+
+    try:
+        if (colored_bytes := cache_file.read_bytes()).startswith(PNG_SIGNATURE):
+            # recently used images are kept when the cache directory is pruned
+            cache_file.touch()
+            return colored_bytes
+    except OSError:
+        pass
+
+    colored_bytes = change_png_bytes_color(img_bytes, rgba_code)
+
+    # write to a temporary file and then rename it so a partially written file is never read
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(colored_bytes)
+            os.replace(tmp_path, cache_file)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        log("debug", f"Failed to cache colored image to {cache_file}: {e}")
+
+    return colored_bytes
 
 
-@lru_cache
 def change_png_bytes_color(img_bytes: bytes, rgba_code: str) -> bytes:
     """
     @brief Change all colors in the PNG bytes to the new color.
@@ -73,63 +360,96 @@ def change_png_bytes_color(img_bytes: bytes, rgba_code: str) -> bytes:
     if not re.match(r"#[0-9a-fA-F]{8}$", rgba_code):
         raise ValueError("Invalid RGBA color code: " + rgba_code)
 
-    def render_pixel(rgba_src: Sequence[int], rgba_dst: Sequence[int], invert_gray: bool = False) -> list[int]:
-        gray = calculate_gray(rgba_src)
-        if invert_gray:
-            gray = 0xFF - gray
-
-        # ">> 8" is an approximation for "/ 0xFF" in following calculations
-        return [
-            int(rgba_dst[0] * gray) >> 8,
-            int(rgba_dst[1] * gray) >> 8,
-            int(rgba_dst[2] * gray) >> 8,
-            int(rgba_dst[3] * rgba_src[3]) >> 8,
-        ]
-
-    invert_gray = not is_img_light(img_bytes)  # invert for dark image to get a solid looking
+    img = decode_png_bytes(img_bytes)
     rgba_dst = [int(rgba_code[i : i + 2], 16) for i in range(1, 9, 2)]
 
-    rows_dst: list[list[int]] = []
-    for row_src in png.Reader(bytes=img_bytes).asRGBA()[2]:
-        row_dst: list[int] = []
-        for i in range(0, len(row_src), 4):
-            row_dst.extend(render_pixel(row_src[i : i + 4], rgba_dst, invert_gray))
-        rows_dst.append(row_dst)
+    return encode_rgba8_to_png(img.width, img.height, img.render(rgba_dst))
+
+
+class DecodedImage:
+    """
+    A decoded image, from which all its colored variants are derived.
+    Only gray scales and alpha values are kept since that's all needed for coloring.
+    """
 
-    buf = io.BytesIO()
-    png.from_array(rows_dst, "RGBA").write(buf)
+    __slots__ = ("width", "height", "grays", "alphas", "is_light")
+
+    def __init__(self, width: int, height: int, grays: bytes, alphas: bytes) -> None:
+        self.width = width
+        self.height = height
+        self.grays: bytes = grays
+        """gray scales, one byte per pixel"""
+        self.alphas: bytes = alphas
+        """alpha values, one byte per pixel"""
+        self.is_light: bool = (sum(grays) >> 7) > width * height
+
+    @classmethod
+    def from_png_bytes(cls, img_bytes: bytes) -> DecodedImage:
+        w, h, pixels = decode_png_to_rgba8(img_bytes)
+
+        return cls(w, h, calculate_grays(pixels), pixels[3::4])
+
+    def render(self, rgba_dst: Sequence[int]) -> bytearray:
+        """
+        @brief Render the image with the new color by lookup tables.
+               The gray scale of a pixel decides its RGB and its alpha is scaled by the new color's alpha.
+
+        @param rgba_dst The new color in the form of [R, G, B, A]
+
+        @return Rendered RGBA pixels with 8-bit samples.
+        """
+        # invert for dark image to get a solid looking
+        grays = range(0x100) if self.is_light else range(0xFF, -1, -1)
+        # ">> 8" is an approximation for "/ 0xFF" in following calculations
+        r_lut, g_lut, b_lut = (bytes((channel * gray) >> 8 for gray in grays) for channel in rgba_dst[:3])
+        alpha_lut = bytes((rgba_dst[3] * alpha) >> 8 for alpha in range(0x100))
 
-    return buf.getvalue()
+        pixels = bytearray(len(self.grays) * 4)
+        pixels[0::4] = self.grays.translate(r_lut)
+        pixels[1::4] = self.grays.translate(g_lut)
+        pixels[2::4] = self.grays.translate(b_lut)
+        pixels[3::4] = self.alphas.translate(alpha_lut)
 
+        return pixels
 
-def calculate_gray(rgb: Sequence[int]) -> int:
+
+def decode_png_bytes(img_bytes: bytes) -> DecodedImage:
     """
-    @brief Calculate the gray scale of a color.
-    @see   https://atlaboratary.blogspot.com/2013/08/rgb-g-rey-l-gray-r0.html
+    @brief Decode the PNG bytes. Images are decoded once no matter how many colors they are rendered with.
 
-    @param rgb The rgb color in list form
+    @param img_bytes The PNG image bytes
 
-    @return The gray scale.
+    @return The decoded image.
     """
-    return int(rgb[0] * 38 + rgb[1] * 75 + rgb[2] * 15) >> 7
+    if (img := DECODED_IMAGE_CACHE.get(img_bytes)) is None:
+        img = DecodedImage.from_png_bytes(img_bytes)
+        DECODED_IMAGE_CACHE.set(img_bytes, img)
+
+    return img
 
 
-def is_img_light(img_bytes: bytes) -> bool:
+# gray = (R * 38 + G * 75 + B * 15) >> 7, where multiplications are looked up
+_GRAY_WEIGHTS_R = tuple(value * 38 for value in range(0x100))
+_GRAY_WEIGHTS_G = tuple(value * 75 for value in range(0x100))
+_GRAY_WEIGHTS_B = tuple(value * 15 for value in range(0x100))
+
+
+def calculate_grays(pixels: bytes) -> bytes:
     """
-    @brief Determine if image is light colored.
+    @brief Calculate gray scales of all pixels.
+    @see   https://atlaboratary.blogspot.com/2013/08/rgb-g-rey-l-gray-r0.html
 
-    @param img_bytes The image bytes
+    @param pixels The RGBA pixels with 8-bit samples
 
-    @return True if image is light, False otherwise.
+    @return Gray scales, one byte per pixel.
     """
-    w, h, rows, _ = png.Reader(bytes=img_bytes).asRGBA()
+    rs, gs, bs = pixels[0::4], pixels[1::4], pixels[2::4]
 
-    gray_sum = 0
-    for row in rows:
-        for i in range(0, len(row), 4):
-            gray_sum += calculate_gray(row[i : i + 4])
+    # weights sum up to 128 so the gray scale of a gray pixel is itself
+    if rs == gs == bs:
+        return rs
 
-    return (gray_sum >> 7) > w * h
+    return bytes([(_GRAY_WEIGHTS_R[r] + _GRAY_WEIGHTS_G[g] + _GRAY_WEIGHTS_B[b]) >> 7 for r, g, b in zip(rs, gs, bs)])
 
 
 def add_alpha_to_rgb(color_code: str) -> str:
@@ -152,13 +472,85 @@ def add_alpha_to_rgb(color_code: str) -> str:
     return "#" + (rgb + "ff")[:8].lower()
 
 
+class ScopeColorResolver:
+    """
+    Resolves the foreground color of the scope at a region in a view.
+    Colors are cached by (color scheme ID, scope name) so views using the same color scheme share them.
+    A resolver is meant to be short-lived (e.g., one per rendering) since it remembers the view's color scheme.
+    """
+
+    def __init__(self, view: sublime.View) -> None:
+        self.view = view
+        self.color_scheme = get_color_scheme_id(view)
+
+    def resolve(self, region: sublime.Region) -> str:
+        """
+        @brief Get the foreground color of the scope at the end of the region.
+
+        @param region The region
+
+        @return The color in #RRGGBB or #RRGGBBAA
+        """
+        return self.resolve_scope(self.view.scope_name(region.end() - 1))
+
+    def resolve_scope(self, scope: str) -> str:
+        """
+        @brief Get the foreground color of the scope.
+
+        @param scope The scope
+
+        @return The color in #RRGGBB or #RRGGBBAA
+        """
+        if (color := SCOPE_COLOR_CACHE.get(key := (self.color_scheme, scope))) is None:
+            color = self.view.style_for_scope(scope).get("foreground", "")
+            SCOPE_COLOR_CACHE.set(key, color)
+
+        return color
+
+    @classmethod
+    def list_seen_scopes(cls) -> set[str]:
+        """
+        @brief List scopes which have been resolved, no matter which color scheme is used.
+
+        @return The scopes
+        """
+        return {scope for _, scope in SCOPE_COLOR_CACHE.keys()}
+
+    @classmethod
+    def forget_color_scheme(cls, color_scheme: str) -> None:
+        """
+        @brief Forget colors resolved with the color scheme.
+
+        @param color_scheme The color scheme ID
+        """
+        SCOPE_COLOR_CACHE.discard_if(lambda key: key[0] == color_scheme)
+
+    @classmethod
+    def clear(cls) -> None:
+        SCOPE_COLOR_CACHE.clear()
+
+
+def get_color_scheme_id(view: sublime.View) -> str:
+    """
+    @brief Identify the color scheme which the view actually uses. The "color_scheme" setting isn't enough
+           since "auto" follows the OS theme and a color scheme may be reloaded with the same name.
+
+    @param view The view
+
+    @return The color scheme ID
+    """
+    style_hash = hash(tuple(sorted(view.style().items())))
+    return f"{view.settings().get('color_scheme') or ''}#{style_hash:x}"
+
+
 @simple_decorator(add_alpha_to_rgb)
-def color_code_to_rgba(color_code: str, region: sublime.Region) -> str:
+def color_code_to_rgba(color_code: str, region: sublime.Region, resolver: ScopeColorResolver | None) -> str:
     """
     @brief Convert user settings color code into #RRGGBBAA form
 
     @param color_code The color code string from user settings
     @param region     The scope-related region
+    @param resolver   The scope color resolver of the view where the region is, which is needed for scope colors
 
     @return The color code in the form of #RRGGBBAA
     """
@@ -167,19 +559,10 @@ def color_code_to_rgba(color_code: str, region: sublime.Region) -> str:
 
     # "color_code" is a scope?
     if not color_code.startswith("#"):
-        if view := sublime.active_window().active_view():
-            # "color" is guaranteed to be #RRGGBB or #RRGGBBAA
-            color = view.style_for_scope(view.scope_name(region.end() - 1)).get("foreground", "")
-
-            if color_code == "@scope":
-                return color
-
-            if color_code == "@scope_inverted":
-                # strip "#" and make color into RRGGBBAA int
-                rgba_int = int((color + "ff")[1:9], 16)
-                # invert RRGGBB, remain AA, strip "0x" prefix from hex and prepend 0s until 8 chars
-                return "#" + hex((~rgba_int & 0xFFFFFF00) | (rgba_int & 0xFF))[2:].zfill(8)
-        return ""
+        if not resolver:
+            return ""
+
+        return scope_color_code_to_rgba(color_code, resolver.resolve(region))
 
     # now color code must starts with "#"
     rgb = color_code[1:9]  # strip "#" and possible extra chars
@@ -189,3 +572,25 @@ def color_code_to_rgba(color_code: str, region: sublime.Region) -> str:
         return f"#{rgb}"
 
     return ""
+
+
+@simple_decorator(add_alpha_to_rgb)
+def scope_color_code_to_rgba(color_code: str, color: str) -> str:
+    """
+    @brief Convert a scope-related color code from user settings into #RRGGBBAA form
+
+    @param color_code The color code string from user settings, such as "@scope"
+    @param color      The color of the scope in #RRGGBB or #RRGGBBAA
+
+    @return The color code in the form of #RRGGBBAA
+    """
+    if color_code == "@scope":
+        return color
+
+    if color_code == "@scope_inverted":
+        # strip "#" and make color into RRGGBBAA int
+        rgba_int = int((color + "ff")[1:9], 16)
+        # invert RRGGBB, remain AA, strip "0x" prefix from hex and prepend 0s until 8 chars
+        return "#" + hex((~rgba_int & 0xFFFFFF00) | (rgba_int & 0xFF))[2:].zfill(8)
+
+    return ""
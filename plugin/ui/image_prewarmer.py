@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+
+import sublime
+
+from ..logger import log
+from ..settings import get_settings_snapshot, is_view_typing
+from ..utils import list_foreground_views
+from .image import ColoredImagesManager, ScopeColorResolver, scope_color_code_to_rgba
+
+# scopes where URIs commonly appear
+COMMON_URI_SCOPES = (
+    "markup.underline.link",
+    "meta.link",
+    "string.other.link",
+    "comment",
+    "comment.line",
+    "comment.block",
+    "comment.block.documentation",
+    "string",
+    "string.quoted",
+    "constant.other.reference.link",
+    "markup.raw",
+    "text",
+    "text.plain",
+    "source",
+)
+
+# the interval between prewarming ticks
+TICK_INTERVAL_MS = 100
+
+
+class ImagePrewarmer:
+    """
+    Prepares colored images for "@scope" colors in idle time, so that they are ready before being rendered.
+    Each tick only spends a limited amount of CPU time and ticks are skipped while the user is typing.
+    """
+
+    # class-level (shared across objects)
+    _lock = threading.Lock()
+    _generation = 0
+    _color_schemes: set[str] = set()
+    # (img_name, color_code, resolver, scope)
+    _tasks: deque[tuple[str, str, ScopeColorResolver, str]] = deque()
+    _is_ticking = False
+
+    @classmethod
+    def request(cls, view: sublime.View) -> None:
+        """
+        @brief Prewarm colored images for the color scheme of the view.
+               Each color scheme is only prewarmed once until `clear()` is called.
+
+        @param view The view
+        """
+        settings = get_settings_snapshot()
+        if settings.image_prewarming_budget_ms <= 0:
+            return
+
+        scope_colors = [
+            (img_name, color_code)
+            for img_name, color_code in settings.image_colors.items()
+            if color_code.startswith("@scope")
+        ]
+        if not scope_colors:
+            return
+
+        resolver = ScopeColorResolver(view)
+        with cls._lock:
+            if resolver.color_scheme in cls._color_schemes:
+                return
+            cls._color_schemes.add(resolver.color_scheme)
+
+            scopes = dict.fromkeys(COMMON_URI_SCOPES)
+            scopes.update(dict.fromkeys(sorted(ScopeColorResolver.list_seen_scopes())))
+            cls._tasks.extend(
+                (img_name, color_code, resolver, scope) for scope in scopes for img_name, color_code in scope_colors
+            )
+            cls._schedule(cls._generation)
+
+    @classmethod
+    def forget_color_scheme(cls, color_scheme: str) -> None:
+        """
+        @brief Forget that the color scheme has been prewarmed, so it will be prewarmed again when requested.
+
+        @param color_scheme The color scheme ID
+        """
+        with cls._lock:
+            cls._color_schemes.discard(color_scheme)
+            cls._tasks = deque(task for task in cls._tasks if task[2].color_scheme != color_scheme)
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._generation += 1
+            cls._color_schemes.clear()
+            cls._tasks.clear()
+            cls._is_ticking = False
+
+    @classmethod
+    def _schedule(cls, generation: int) -> None:
+        # must be called with the lock held
+        if not cls._is_ticking and cls._tasks:
+            cls._is_ticking = True
+            sublime.set_timeout_async(lambda: cls._tick(generation), TICK_INTERVAL_MS)
+
+    @classmethod
+    def _tick(cls, generation: int) -> None:
+        with cls._lock:
+            if generation != cls._generation:
+                return
+            cls._is_ticking = False
+
+        # don't compete with rendering while the user is typing
+        if not any(is_view_typing(view) for view in list_foreground_views()):
+            deadline_s = time.perf_counter() + get_settings_snapshot().image_prewarming_budget_ms / 1000
+            while time.perf_counter() < deadline_s:
+                with cls._lock:
+                    if generation != cls._generation or not cls._tasks:
+                        break
+                    img_name, color_code, resolver, scope = cls._tasks.popleft()
+
+                if rgba_code := scope_color_code_to_rgba(color_code, resolver.resolve_scope(scope)):
+                    ColoredImagesManager.warm(img_name, rgba_code)
+
+        with cls._lock:
+            if generation != cls._generation:
+                return
+            if cls._tasks:
+                cls._schedule(generation)
+            else:
+                log("debug", "Colored images of scopes have been prewarmed.")
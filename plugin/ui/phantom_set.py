@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from collections.abc import Iterable
+from functools import lru_cache, partial
 
 import sublime
 
@@ -8,7 +9,8 @@ from ..constants import PLUGIN_NAME
 from ..helpers import open_uri_with_browser
 from ..shared import global_get
 from ..types import ImageDict
-from .image import get_colored_image_base64_by_region
+from ..utils import compile_template
+from .image import ColoredImagesManager, ScopeColorResolver, get_colored_image_src_by_color, get_image_color
 from .phatom_sets_manager import PhatomSetsManager
 
 PHANTOM_TEMPLATE = """
@@ -26,7 +28,7 @@ PHANTOM_TEMPLATE = """
             height: 1em;
         }}
     </style>
-    <a href="{uri}"><img src="data:{mime};base64,{base64}"></a>
+    <a href="{uri}"><img src="{src}"></a>
 </body>
 """
 
@@ -47,29 +49,78 @@ def erase_phantom_set(view: sublime.View) -> None:
     PhatomSetsManager.erase_phantom_set(get_phantom_set_id(view))
 
 
-def update_phantom_set(view: sublime.View, uri_regions: Iterable[sublime.Region]) -> None:
-    PhatomSetsManager.update_phantom_set(get_phantom_set_id(view), new_uri_phantoms(view, uri_regions))
+def update_phantom_set(view: sublime.View, uri_regions: Iterable[sublime.Region], generation: int = 0) -> None:
+    """
+    @brief Update phantoms for URI regions. Phantoms are only built for URI regions which are not rendered yet,
+           unless the text, the color scheme, the syntax or the generation is changed since the last update.
+
+    @param view        The view
+    @param uri_regions The URI regions
+    @param generation  The generation of things which phantoms depend on, such as images and settings
+    """
+    resolver = ScopeColorResolver(view)
+    PhatomSetsManager.update_phantom_set_by_regions(
+        get_phantom_set_id(view),
+        uri_regions,
+        partial(new_uri_phantom, view, resolver=resolver),
+        (view.change_count(), resolver.color_scheme, view.settings().get("syntax"), generation),
+    )
+
+
+def generate_phantom_html(
+    view: sublime.View,
+    uri_region: sublime.Region,
+    resolver: ScopeColorResolver | None = None,
+) -> str:
+    rgba_code = get_image_color(view, "phantom", uri_region, resolver)
+    # never wait for coloring images, the colored one will be used when it's ready
+    rgba_code = ColoredImagesManager.get_ready_color("phantom", rgba_code)
+
+    return generate_phantom_html_by_uri(view.substr(uri_region), rgba_code)
 
 
-def generate_phantom_html(view: sublime.View, uri_region: sublime.Region) -> str:
+@lru_cache(maxsize=1024)
+def generate_phantom_html_by_uri(uri: str, rgba_code: str) -> str:
+    """
+    @brief Generate the phantom HTML. The result is cached since identical URIs are common.
+
+    @param uri       The URI
+    @param rgba_code The color code of the image in #RRGGBBAA
+
+    @return The phantom HTML
+    """
     img: ImageDict = global_get("images.phantom")
+    head, middle, tail = compile_phantom_template(img["ratio_wh"])
 
-    return PHANTOM_TEMPLATE.format(
-        uri=sublime.html_format_command(view.substr(uri_region)),
-        mime=img["mime"],
-        ratio_wh=img["ratio_wh"],
-        base64=get_colored_image_base64_by_region("phantom", uri_region),
-    )
+    return "".join((
+        head,
+        sublime.html_format_command(uri),
+        middle,
+        get_colored_image_src_by_color("phantom", rgba_code),
+        tail,
+    ))
 
 
-def new_uri_phantom(view: sublime.View, uri_region: sublime.Region) -> sublime.Phantom:
+@lru_cache(maxsize=8)
+def compile_phantom_template(ratio_wh: float) -> tuple[str, ...]:
+    """
+    @brief Fill constants into the phantom template.
+
+    @param ratio_wh The ratio of the image's width to its height
+
+    @return Fragments around the URI and the image source
+    """
+    return compile_template(PHANTOM_TEMPLATE, ("uri", "src"), ratio_wh=ratio_wh)
+
+
+def new_uri_phantom(
+    view: sublime.View,
+    uri_region: sublime.Region,
+    resolver: ScopeColorResolver | None = None,
+) -> sublime.Phantom:
     return sublime.Phantom(
         sublime.Region(uri_region.end()),
-        generate_phantom_html(view, uri_region),
+        generate_phantom_html(view, uri_region, resolver),
         layout=sublime.LAYOUT_INLINE,
         on_navigate=open_uri_with_browser,
     )
-
-
-def new_uri_phantoms(view: sublime.View, uri_regions: Iterable[sublime.Region]) -> tuple[sublime.Phantom, ...]:
-    return tuple(new_uri_phantom(view, r) for r in uri_regions)
@@ -1,23 +1,25 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Callable, Hashable, Iterable
 
 import sublime
 
+from .diff_phantom_set import DiffPhantomSet
+
 
 class PhatomSetsManager:
     # class-level (shared across objects)
-    _phantom_sets: dict[str, sublime.PhantomSet] = {
+    _phantom_sets: dict[str, DiffPhantomSet] = {
         # phantom_set_id: PhantomSet object,
     }
 
     @classmethod
-    def get_phantom_set(cls, phantom_set_id: str) -> sublime.PhantomSet | None:
+    def get_phantom_set(cls, phantom_set_id: str) -> DiffPhantomSet | None:
         return cls._phantom_sets.get(phantom_set_id)
 
     @classmethod
     def init_phantom_set(cls, view: sublime.View, phantom_set_id: str, phantom_set_key: str = "") -> None:
-        cls._phantom_sets[phantom_set_id] = sublime.PhantomSet(view, phantom_set_key)
+        cls._phantom_sets[phantom_set_id] = DiffPhantomSet(view, phantom_set_key)
 
     @classmethod
     def delete_phantom_set(cls, phantom_set_id: str) -> None:
@@ -29,9 +31,15 @@ class PhatomSetsManager:
             cls._phantom_sets[phantom_set_id].update(tuple())
 
     @classmethod
-    def update_phantom_set(cls, phantom_set_id: str, phantoms: Iterable[sublime.Phantom]) -> None:
+    def update_phantom_set_by_regions(
+        cls,
+        phantom_set_id: str,
+        regions: Iterable[sublime.Region],
+        new_phantom: Callable[[sublime.Region], sublime.Phantom],
+        context: Hashable,
+    ) -> None:
         if phantom_set_id in cls._phantom_sets:
-            cls._phantom_sets[phantom_set_id].update(tuple(phantoms))
+            cls._phantom_sets[phantom_set_id].update_by_regions(regions, new_phantom, context)
 
     @classmethod
     def clear(cls) -> None:
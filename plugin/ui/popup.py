@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 import sublime
 
 from ..helpers import open_uri_with_browser
-from ..settings import get_setting
+from ..settings import get_settings_snapshot
 from ..shared import global_get
 from ..types import ImageDict
-from .image import get_colored_image_base64_by_region
+from ..utils import compile_template
+from .image import get_colored_image_src_by_color, get_image_color
 
 POPUP_TEMPLATE = """
 <body id="open-uri-popup">
@@ -16,28 +19,65 @@ POPUP_TEMPLATE = """
             height: {h}{size_unit};
         }}
     </style>
-    <a href="{uri}"><img src="data:{mime};base64,{base64}"></a>
+    <a href="{uri}"><img src="{src}"></a>
     {text_html}
 </body>
 """
 
 
 def generate_popup_html(view: sublime.View, uri_region: sublime.Region) -> str:
+    return generate_popup_html_by_uri(view.substr(uri_region), get_image_color(view, "popup", uri_region))
+
+
+@lru_cache(maxsize=64)
+def generate_popup_html_by_uri(uri: str, rgba_code: str) -> str:
+    """
+    @brief Generate the popup HTML. The result is cached since the same URI is usually hovered repeatedly.
+
+    @param uri       The URI
+    @param rgba_code The color code of the image in #RRGGBBAA
+
+    @return The popup HTML
+    """
     img: ImageDict = global_get("images.popup")
+    head, middle, tail = compile_popup_template(img["ratio_wh"], get_settings_snapshot().popup_text_html)
+
+    return "".join((
+        head,
+        sublime.html_format_command(uri),
+        middle,
+        get_colored_image_src_by_color("popup", rgba_code),
+        tail,
+    ))
+
+
+@lru_cache(maxsize=8)
+def compile_popup_template(ratio_wh: float, text_html: str) -> tuple[str, ...]:
+    """
+    @brief Fill constants into the popup template.
+
+    @param ratio_wh  The ratio of the image's width to its height
+    @param text_html The HTML text below the image
+
+    @return Fragments around the URI and the image source
+    """
     base_size = 2.5
 
-    return POPUP_TEMPLATE.format(
-        uri=sublime.html_format_command(view.substr(uri_region)),
-        mime=img["mime"],
-        w=base_size * img["ratio_wh"],
+    return compile_template(
+        POPUP_TEMPLATE,
+        ("uri", "src"),
+        w=base_size * ratio_wh,
         h=base_size,
         size_unit="em",
-        base64=get_colored_image_base64_by_region("popup", uri_region),
-        text_html=get_setting("popup_text_html"),
+        text_html=text_html,
     )
 
 
 def show_popup(view: sublime.View, uri_region: sublime.Region, point: int) -> None:
+    # images are still being loaded
+    if not global_get("images.popup"):
+        return
+
     view.show_popup(
         generate_popup_html(view, uri_region),
         flags=sublime.COOPERATE_WITH_AUTO_COMPLETE | sublime.HIDE_ON_MOUSE_MOVE_AWAY,
@@ -1,12 +1,10 @@
 from __future__ import annotations
 
-from collections.abc import Iterable, Sequence
-from functools import reduce
-from operator import xor
+from collections.abc import Iterable
 
 import sublime
 
-from ..settings import get_setting
+from ..settings import get_settings_snapshot
 
 
 def erase_uri_regions(view: sublime.View) -> None:
@@ -14,19 +12,12 @@ def erase_uri_regions(view: sublime.View) -> None:
 
 
 def draw_uri_regions(view: sublime.View, uri_regions: Iterable[sublime.Region]) -> None:
-    draw_uri_regions = get_setting("draw_uri_regions")
+    settings = get_settings_snapshot()
 
     view.add_regions(
         "OUIB_uri_regions",
         tuple(uri_regions),
-        scope=draw_uri_regions["scope"],
-        icon=draw_uri_regions["icon"],
-        flags=parse_draw_region_flags(draw_uri_regions["flags"]),
+        scope=settings.draw_uri_regions_scope,
+        icon=settings.draw_uri_regions_icon,
+        flags=settings.draw_uri_regions_flags,
     )
-
-
-def parse_draw_region_flags(flags: int | Sequence[str]) -> int:
-    if isinstance(flags, int):
-        return flags
-
-    return reduce(xor, map(lambda flag: getattr(sublime, flag, 0), flags), 0)
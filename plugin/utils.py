@@ -8,6 +8,7 @@ from typing import Any, Pattern, cast, overload
 import sublime
 
 from .constants import ST_SUPPORT_EXPAND_TO_SCOPE
+from .prefilter import PrefilteredPattern
 from .types import RegionLike, T_AnyCallable
 
 
@@ -46,6 +47,22 @@ def simple_decorator(decorator: Callable) -> Callable[[T_AnyCallable], T_AnyCall
     return wrapper
 
 
+def compile_template(template: str, variables: Sequence[str], **constants: Any) -> tuple[str, ...]:
+    """
+    @brief Fill constants into the `str.format()` template once, so it only has to be joined with variables later.
+
+    @param template  The template
+    @param variables The names of variables, in the order they appear in the template
+    @param constants The values of constants
+
+    @return Fragments around variables, i.e., `len(variables) + 1` fragments.
+    """
+    fragments = tuple(template.format(**constants, **{name: "\0" for name in variables}).split("\0"))
+    if len(fragments) != len(variables) + 1:
+        raise ValueError(f"Each variable must appear in the template exactly once: {variables}")
+    return fragments
+
+
 def dotted_get(var: Any, dotted: str, default: Any | None = None) -> Any:
     """
     @brief Get the value from the variable with dotted notation.
@@ -101,8 +118,9 @@ def dotted_set(var: Any, dotted: str, value: Any) -> None:
 
 def view_find_all(
     view: sublime.View,
-    regex_obj: Pattern[str],
+    regex_obj: Pattern[str] | PrefilteredPattern,
     expand_selectors: Iterable[str] = tuple(),
+    region: RegionLike | None = None,
 ) -> Generator[sublime.Region, None, None]:
     """
     @brief Find all content matching the regex and expand found regions with selectors.
@@ -110,30 +128,42 @@ def view_find_all(
     @param view               the View object
     @param regex_obj          the compiled regex object
     @param expand_selector    the selectors used to expand found regions
+    @param region             the region to be searched, the whole view if not given
 
     @return A generator for found regions
     """
-
-    def expand(region: sublime.Region) -> sublime.Region:
-        if ST_SUPPORT_EXPAND_TO_SCOPE:
-            return next(
-                filter(None, (view.expand_to_scope(region.a, selector) for selector in expand_selectors)),
-                region,
-            )
-
-        for selector in expand_selectors:
-            if not view.match_selector(region.a, selector):
-                continue
-            while view.match_selector(region.b, selector):
-                region.b += 1
-            break
-        return region
-
     if isinstance(expand_selectors, str):
         expand_selectors = (expand_selectors,)
 
-    for m in regex_obj.finditer(view.substr(sublime.Region(0, len(view)))):
-        yield expand(sublime.Region(*m.span()))
+    search_region = sublime.Region(0, len(view)) if region is None else convert_to_st_region(region, sort=True)
+
+    for m in regex_obj.finditer(view.substr(search_region)):
+        yield view_expand_region(view, sublime.Region(*region_shift(m.span(), search_region.a)), expand_selectors)
+
+
+def view_expand_region(view: sublime.View, region: sublime.Region, expand_selectors: Iterable[str]) -> sublime.Region:
+    """
+    @brief Expand the region with the first matched selector.
+
+    @param view             the View object
+    @param region           the region
+    @param expand_selectors the selectors used to expand the region
+
+    @return The expanded region, or the region itself if no selector matches
+    """
+    if ST_SUPPORT_EXPAND_TO_SCOPE:
+        return next(
+            filter(None, (view.expand_to_scope(region.a, selector) for selector in expand_selectors)),
+            region,
+        )
+
+    for selector in expand_selectors:
+        if not view.match_selector(region.a, selector):
+            continue
+        while view.match_selector(region.b, selector):
+            region.b += 1
+        break
+    return region
 
 
 @overload
@@ -210,44 +240,6 @@ def region_shift(region: RegionLike, shift: int) -> tuple[int, int] | sublime.Re
     return (region[0] + shift, region[-1] + shift)
 
 
-@overload
-def region_expand(
-    region: sublime.Region,
-    expansion: int | list[int] | tuple[int, int],
-) -> sublime.Region: ...
-
-
-@overload
-def region_expand(
-    region: int | list[int] | tuple[int, int],
-    expansion: int | list[int] | tuple[int, int],
-) -> tuple[int, int]: ...
-
-
-def region_expand(
-    region: RegionLike,
-    expansion: int | list[int] | tuple[int, int],
-) -> tuple[int, int] | sublime.Region:
-    """
-    @brief Expand the region by given amount.
-
-    @param region    The region
-    @param expansion The amount of left/right expansion
-
-    @return the expanded region
-    """
-    if isinstance(expansion, int):
-        expansion = (expansion, expansion)
-
-    if isinstance(region, int):
-        return (region - expansion[0], region + expansion[1])
-
-    if isinstance(region, sublime.Region):
-        return sublime.Region(region.a - expansion[0], region.b + expansion[1])
-
-    return (region[0] - expansion[0], region[-1] + expansion[-1])
-
-
 def convert_to_region_tuple(region: RegionLike, sort: bool = False) -> tuple[int, int]:
     """
     @brief Convert the "region" into its tuple form
@@ -284,42 +276,6 @@ def convert_to_st_region(region: RegionLike, sort: bool = False) -> sublime.Regi
     return sublime.Region(*convert_to_region_tuple(region, sort))
 
 
-def merge_regions(regions: Iterable[sublime.Region], allow_boundary: bool = False) -> list[sublime.Region]:
-    """
-    @brief Merge intersected regions to reduce numbers of regions.
-
-    @param regions        The regions, whose `region.a <= region.b`
-    @param allow_boundary Treat boundary contact as intersected
-
-    @return Merged regions
-    """
-    merged_regions: list[sublime.Region] = []
-    for region in sorted(regions):
-        if not merged_regions:
-            merged_regions.append(region)
-            continue
-
-        if is_regions_intersected(merged_regions[-1], region, allow_boundary):
-            merged_regions[-1].b = region.b
-        else:
-            merged_regions.append(region)
-
-    return merged_regions
-
-
-def is_regions_intersected(region1: sublime.Region, region2: sublime.Region, allow_boundary: bool = False) -> bool:
-    """
-    @brief Determinates whether two regions are intersected.
-
-    @param region1        The 1st region
-    @param region2        The 2nd region
-    @param allow_boundary Treat boundary contact as intersected
-
-    @return True if intersected, False otherwise.
-    """
-    return region1.intersects(region2) or bool(allow_boundary and {*region1.to_tuple()} & {*region2.to_tuple()})
-
-
 def is_processable_view(view: sublime.View) -> bool:
     return view.is_valid() and not view.is_loading() and not view.element()
 
@@ -0,0 +1,186 @@
+"""
+Microbenchmarks of coloring PNG images, which compare
+
+- "legacy": the former per-pixel implementation of `change_png_bytes_color()`, kept here as the reference.
+- "current": the current `change_png_bytes_color()`.
+
+The whole function (PNG decoding and encoding included), PNG decoding and the recoloring of decoded pixels
+are measured separately.
+Note that "current" decodes an image only once no matter how many times it's colored.
+Results (pixels) of both implementations are verified to be identical.
+Bundled images are benchmarked as well as generated ones in the given sizes.
+
+Usage: python tests/benchmarks/image_coloring.py [--sizes 48 128 512] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import sys
+import time
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import Any, TypeVar
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_DIR / "tests/headless"))
+
+import sublime_plugin  # noqa: E402
+
+PACKAGE_NAME = "OpenUri"
+RGBA_CODE = "#fa8c00ff"
+
+T = TypeVar("T")
+
+
+def legacy_calculate_gray(rgb: Sequence[int]) -> int:
+    return int(rgb[0] * 38 + rgb[1] * 75 + rgb[2] * 15) >> 7
+
+
+def legacy_render_rows(
+    rows_src: Iterable[Sequence[int]], rgba_dst: Sequence[int], invert_gray: bool
+) -> list[list[int]]:
+    def render_pixel(rgba_src: Sequence[int], rgba_dst: Sequence[int], invert_gray: bool = False) -> list[int]:
+        gray = legacy_calculate_gray(rgba_src)
+        if invert_gray:
+            gray = 0xFF - gray
+        return [
+            int(rgba_dst[0] * gray) >> 8,
+            int(rgba_dst[1] * gray) >> 8,
+            int(rgba_dst[2] * gray) >> 8,
+            int(rgba_dst[3] * rgba_src[3]) >> 8,
+        ]
+
+    rows_dst: list[list[int]] = []
+    for row_src in rows_src:
+        row_dst: list[int] = []
+        for i in range(0, len(row_src), 4):
+            row_dst.extend(render_pixel(row_src[i : i + 4], rgba_dst, invert_gray))
+        rows_dst.append(row_dst)
+    return rows_dst
+
+
+def legacy_change_png_bytes_color(img_bytes: bytes, rgba_code: str) -> bytes:
+    from OpenUri.plugin.libs import png
+
+    def legacy_is_img_light(img_bytes: bytes) -> bool:
+        w, h, rows, _ = png.Reader(bytes=img_bytes).asRGBA()
+        gray_sum = 0
+        for row in rows:
+            for i in range(0, len(row), 4):
+                gray_sum += legacy_calculate_gray(row[i : i + 4])
+        return (gray_sum >> 7) > w * h
+
+    invert_gray = not legacy_is_img_light(img_bytes)
+    rgba_dst = [int(rgba_code[i : i + 2], 16) for i in range(1, 9, 2)]
+    rows_dst = legacy_render_rows(png.Reader(bytes=img_bytes).asRGBA()[2], rgba_dst, invert_gray)
+
+    buf = io.BytesIO()
+    png.from_array(rows_dst, "RGBA").write(buf)
+    return buf.getvalue()
+
+
+def generate_png(rng: random.Random, size: int) -> bytes:
+    """
+    @brief Generate a RGBA PNG image which looks like an anti-aliased icon.
+
+    @param rng  The random number generator
+    @param size The width and the height
+    """
+    from OpenUri.plugin.libs import png
+
+    rows: list[list[int]] = []
+    for y in range(size):
+        row: list[int] = []
+        for x in range(size):
+            # a filled circle with a soft edge
+            distance = ((x - size / 2) ** 2 + (y - size / 2) ** 2) ** 0.5 / (size / 2)
+            alpha = max(0, min(0xFF, int((1 - distance) * 4 * 0xFF)))
+            row.extend((rng.randint(0, 0x40), rng.randint(0, 0x40), rng.randint(0, 0x40), alpha))
+        rows.append(row)
+
+    buf = io.BytesIO()
+    png.from_array(rows, "RGBA").write(buf)
+    return buf.getvalue()
+
+
+def measure(func: Callable[[], T], repeat: int) -> tuple[float, T]:
+    """
+    @brief Measure a function.
+
+    @param func   The function
+    @param repeat The amount of runs, whose best time is taken
+
+    @return (best time in second, the result)
+    """
+    best_s = float("inf")
+    for _ in range(repeat):
+        start_s = time.perf_counter()
+        result = func()
+        best_s = min(best_s, time.perf_counter() - start_s)
+    return best_s, result
+
+
+def run_benchmarks(sizes: Sequence[int], repeat: int, seed: int) -> None:
+    sublime_plugin.load_plugin_package(PACKAGE_NAME, REPO_DIR)
+    from OpenUri.plugin.libs import png
+    from OpenUri.plugin.png_codec import decode_png_to_rgba8
+    from OpenUri.plugin.ui.image import DecodedImage, change_png_bytes_color
+
+    images = {str(path.relative_to(REPO_DIR)): path.read_bytes() for path in sorted(REPO_DIR.glob("images/*/*.png"))}
+    rng = random.Random(seed)
+    images.update({f"(generated {size}x{size})": generate_png(rng, size) for size in sizes})
+
+    rgba_dst = [int(RGBA_CODE[i : i + 2], 16) for i in range(1, 9, 2)]
+
+    print(f"{'image':<44} {'':>7} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+    for name, img_bytes in images.items():
+        rows = [bytes(row) for row in png.Reader(bytes=img_bytes).asRGBA8()[2]]
+        img = DecodedImage.from_png_bytes(img_bytes)
+        paths: dict[str, tuple[Callable[[], Any], Callable[[], Any]]] = {
+            "all": (
+                lambda: legacy_change_png_bytes_color(img_bytes, RGBA_CODE),
+                lambda: change_png_bytes_color(img_bytes, RGBA_CODE),
+            ),
+            "decode": (
+                lambda: b"".join(map(bytes, png.Reader(bytes=img_bytes).asRGBA8()[2])),
+                lambda: decode_png_to_rgba8(img_bytes)[2],
+            ),
+            "recolor": (
+                lambda: legacy_render_rows(rows, rgba_dst, not img.is_light),
+                lambda: img.render(rgba_dst),
+            ),
+        }
+        for path_name, (legacy_func, current_func) in paths.items():
+            legacy_s, legacy_result = measure(legacy_func, repeat)
+            current_s, current_result = measure(current_func, repeat)
+
+            if path_name == "all":
+                legacy_result, current_result = decode_png_to_rgba8(legacy_result), decode_png_to_rgba8(current_result)
+            if path_name == "recolor":
+                legacy_result = bytearray(value for row in legacy_result for value in row)
+            if legacy_result != current_result:
+                raise AssertionError(f"Results are different for {name}")
+
+            print(
+                f"{name:<44} {path_name:>7} {legacy_s * 1000:>10.3f} {current_s * 1000:>11.3f}"
+                f" {legacy_s / current_s:>7.1f}x"
+            )
+
+    sublime_plugin.unload_plugin_package(PACKAGE_NAME)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark coloring PNG images.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=(48, 128, 512), help="sizes of generated images")
+    parser.add_argument("--repeat", type=int, default=5, help="the best of these runs is taken")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_benchmarks(args.sizes, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
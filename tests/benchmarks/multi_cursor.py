@@ -0,0 +1,174 @@
+"""
+Benchmarks of finding URIs around lots of cursors, which is what `SelectUriFromCursorsCommand` and
+`CopyUriFromCursorsCommand` do. It compares
+
+- "legacy": the former `find_uri_regions_by_regions()`, which fetches and scans the text once per search region
+  and matches URIs to cursors with a nested loop. It's kept here as the reference.
+- "current": the current `find_uri_regions_by_regions()`.
+
+Cursors are made by "find all" with the given pattern over generated logs. By default, some cursors are in URIs
+while others are not. `--pattern INFO` makes no cursor be in a URI, which is the worst case of "legacy".
+Known URI regions of the view are always discarded before each run, so the text is really scanned.
+Results of both implementations are verified to be identical.
+
+Usage: python tests/benchmarks/multi_cursor.py [--cursors 1000 10000] [--pattern REGEX] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import TypeVar
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_DIR / "tests/headless"))
+
+import sublime  # noqa: E402
+import sublime_plugin  # noqa: E402
+
+PACKAGE_NAME = "OpenUri"
+WORDS = "error request server client value index update render cache buffer".split()
+
+T = TypeVar("T")
+
+
+def legacy_find_uri_regions_by_regions(
+    view: sublime.View,
+    regions: Iterable[sublime.Region],
+    search_radius: int,
+) -> list[sublime.Region]:
+    from OpenUri.plugin.shared import global_get
+    from OpenUri.plugin.utils import region_shift
+
+    def region_expand(region: sublime.Region, expansion: int) -> sublime.Region:
+        return sublime.Region(region.a - expansion, region.b + expansion)
+
+    def is_regions_intersected(region1: sublime.Region, region2: sublime.Region, allow_boundary: bool) -> bool:
+        return region1.intersects(region2) or bool(allow_boundary and {*region1.to_tuple()} & {*region2.to_tuple()})
+
+    def merge_regions(regions: Iterable[sublime.Region], allow_boundary: bool) -> list[sublime.Region]:
+        merged_regions: list[sublime.Region] = []
+        for region in sorted(regions):
+            if merged_regions and is_regions_intersected(merged_regions[-1], region, allow_boundary):
+                merged_regions[-1].b = region.b
+            else:
+                merged_regions.append(region)
+        return merged_regions
+
+    st_regions = sorted(sublime.Region(region.begin(), region.end()) for region in regions)
+    search_regions = merge_regions((region_expand(st_region, search_radius) for st_region in st_regions), True)
+
+    uri_regions: list[sublime.Region] = []
+    for search_region in search_regions:
+        uri_regions.extend(
+            sublime.Region(*region_shift(m.span(), max(0, search_region.a)))
+            for m in global_get("uri_regex_obj").finditer(view.substr(search_region))
+        )
+
+    regions_idx = 0
+    uri_regions_intersected: list[sublime.Region] = []
+    for uri_region in uri_regions:
+        for idx in range(regions_idx, len(st_regions)):
+            region = st_regions[idx]
+            if uri_region.a > region.b:
+                regions_idx = idx + 1
+            if is_regions_intersected(uri_region, region, True):
+                uri_regions_intersected.append(uri_region)
+                break
+
+    return uri_regions_intersected
+
+
+def generate_logs(rng: random.Random, line_count: int) -> str:
+    """
+    @brief Generate log lines, some of which have a URI.
+
+    @param rng        The random number generator
+    @param line_count The amount of lines
+    """
+    lines: list[str] = []
+    for i in range(line_count):
+        words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        uri = f" https://{rng.choice(WORDS)}.example.com/{i}?id={rng.randint(0, 9999)}" if rng.random() < 0.5 else ""
+        lines.append(f"2024-01-01 00:00:{i % 60:02d} [INFO] {words}{uri}")
+    return "\n".join(lines) + "\n"
+
+
+def measure(func: Callable[[], T], repeat: int, before_each: Callable[[], object]) -> tuple[float, T]:
+    """
+    @brief Measure a function.
+
+    @param func        The function
+    @param repeat      The amount of runs, whose best time is taken
+    @param before_each The function called before each run, which is not measured
+
+    @return (best time in second, the result)
+    """
+    best_s = float("inf")
+    for _ in range(repeat):
+        before_each()
+        start_s = time.perf_counter()
+        result = func()
+        best_s = min(best_s, time.perf_counter() - start_s)
+    return best_s, result
+
+
+def run_benchmarks(cursor_counts: Sequence[int], pattern: str, repeat: int, seed: int) -> None:
+    sublime_plugin.load_plugin_package(PACKAGE_NAME, REPO_DIR)
+    sublime.run_timers()
+    from OpenUri.plugin.detector import UriDetectorsManager
+    from OpenUri.plugin.helpers import find_uri_regions_by_regions
+    from OpenUri.plugin.settings import get_setting
+
+    search_radius = int(get_setting("uri_search_radius"))
+    rng = random.Random(seed)
+
+    print(f"{'cursors':>8} {'URIs':>7} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+    for cursor_count in cursor_counts:
+        view = sublime.active_window().new_file()
+        # about a half of lines have a URI
+        view.run_command("append", {"characters": generate_logs(rng, cursor_count * 2 // 3)})
+        cursors = view.find_all(pattern)
+
+        def discard_detections() -> None:
+            UriDetectorsManager.delete_detector(view.buffer_id())
+
+        legacy_s, legacy_result = measure(
+            lambda: legacy_find_uri_regions_by_regions(view, cursors, search_radius),
+            repeat,
+            discard_detections,
+        )
+        current_s, current_result = measure(
+            lambda: find_uri_regions_by_regions(view, cursors, search_radius),
+            repeat,
+            discard_detections,
+        )
+        if legacy_result != current_result:
+            raise AssertionError(f"Results are different for {cursor_count} cursors")
+
+        print(
+            f"{len(cursors):>8} {len(current_result):>7} {legacy_s * 1000:>10.2f} {current_s * 1000:>11.2f}"
+            f" {legacy_s / current_s:>7.1f}x"
+        )
+        view.close()
+
+    sublime_plugin.unload_plugin_package(PACKAGE_NAME)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark finding URIs around lots of cursors.")
+    parser.add_argument("--cursors", type=int, nargs="+", default=(1000, 10000), help="amounts of cursors")
+    parser.add_argument("--pattern", default=r"\[INFO\]|example", help="the regex for making cursors")
+    parser.add_argument("--repeat", type=int, default=3, help="the best of these runs is taken")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_benchmarks(args.cursors, args.pattern, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
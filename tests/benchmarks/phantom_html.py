@@ -0,0 +1,99 @@
+"""
+Benchmarks of rendering phantoms with different "image_source" settings.
+
+For each setting, all phantoms of a view are rendered from scratch, which is what happens
+when a file is opened or phantoms are re-rendered due to setting changes. It reports
+
+- the HTML volume which is sent to Sublime Text.
+- the time spent in the plugin for generating phantoms and updating the phantom set.
+
+Note that the time spent by Sublime Text parsing HTML and decoding images is not included
+since this runs with the headless `sublime` module.
+
+Usage: python tests/benchmarks/phantom_html.py [--links 500 5000] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import time
+from collections.abc import Sequence
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_DIR / "tests/headless"))
+
+import sublime  # noqa: E402
+import sublime_plugin  # noqa: E402
+
+PACKAGE_NAME = "OpenUri"
+IMAGE_SOURCES = ("base64", "file")
+
+
+def run_benchmarks(link_counts: Sequence[int], repeat: int) -> None:
+    sublime_plugin.load_plugin_package(PACKAGE_NAME, REPO_DIR)
+    # images are loaded in the background
+    sublime.run_timers()
+    from OpenUri.plugin.shared import global_get
+    from OpenUri.plugin.ui.phantom_set import (
+        delete_phantom_set,
+        generate_phantom_html_by_uri,
+        init_phantom_set,
+        update_phantom_set,
+    )
+
+    # settings are changed frequently, which are logged
+    global_get("logger").disabled = True
+    settings = global_get("settings")
+    image_source = settings.get("image_source")
+
+    print(f"{'links':>7} {'image_source':<13} {'HTML KB':>10} {'bytes/phantom':>14} {'ms':>9}")
+    for link_count in link_counts:
+        view = sublime.active_window().new_file()
+        view.run_command(
+            "append", {"characters": "".join(f"see https://example.com/{i} here\n" for i in range(link_count))}
+        )
+        uri_regions = view.find_all(r"https://\S+")
+
+        for source in IMAGE_SOURCES:
+            settings.set("image_source", source)
+
+            best_s = float("inf")
+            for _ in range(repeat):
+                delete_phantom_set(view)
+                init_phantom_set(view)
+                # identical URIs are not common in the real world
+                generate_phantom_html_by_uri.cache_clear()
+                gc.collect()
+                start_s = time.perf_counter()
+                update_phantom_set(view, uri_regions)
+                best_s = min(best_s, time.perf_counter() - start_s)
+
+            # phantoms which have been added to the (headless) view
+            html_bytes = sum(len(content.encode("utf-8")) for _, _, content, *_ in view._data.phantoms.values())
+            print(
+                f"{link_count:>7} {source:<13} {html_bytes / 1024:>10.1f} {html_bytes / link_count:>14.0f}"
+                f" {best_s * 1000:>9.2f}"
+            )
+
+        delete_phantom_set(view)
+        view.close()
+
+    settings.set("image_source", image_source)
+    sublime.run_timers()
+    sublime_plugin.unload_plugin_package(PACKAGE_NAME)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark rendering phantoms with different image sources.")
+    parser.add_argument("--links", type=int, nargs="+", default=(500, 5000), help="amounts of links in a view")
+    parser.add_argument("--repeat", type=int, default=3, help="the best of these runs is taken")
+    args = parser.parse_args()
+
+    run_benchmarks(args.links, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Throughput benchmarks of URI detection over generated corpora.
+
+For each corpus and each scheme configuration, it reports the throughput (MB/s of UTF-8 text),
+the amount of found URIs per second and the peak memory of
+
+- "regex": running the regex from `compile_uri_regex()` over the text.
+- "view_find_all": the full `view_find_all()` path over a (headless) view.
+
+Usage: python tests/benchmarks/uri_detection.py [--size-mb 1] [--schemes default|each|all] [--corpus logs ...]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+REPO_DIR = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_DIR / "tests/headless"))
+
+import sublime  # noqa: E402
+import sublime_plugin  # noqa: E402
+
+PACKAGE_NAME = "OpenUri"
+
+# ---------- #
+# corpora    #
+# ---------- #
+
+WORDS = (
+    "the of and to in is for on that with as by this from at are be it or an was not which have error request "
+    "server client value index update render cache buffer phantom region scope"
+).split()
+CJK_PUNCTUATIONS = "，。！？、；：「」『』（）"
+URI_SCHEMES = ("http://", "https://", "ftp://", "file:///", "mailto:", "www.")
+
+
+def _random_uri(rng: random.Random, scheme: str = "") -> str:
+    scheme = scheme or rng.choice(URI_SCHEMES)
+    host = ".".join(rng.choice(WORDS) for _ in range(rng.randint(2, 3)))
+    if scheme == "mailto:":
+        return f"mailto:{rng.choice(WORDS)}@{host}"
+    if scheme == "file:///":
+        return f"file:///{'/'.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))}.txt"
+    path = "/".join(rng.choice(WORDS) for _ in range(rng.randint(0, 4)))
+    query = f"?{rng.choice(WORDS)}={rng.randint(0, 9999)}" if rng.random() < 0.3 else ""
+    return f"{scheme}{host}/{path}{query}"
+
+
+def generate_logs(rng: random.Random, size: int) -> str:
+    lines: list[str] = []
+    length = 0
+    while length < size:
+        ip = ".".join(str(rng.randint(1, 254)) for _ in range(4))
+        path = "/" + "/".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4)))
+        referrer = _random_uri(rng, rng.choice(("http://", "https://"))) if rng.random() < 0.5 else "-"
+        lines.append(
+            f'{ip} - - [17/Oct/2026:13:55:{rng.randint(10, 59)} +0000] "GET {path} HTTP/1.1" '
+            f'{rng.choice((200, 301, 404, 500))} {rng.randint(100, 99999)} "{referrer}" "Mozilla/5.0 (X11; Linux)"'
+        )
+        length += len(lines[-1]) + 1
+    return "\n".join(lines)
+
+
+def generate_markdown(rng: random.Random, size: int) -> str:
+    pieces: list[str] = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.05:
+            piece = f"\n\n## {' '.join(rng.choice(WORDS) for _ in range(3)).title()}\n\n"
+        elif rng.random() < 0.15:
+            piece = f"[{rng.choice(WORDS)}]({_random_uri(rng, 'https://')}) "
+        elif rng.random() < 0.05:
+            piece = f"<{_random_uri(rng)}> "
+        else:
+            piece = f"{rng.choice(WORDS)} "
+        pieces.append(piece)
+        length += len(piece)
+    return "".join(pieces)
+
+
+def generate_minified_json(rng: random.Random, size: int) -> str:
+    items: list[dict[str, Any]] = []
+    length = 0
+    while length < size:
+        item = {
+            "id": rng.randint(0, 1 << 30),
+            "name": " ".join(rng.choice(WORDS) for _ in range(3)),
+            "url": _random_uri(rng, "https://"),
+            "tags": [rng.choice(WORDS) for _ in range(rng.randint(0, 5))],
+            "score": rng.random(),
+        }
+        items.append(item)
+        length += len(json.dumps(item, separators=(",", ":")))
+    # a single very long line
+    return json.dumps({"items": items}, separators=(",", ":"))
+
+
+def generate_source_code(rng: random.Random, size: int) -> str:
+    lines: list[str] = []
+    length = 0
+    while length < size:
+        roll = rng.random()
+        indent = " " * 4 * rng.randint(0, 3)
+        if roll < 0.02:
+            line = f"{indent}# see {_random_uri(rng, 'https://')}"
+        elif roll < 0.2:
+            line = f"{indent}# {' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 10)))}"
+        elif roll < 0.3:
+            line = f"{indent}def {rng.choice(WORDS)}_{rng.choice(WORDS)}(self, {rng.choice(WORDS)}: int) -> None:"
+        else:
+            args = ", ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 3)))
+            line = f"{indent}{rng.choice(WORDS)} = self.{rng.choice(WORDS)}({args})[{rng.randint(0, 9)}]"
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def generate_cjk(rng: random.Random, size: int) -> str:
+    pieces: list[str] = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.01:
+            piece = f" {_random_uri(rng)} "
+        else:
+            # CJK unified ideographs
+            piece = "".join(chr(rng.randint(0x4E00, 0x9FA5)) for _ in range(rng.randint(5, 30)))
+            piece += rng.choice(CJK_PUNCTUATIONS)
+            if rng.random() < 0.1:
+                piece += "\n"
+        pieces.append(piece)
+        length += len(piece.encode("utf-8"))
+    return "".join(pieces)
+
+
+CORPUS_GENERATORS: dict[str, Callable[[random.Random, int], str]] = {
+    "logs": generate_logs,
+    "markdown": generate_markdown,
+    "minified_json": generate_minified_json,
+    "source_code": generate_source_code,
+    "cjk": generate_cjk,
+}
+
+# ---------- #
+# benchmarks #
+# ---------- #
+
+
+def list_scheme_configs(mode: str, detect_schemes: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """
+    @brief List scheme configurations to be benchmarked.
+
+    @param mode           "default" (as-is), "each" (as-is and then every scheme alone) or "all" (every scheme)
+    @param detect_schemes The "detect_schemes" setting
+
+    @return {configuration name: "detect_schemes" setting}
+    """
+    configs = {"default": detect_schemes}
+    if mode in ("each", "all"):
+        configs["all"] = {scheme: {**config, "enabled": True} for scheme, config in detect_schemes.items()}
+    if mode == "each":
+        for scheme in detect_schemes:
+            configs[f"only {scheme or '(www)'}"] = {
+                name: {**config, "enabled": name == scheme} for name, config in detect_schemes.items()
+            }
+    return configs
+
+
+def measure(func: Callable[[], int], repeat: int) -> tuple[float, int, int]:
+    """
+    @brief Measure a function which returns the amount of matches.
+
+    @param func   The function
+    @param repeat The amount of runs, whose best time is taken
+
+    @return (best time in second, the amount of matches, peak memory in byte)
+    """
+    best_s = float("inf")
+    matches = 0
+    for _ in range(repeat):
+        gc.collect()
+        start_s = time.perf_counter()
+        matches = func()
+        best_s = min(best_s, time.perf_counter() - start_s)
+
+    # tracemalloc slows things down so it's measured separately
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best_s, matches, peak_bytes
+
+
+def run_benchmarks(corpora: Iterable[str], size_mb: float, schemes_mode: str, repeat: int, seed: int) -> None:
+    sublime_plugin.load_plugin_package(PACKAGE_NAME, REPO_DIR)
+    from OpenUri.plugin.settings import get_setting
+    from OpenUri.plugin.shared import global_get
+    from OpenUri.plugin.utils import view_find_all
+
+    # settings are changed frequently, which are logged
+    global_get("logger").disabled = True
+    settings = global_get("settings")
+    detect_schemes = get_setting("detect_schemes")
+    expand_selectors = get_setting("expand_uri_regions_selectors")
+
+    print(f"{'corpus':<14} {'schemes':<22} {'path':<14} {'MB/s':>9} {'matches/s':>12} {'matches':>9} {'peak MB':>8}")
+    for corpus in corpora:
+        text = CORPUS_GENERATORS[corpus](random.Random(seed), int(size_mb * 1024 * 1024))
+        text_mb = len(text.encode("utf-8")) / 1024 / 1024
+
+        view = sublime.active_window().new_file()
+        view.run_command("append", {"characters": text})
+
+        for config_name, config in list_scheme_configs(schemes_mode, detect_schemes).items():
+            # this recompiles the URI regex
+            settings.set("detect_schemes", config)
+            regex_obj = global_get("uri_regex_obj")
+
+            paths: dict[str, Callable[[], int]] = {
+                "regex": lambda: sum(1 for _ in regex_obj.finditer(text)),
+                "view_find_all": lambda: sum(1 for _ in view_find_all(view, regex_obj, expand_selectors)),
+            }
+            for path_name, func in paths.items():
+                seconds, matches, peak_bytes = measure(func, repeat)
+                print(
+                    f"{corpus:<14} {config_name:<22} {path_name:<14} {text_mb / seconds:>9.2f}"
+                    f" {matches / seconds:>12.0f} {matches:>9} {peak_bytes / 1024 / 1024:>8.2f}"
+                )
+
+        view.close()
+        settings.set("detect_schemes", detect_schemes)
+        # discard queued renderings of the closed view
+        sublime.run_timers()
+
+    sublime_plugin.unload_plugin_package(PACKAGE_NAME)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark URI detection over generated corpora.")
+    parser.add_argument("--corpus", nargs="+", choices=tuple(CORPUS_GENERATORS), default=tuple(CORPUS_GENERATORS))
+    parser.add_argument("--size-mb", type=float, default=1, help="the size of each corpus (in MB)")
+    parser.add_argument("--schemes", choices=("default", "each", "all"), default="each")
+    parser.add_argument("--repeat", type=int, default=3, help="the best of these runs is taken")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    run_benchmarks(args.corpus, args.size_mb, args.schemes, args.repeat, args.seed)
+
+
+if __name__ == "__main__":
+    main()
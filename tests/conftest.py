@@ -0,0 +1,28 @@
+"""
+Tests are run with the headless ST runtime in `tests/headless`, where this plugin is loaded once per session.
+
+Usage: python -m pytest tests
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_DIR / "tests/headless"))
+
+import sublime  # noqa: E402
+import sublime_plugin  # noqa: E402
+
+PACKAGE_NAME = "OpenUri"
+
+
+def pytest_sessionstart(session: object) -> None:
+    sublime_plugin.load_plugin_package(PACKAGE_NAME, REPO_DIR)
+    # images are loaded in the background
+    sublime.run_timers()
+
+
+def pytest_sessionfinish(session: object, exitstatus: int) -> None:
+    sublime_plugin.unload_plugin_package(PACKAGE_NAME)
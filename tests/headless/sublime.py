@@ -0,0 +1,1292 @@
+"""
+A headless stand-in for Sublime Text's `sublime` module.
+
+Views, buffers, windows and settings are backed by in-memory objects so that the plugin can be driven
+under plain CPython (>= 3.9), e.g., from pytest or benchmarks. Only the API surface used by this plugin
+(and a bit more) is implemented. Put this directory in front of `sys.path` to use it.
+
+Things that don't exist in a real Sublime Text are grouped at the bottom of this module:
+
+- `add_package_path()` maps `Packages/<name>/` resources to a directory.
+- `run_timers()` runs callbacks queued by `set_timeout()` and `set_timeout_async()`.
+- `reset()` forgets all windows, views, settings and timers.
+
+The text layout is simplified: each char is 1 unit wide and each line is 1 unit high.
+"""
+
+from __future__ import annotations
+
+import html
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator
+from heapq import heappop, heappush
+from pathlib import Path
+from typing import Any
+
+Point = int
+
+HOVER_TEXT = 1
+HOVER_GUTTER = 2
+HOVER_MARGIN = 3
+
+ENCODED_POSITION = 1
+TRANSIENT = 4
+FORCE_GROUP = 8
+SEMI_TRANSIENT = 16
+ADD_TO_SELECTION = 32
+REPLACE_MRU = 64
+CLEAR_TO_RIGHT = 128
+IGNORECASE = 2
+LITERAL = 1
+
+HTML = 1
+COOPERATE_WITH_AUTO_COMPLETE = 2
+HIDE_ON_MOUSE_MOVE = 4
+HIDE_ON_MOUSE_MOVE_AWAY = 8
+KEEP_ON_SELECTION_MODIFIED = 16
+HIDE_ON_CHARACTER_EVENT = 32
+
+DRAW_EMPTY = 1
+HIDE_ON_MINIMAP = 2
+DRAW_EMPTY_AS_OVERWRITE = 4
+PERSISTENT = 16
+DRAW_OUTLINED = 32
+DRAW_NO_FILL = 32
+DRAW_NO_OUTLINE = 256
+DRAW_SOLID_UNDERLINE = 512
+DRAW_STIPPLED_UNDERLINE = 1024
+DRAW_SQUIGGLY_UNDERLINE = 2048
+NO_UNDO = 8192
+HIDDEN = 128
+
+LAYOUT_INLINE = 0
+LAYOUT_BELOW = 1
+LAYOUT_BLOCK = 2
+
+DEFAULT_SCOPE_NAME = "text.plain "
+DEFAULT_STYLE = {"foreground": "#cccccc", "background": "#222222"}
+VIEWPORT_SIZE = (120, 50)
+"""the (width, height) of the viewport of every view"""
+
+
+# -------------- #
+# module-level   #
+# -------------- #
+
+
+def version() -> str:
+    return "4180"
+
+
+def platform() -> str:
+    if sys.platform == "darwin":
+        return "osx"
+    if sys.platform.startswith("win"):
+        return "windows"
+    return "linux"
+
+
+def arch() -> str:
+    return "x64"
+
+
+def channel() -> str:
+    return "stable"
+
+
+def executable_path() -> str:
+    return sys.executable
+
+
+def packages_path() -> str:
+    return str(_DATA_DIR / "Packages")
+
+
+def installed_packages_path() -> str:
+    return str(_DATA_DIR / "Installed Packages")
+
+
+def cache_path() -> str:
+    return str(_DATA_DIR / "Cache")
+
+
+def status_message(msg: str) -> None:
+    _messages.append(("status", msg))
+
+
+def error_message(msg: str) -> None:
+    _messages.append(("error", msg))
+
+
+def message_dialog(msg: str) -> None:
+    _messages.append(("message", msg))
+
+
+def ok_cancel_dialog(msg: str, ok_title: str = "", title: str = "") -> bool:
+    _messages.append(("ok_cancel", msg))
+    return True
+
+
+def run_command(cmd: str, args: dict[str, Any] | None = None) -> None:
+    _dispatch("run_application_command", cmd, args or {})
+
+
+def format_command(cmd: str, args: dict[str, Any] | None = None) -> str:
+    if args is None:
+        return cmd
+    return f"{cmd} {json.dumps(args, ensure_ascii=False, separators=(',', ':'))}"
+
+
+def html_format_command(cmd: str, args: dict[str, Any] | None = None) -> str:
+    return html.escape(format_command(cmd, args), quote=True)
+
+
+def command_url(cmd: str, args: dict[str, Any] | None = None) -> str:
+    return f"subl:{html_format_command(cmd, args)}"
+
+
+def get_clipboard(size_limit: int = 16777216) -> str:
+    return _clipboard[0][:size_limit]
+
+
+def get_clipboard_async(callback: Callable[[str], None], size_limit: int = 16777216) -> None:
+    set_timeout_async(lambda: callback(get_clipboard(size_limit)))
+
+
+def set_clipboard(text: str) -> None:
+    _clipboard[0] = text
+
+
+def score_selector(scope_name: str, selector: str) -> int:
+    """
+    @brief A simplified selector matcher. Each selector in a comma-separated list matches if all its
+           space-separated parts match scopes in the scope name in order. Operators are not supported.
+    """
+    scopes = scope_name.split()
+    best = 0
+    for sub_selector in selector.split(","):
+        if not (parts := sub_selector.split()):
+            continue
+        idx = 0
+        score = 0
+        for part in parts:
+            while idx < len(scopes) and not (scopes[idx] == part or scopes[idx].startswith(f"{part}.")):
+                idx += 1
+            if idx == len(scopes):
+                break
+            score += 1 << (idx * 3) if idx < 20 else 1
+            idx += 1
+        else:
+            best = max(best, score or 1)
+    return best
+
+
+def load_resource(name: str) -> str:
+    return load_binary_resource(name).decode("utf-8")
+
+
+def load_binary_resource(name: str) -> bytes:
+    if not (path := _resource_to_path(name)) or not path.is_file():
+        raise FileNotFoundError(f"resource not found: {name}")
+    return path.read_bytes()
+
+
+def find_resources(pattern: str) -> list[str]:
+    resources: list[str] = []
+    for package_name, package_dir in sorted(_package_paths.items()):
+        for path in sorted(Path(package_dir).rglob(pattern)):
+            if path.is_file():
+                resources.append(f"Packages/{package_name}/{path.relative_to(package_dir).as_posix()}")
+    return resources
+
+
+def encode_value(val: Any, pretty: bool = False) -> str:
+    return json.dumps(val, indent=4 if pretty else None, ensure_ascii=False)
+
+
+def decode_value(data: str) -> Any:
+    """
+    @brief Decode Sublime Text's JSON flavor, which allows comments and trailing commas.
+    """
+    return json.loads(_strip_json_extensions(data))
+
+
+def expand_variables(val: Any, variables: dict[str, str]) -> Any:
+    if isinstance(val, str):
+
+        def replace(m: re.Match) -> str:
+            name = m.group("name") or m.group("name2")
+            default = m.group("default")
+            return variables.get(name, default if default is not None else "")
+
+        return re.sub(r"\$\{(?P<name>\w+)(?::(?P<default>[^}]*))?\}|\$(?P<name2>\w+)", replace, val)
+    if isinstance(val, list):
+        return [expand_variables(item, variables) for item in val]
+    if isinstance(val, dict):
+        return {key: expand_variables(item, variables) for key, item in val.items()}
+    return val
+
+
+def load_settings(base_name: str) -> Settings:
+    if base_name not in _settings_files:
+        settings = _settings_files[base_name] = Settings(next(_ids))
+        for package_name in (*sorted(set(_package_paths) - {"User"}), "User"):
+            if (path := _resource_to_path(f"Packages/{package_name}/{base_name}")) and path.is_file():
+                settings.update(decode_value(path.read_text(encoding="utf-8")))
+    return _settings_files[base_name]
+
+
+def save_settings(base_name: str) -> None:
+    pass
+
+
+def set_timeout(f: Callable[[], Any], timeout_ms: float = 0) -> None:
+    with _timers_lock:
+        heappush(_timers, (time.time() + timeout_ms / 1000, next(_ids), f))
+
+
+def set_timeout_async(f: Callable[[], Any], timeout_ms: float = 0) -> None:
+    # there is only a single thread running timers in headless mode
+    set_timeout(f, timeout_ms)
+
+
+def active_window() -> Window:
+    if not _windows:
+        _new_window()
+    return Window(_active_window_id[0] if _active_window_id[0] in _windows else next(iter(_windows)))
+
+
+def windows() -> list[Window]:
+    return [Window(window_id) for window_id in _windows]
+
+
+# -------------- #
+# classes        #
+# -------------- #
+
+
+class Region:
+    __slots__ = ("a", "b", "xpos")
+
+    def __init__(self, a: int, b: int | None = None, xpos: int = -1) -> None:
+        if b is None:
+            b = a
+        self.a = a
+        self.b = b
+        self.xpos = xpos
+
+    def __iter__(self) -> Iterator[int]:
+        return iter((self.a, self.b))
+
+    def __str__(self) -> str:
+        return f"({self.a}, {self.b})"
+
+    def __repr__(self) -> str:
+        return f"Region({self.a}, {self.b})" if self.xpos == -1 else f"Region({self.a}, {self.b}, xpos={self.xpos})"
+
+    def __len__(self) -> int:
+        return self.size()
+
+    def __eq__(self, rhs: object) -> bool:
+        return isinstance(rhs, Region) and self.a == rhs.a and self.b == rhs.b
+
+    def __lt__(self, rhs: Region) -> bool:
+        lhs_begin, rhs_begin = self.begin(), rhs.begin()
+        return lhs_begin < rhs_begin or (lhs_begin == rhs_begin and self.end() < rhs.end())
+
+    def __contains__(self, v: Region | Point) -> bool:
+        return self.contains(v)
+
+    __hash__ = None  # type: ignore
+
+    def to_tuple(self) -> tuple[Point, Point]:
+        return (self.a, self.b)
+
+    def empty(self) -> bool:
+        return self.a == self.b
+
+    def begin(self) -> int:
+        return min(self.a, self.b)
+
+    def end(self) -> int:
+        return max(self.a, self.b)
+
+    def size(self) -> int:
+        return abs(self.a - self.b)
+
+    def contains(self, x: Region | Point) -> bool:
+        if isinstance(x, Region):
+            return self.begin() <= x.begin() and x.end() <= self.end()
+        return self.begin() <= x <= self.end()
+
+    def cover(self, rhs: Region) -> Region:
+        if self.a > self.b:
+            return Region(max(self.a, rhs.a, rhs.b), min(self.b, rhs.a, rhs.b))
+        return Region(min(self.a, rhs.a, rhs.b), max(self.b, rhs.a, rhs.b))
+
+    def intersection(self, rhs: Region) -> Region:
+        if self.end() <= rhs.begin() or rhs.end() <= self.begin():
+            return Region(0)
+        return Region(max(self.begin(), rhs.begin()), min(self.end(), rhs.end()))
+
+    def intersects(self, rhs: Region) -> bool:
+        lb, le = self.begin(), self.end()
+        rb, re_ = rhs.begin(), rhs.end()
+        return (lb == rb and le == re_) or (lb < rb < le) or (lb < re_ < le) or (rb < lb < re_) or (rb < le < re_)
+
+
+class HistoricPosition:
+    __slots__ = ("pt", "row", "col", "col_utf16", "col_utf8")
+
+    def __init__(self, pt: Point, row: int, col: int, col_u16: int, col_u8: int) -> None:
+        self.pt = pt
+        self.row = row
+        self.col = col
+        self.col_utf16 = col_u16
+        self.col_utf8 = col_u8
+
+    def __repr__(self) -> str:
+        return f"HistoricPosition(pt={self.pt}, row={self.row}, col={self.col})"
+
+
+class TextChange:
+    __slots__ = ("a", "b", "len_utf16", "len_utf8", "str")
+
+    def __init__(self, pa: HistoricPosition, pb: HistoricPosition, s: str) -> None:
+        self.a = pa
+        self.b = pb
+        self.str = s
+        self.len_utf16 = len(s.encode("utf-16-le")) // 2
+        self.len_utf8 = len(s.encode("utf-8"))
+
+    def __repr__(self) -> str:
+        return f"TextChange({self.a!r}, {self.b!r}, {self.str!r})"
+
+
+class Edit:
+    def __init__(self, token: int = 0) -> None:
+        self.edit_token = token
+
+
+class Selection:
+    def __init__(self, view_id: int) -> None:
+        self.view_id = view_id
+        self._regions: list[Region] = [Region(0)]
+
+    def __iter__(self) -> Iterator[Region]:
+        return iter(list(self._regions))
+
+    def __reversed__(self) -> Iterator[Region]:
+        return reversed(list(self._regions))
+
+    def __len__(self) -> int:
+        return len(self._regions)
+
+    def __getitem__(self, index: int) -> Region:
+        return self._regions[index]
+
+    def __delitem__(self, index: int) -> None:
+        del self._regions[index]
+
+    def __eq__(self, rhs: object) -> bool:
+        return isinstance(rhs, Selection) and self._regions == rhs._regions
+
+    def __repr__(self) -> str:
+        return f"Selection({self._regions!r})"
+
+    def is_valid(self) -> bool:
+        return self.view_id in _views
+
+    def clear(self) -> None:
+        self._regions = []
+
+    def add(self, x: Region | Point) -> None:
+        self.add_all((x,))
+
+    def add_all(self, regions: Iterable[Region | Point]) -> None:
+        merged: list[Region] = []
+        for region in sorted((*self._regions, *(_to_region(x) for x in regions))):
+            if merged and region.begin() <= merged[-1].end() and not (region.empty() and merged[-1].empty()):
+                merged[-1] = Region(merged[-1].begin(), max(merged[-1].end(), region.end()))
+            elif not (merged and region == merged[-1]):
+                merged.append(region)
+        self._regions = merged
+
+    def subtract(self, region: Region) -> None:
+        self._regions = [r for r in self._regions if not region.contains(r)]
+
+    def contains(self, region: Region) -> bool:
+        return any(r.contains(region) for r in self._regions)
+
+
+class Settings:
+    def __init__(self, settings_id: int) -> None:
+        self.settings_id = settings_id
+        self._data: dict[str, Any] = {}
+        self._on_change_callbacks: dict[str, Callable[[], None]] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._data:
+            raise KeyError(key)
+        return self._data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.erase(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def __repr__(self) -> str:
+        return f"Settings({self.settings_id!r})"
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+
+    def has(self, key: str) -> bool:
+        return key in self._data
+
+    def setdefault(self, key: str, value: Any) -> Any:
+        if key not in self._data:
+            self.set(key, value)
+        return self._data[key]
+
+    def update(self, other: Any = (), /, **kwargs: Any) -> None:
+        self._data.update(other, **kwargs)
+        self._notify()
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        self._notify()
+
+    def erase(self, key: str) -> None:
+        if self._data.pop(key, None) is not None:
+            self._notify()
+
+    def add_on_change(self, tag: str, callback: Callable[[], None]) -> None:
+        self._on_change_callbacks[tag] = callback
+
+    def clear_on_change(self, tag: str) -> None:
+        self._on_change_callbacks.pop(tag, None)
+
+    def _notify(self) -> None:
+        for callback in tuple(self._on_change_callbacks.values()):
+            callback()
+
+
+class Phantom:
+    def __init__(
+        self,
+        region: Region,
+        content: str,
+        layout: int,
+        on_navigate: Callable[[str], Any] | None = None,
+    ) -> None:
+        self.region = region
+        self.content = content
+        self.layout = layout
+        self.on_navigate = on_navigate
+        self.id = -1
+
+    def __eq__(self, rhs: object) -> bool:
+        # note that self.id is not considered
+        return (
+            isinstance(rhs, Phantom)
+            and self.region == rhs.region
+            and self.content == rhs.content
+            and self.layout == rhs.layout
+            and self.on_navigate == rhs.on_navigate
+        )
+
+    def __repr__(self) -> str:
+        return f"Phantom({self.region!r}, {self.content!r}, {self.layout!r}, on_navigate={self.on_navigate!r})"
+
+    def to_tuple(self) -> tuple[tuple[int, int], str, int, Callable[[str], Any] | None]:
+        return (self.region.to_tuple(), self.content, self.layout, self.on_navigate)
+
+
+class PhantomSet:
+    """The same algorithm as the real one, whose update is O(n^2)."""
+
+    def __init__(self, view: View, key: str = "") -> None:
+        self.view = view
+        self.key = key
+        self.phantoms: list[Phantom] = []
+
+    def __del__(self) -> None:
+        for phantom in self.phantoms:
+            self.view.erase_phantom_by_id(phantom.id)
+
+    def __repr__(self) -> str:
+        return f"PhantomSet({self.view!r}, key={self.key!r})"
+
+    def update(self, new_phantoms: Iterable[Phantom]) -> None:
+        new_phantoms = list(new_phantoms)
+        regions = self.view.query_phantoms([phantom.id for phantom in self.phantoms])
+        for phantom, region in zip(self.phantoms, regions):
+            phantom.region = region
+
+        for phantom in new_phantoms:
+            try:
+                phantom.id = self.phantoms[self.phantoms.index(phantom)].id
+            except ValueError:
+                phantom.id = self.view.add_phantom(
+                    self.key, phantom.region, phantom.content, phantom.layout, phantom.on_navigate
+                )
+
+        for phantom in self.phantoms:
+            # a region of -1 means the phantom has been deleted
+            if phantom not in new_phantoms and phantom.region != Region(-1):
+                self.view.erase_phantom_by_id(phantom.id)
+
+        self.phantoms = new_phantoms
+
+
+class Sheet:
+    def __init__(self, sheet_id: int) -> None:
+        self.sheet_id = sheet_id
+
+    def __eq__(self, rhs: object) -> bool:
+        return isinstance(rhs, Sheet) and self.sheet_id == rhs.sheet_id
+
+    def __hash__(self) -> int:
+        return self.sheet_id
+
+    def id(self) -> int:
+        return self.sheet_id
+
+    def view(self) -> View | None:
+        return next((View(view_id) for view_id, data in _views.items() if data.sheet_id == self.sheet_id), None)
+
+    def window(self) -> Window | None:
+        return view.window() if (view := self.view()) else None
+
+    def is_transient(self) -> bool:
+        return bool((view := self.view()) and _views[view.view_id].is_transient)
+
+    def is_semi_transient(self) -> bool:
+        return False
+
+
+class Buffer:
+    def __init__(self, buffer_id: int) -> None:
+        self.buffer_id = buffer_id
+
+    def __eq__(self, rhs: object) -> bool:
+        return isinstance(rhs, Buffer) and self.buffer_id == rhs.buffer_id
+
+    def __hash__(self) -> int:
+        return self.buffer_id
+
+    def __bool__(self) -> bool:
+        return self.buffer_id in _buffers
+
+    def __repr__(self) -> str:
+        return f"Buffer({self.buffer_id!r})"
+
+    def id(self) -> int:
+        return self.buffer_id
+
+    def file_name(self) -> str | None:
+        return _buffers[self.buffer_id].file_name if self else None
+
+    def views(self) -> list[View]:
+        return [View(view_id) for view_id in _buffers[self.buffer_id].view_ids] if self else []
+
+    def primary_view(self) -> View:
+        return View(_buffers[self.buffer_id].view_ids[0])
+
+
+class View:
+    def __init__(self, view_id: int) -> None:
+        self.view_id = view_id
+
+    def __len__(self) -> int:
+        return self.size()
+
+    def __eq__(self, rhs: object) -> bool:
+        return isinstance(rhs, View) and self.view_id == rhs.view_id
+
+    def __hash__(self) -> int:
+        return self.view_id
+
+    def __bool__(self) -> bool:
+        return self.view_id != 0
+
+    def __repr__(self) -> str:
+        return f"View({self.view_id!r})"
+
+    @property
+    def _data(self) -> _ViewData:
+        return _views[self.view_id]
+
+    @property
+    def _buffer(self) -> _BufferData:
+        return _buffers[self._data.buffer_id]
+
+    def id(self) -> int:
+        return self.view_id
+
+    def buffer_id(self) -> int:
+        return self._data.buffer_id if self.is_valid() else 0
+
+    def buffer(self) -> Buffer:
+        return Buffer(self.buffer_id())
+
+    def sheet_id(self) -> int:
+        return self._data.sheet_id
+
+    def sheet(self) -> Sheet | None:
+        return Sheet(self._data.sheet_id) if self.is_valid() else None
+
+    def element(self) -> str | None:
+        return None
+
+    def is_valid(self) -> bool:
+        return self.view_id in _views
+
+    def is_primary(self) -> bool:
+        return self._buffer.view_ids[0] == self.view_id
+
+    def is_loading(self) -> bool:
+        return False
+
+    def is_dirty(self) -> bool:
+        return self._buffer.change_count != self._buffer.saved_change_count
+
+    def is_read_only(self) -> bool:
+        return self._data.is_read_only
+
+    def set_read_only(self, read_only: bool) -> None:
+        self._data.is_read_only = read_only
+
+    def is_scratch(self) -> bool:
+        return self._data.is_scratch
+
+    def set_scratch(self, scratch: bool) -> None:
+        self._data.is_scratch = scratch
+
+    def file_name(self) -> str | None:
+        return self._buffer.file_name
+
+    def name(self) -> str:
+        return self._data.name
+
+    def set_name(self, name: str) -> None:
+        self._data.name = name
+
+    def set_status(self, key: str, value: str) -> None:
+        self._data.statuses[key] = value
+
+    def get_status(self, key: str) -> str:
+        return self._data.statuses.get(key, "")
+
+    def erase_status(self, key: str) -> None:
+        self._data.statuses.pop(key, None)
+
+    def window(self) -> Window | None:
+        return next((Window(wid) for wid, data in _windows.items() if self.view_id in data.view_ids), None)
+
+    def clones(self) -> list[View]:
+        return [View(view_id) for view_id in self._buffer.view_ids if view_id != self.view_id]
+
+    def close(self) -> bool:
+        if not self.is_valid():
+            return False
+        _dispatch("on_pre_close", self)
+        for window_data in _windows.values():
+            if self.view_id in window_data.view_ids:
+                window_data.view_ids.remove(self.view_id)
+        buffer = self._buffer
+        buffer.view_ids.remove(self.view_id)
+        del _views[self.view_id]
+        _dispatch("on_close", self)
+        if not buffer.view_ids:
+            del _buffers[buffer.buffer_id]
+        return True
+
+    def settings(self) -> Settings:
+        return self._data.settings
+
+    def size(self) -> int:
+        return len(self._buffer.text)
+
+    def substr(self, x: Region | Point) -> str:
+        text = self._buffer.text
+        if isinstance(x, Region):
+            return text[max(0, x.begin()) : x.end()]
+        return text[x] if 0 <= x < len(text) else "\x00"
+
+    def change_count(self) -> int:
+        return self._buffer.change_count
+
+    def change_id(self) -> tuple[int, int, int]:
+        return (self._buffer.buffer_id, self._buffer.change_count, 0)
+
+    def insert(self, edit: Edit, pt: Point, text: str) -> int:
+        self._buffer.replace(pt, pt, text)
+        return len(text)
+
+    def erase(self, edit: Edit, region: Region) -> None:
+        self._buffer.replace(region.begin(), region.end(), "")
+
+    def replace(self, edit: Edit, region: Region, text: str) -> None:
+        self._buffer.replace(region.begin(), region.end(), text)
+
+    def run_command(self, cmd: str, args: dict[str, Any] | None = None) -> None:
+        args = args or {}
+        if cmd == "append":
+            self.insert(Edit(), self.size(), args.get("characters", ""))
+        elif cmd == "insert":
+            for region in reversed(self.sel()):
+                self.replace(Edit(), region, args.get("characters", ""))
+        elif cmd == "select_all":
+            self.sel().clear()
+            self.sel().add(Region(0, self.size()))
+        else:
+            _dispatch("run_text_command", self, cmd, args)
+
+    def sel(self) -> Selection:
+        return self._data.selection
+
+    def rowcol(self, tp: Point) -> tuple[int, int]:
+        line_begins = self._buffer.get_line_begins()
+        row = bisect_right(line_begins, tp) - 1
+        return (row, tp - line_begins[row])
+
+    def rowcol_utf8(self, tp: Point) -> tuple[int, int]:
+        row, col = self.rowcol(tp)
+        return (row, len(self.substr(Region(tp - col, tp)).encode("utf-8")))
+
+    def rowcol_utf16(self, tp: Point) -> tuple[int, int]:
+        row, col = self.rowcol(tp)
+        return (row, len(self.substr(Region(tp - col, tp)).encode("utf-16-le")) // 2)
+
+    def text_point(self, row: int, col: int, *, clamp_column: bool = False) -> Point:
+        line_begins = self._buffer.get_line_begins()
+        if row < 0:
+            return 0
+        if row >= len(line_begins):
+            return self.size()
+        point = line_begins[row] + col
+        if clamp_column:
+            point = min(point, self.line(line_begins[row]).end())
+        return max(0, min(self.size(), point))
+
+    def line(self, x: Region | Point) -> Region:
+        region = _to_region(x)
+        text = self._buffer.text
+        begin = text.rfind("\n", 0, region.begin()) + 1
+        end = text.find("\n", region.end())
+        return Region(begin, len(text) if end < 0 else end)
+
+    def full_line(self, x: Region | Point) -> Region:
+        line = self.line(x)
+        return Region(line.a, min(self.size(), line.b + 1))
+
+    def lines(self, region: Region) -> list[Region]:
+        lines: list[Region] = []
+        point = region.begin()
+        while True:
+            lines.append(line := self.line(point))
+            if line.end() >= region.end():
+                return lines
+            point = line.end() + 1
+
+    def split_by_newlines(self, region: Region) -> list[Region]:
+        return [Region(max(line.a, region.begin()), min(line.b, region.end())) for line in self.lines(region)]
+
+    def find(self, pattern: str, start_pt: Point, flags: int = 0) -> Region:
+        if m := _compile_pattern(pattern, flags).search(self._buffer.text, start_pt):
+            return Region(*m.span())
+        return Region(-1)
+
+    def find_all(self, pattern: str, flags: int = 0, fmt: str | None = None, extractions: list | None = None) -> list:
+        regex_obj = _compile_pattern(pattern, flags)
+        regions: list[Region] = []
+        for m in regex_obj.finditer(self._buffer.text):
+            regions.append(Region(*m.span()))
+            if fmt is not None and extractions is not None:
+                extractions.append(m.expand(fmt))
+        return regions
+
+    def scope_name(self, pt: Point) -> str:
+        return DEFAULT_SCOPE_NAME
+
+    def match_selector(self, pt: Point, selector: str) -> bool:
+        return score_selector(self.scope_name(pt), selector) > 0
+
+    def score_selector(self, pt: Point, selector: str) -> int:
+        return score_selector(self.scope_name(pt), selector)
+
+    def expand_to_scope(self, pt: Point, selector: str) -> Region | None:
+        # there is no syntax so the whole buffer is of the same scope
+        return Region(0, self.size()) if self.match_selector(pt, selector) else None
+
+    def style(self) -> dict[str, str]:
+        return dict(DEFAULT_STYLE)
+
+    def style_for_scope(self, scope: str) -> dict[str, Any]:
+        return {"source_line": 0, "source_column": 0, "source_file": "", **DEFAULT_STYLE}
+
+    def syntax(self) -> None:
+        return None
+
+    def assign_syntax(self, syntax: Any) -> None:
+        pass
+
+    def visible_region(self) -> Region:
+        first_row = self._data.viewport_row
+        return Region(
+            self.text_point(first_row, 0),
+            self.line(self.text_point(first_row + VIEWPORT_SIZE[1] - 1, 0)).end(),
+        )
+
+    def show(self, x: Region | Point, show_surrounds: bool = True, keep_to_left: bool = False) -> None:
+        row, _ = self.rowcol(_to_region(x).begin())
+        first_row = self._data.viewport_row
+        if not first_row <= row < first_row + VIEWPORT_SIZE[1]:
+            self._data.viewport_row = max(0, row - VIEWPORT_SIZE[1] // 2 if show_surrounds else row)
+
+    def show_at_center(self, x: Region | Point) -> None:
+        row, _ = self.rowcol(_to_region(x).begin())
+        self._data.viewport_row = max(0, row - VIEWPORT_SIZE[1] // 2)
+
+    def viewport_position(self) -> tuple[float, float]:
+        return (0.0, float(self._data.viewport_row))
+
+    def set_viewport_position(self, xy: tuple[float, float], animate: bool = True) -> None:
+        self._data.viewport_row = max(0, int(xy[1]))
+
+    def viewport_extent(self) -> tuple[float, float]:
+        return (float(VIEWPORT_SIZE[0]), float(VIEWPORT_SIZE[1]))
+
+    def layout_extent(self) -> tuple[float, float]:
+        return (float(VIEWPORT_SIZE[0]), float(len(self._buffer.get_line_begins())))
+
+    def text_to_layout(self, tp: Point) -> tuple[float, float]:
+        row, col = self.rowcol(tp)
+        return (float(col), float(row))
+
+    def layout_to_text(self, vector: tuple[float, float]) -> Point:
+        return self.text_point(int(vector[1]), int(vector[0]), clamp_column=True)
+
+    def text_to_window(self, tp: Point) -> tuple[float, float]:
+        x, y = self.text_to_layout(tp)
+        return (x, y - self._data.viewport_row)
+
+    def window_to_text(self, vector: tuple[float, float]) -> Point:
+        return self.layout_to_text((vector[0], vector[1] + self._data.viewport_row))
+
+    def line_height(self) -> float:
+        return 1.0
+
+    def em_width(self) -> float:
+        return 1.0
+
+    def add_regions(
+        self,
+        key: str,
+        regions: Iterable[Region],
+        scope: str = "",
+        icon: str = "",
+        flags: int = 0,
+        annotations: list[str] | None = None,
+        annotation_color: str = "",
+        on_navigate: Callable[[str], None] | None = None,
+        on_close: Callable[[], None] | None = None,
+    ) -> None:
+        self._buffer.regions[key] = [Region(*region) for region in regions]
+
+    def get_regions(self, key: str) -> list[Region]:
+        return [Region(*region) for region in self._buffer.regions.get(key, [])]
+
+    def erase_regions(self, key: str) -> None:
+        self._buffer.regions.pop(key, None)
+
+    def add_phantom(
+        self,
+        key: str,
+        region: Region,
+        content: str,
+        layout: int,
+        on_navigate: Callable[[str], Any] | None = None,
+    ) -> int:
+        phantom_id = next(_ids)
+        self._data.phantoms[phantom_id] = (key, Region(region.a, region.b), content, layout, on_navigate)
+        return phantom_id
+
+    def erase_phantoms(self, key: str) -> None:
+        for phantom_id, phantom in tuple(self._data.phantoms.items()):
+            if phantom[0] == key:
+                del self._data.phantoms[phantom_id]
+
+    def erase_phantom_by_id(self, pid: int) -> None:
+        if self.is_valid():
+            self._data.phantoms.pop(pid, None)
+
+    def query_phantom(self, pid: int) -> list[tuple[int, int]]:
+        return [region.to_tuple() for region in self.query_phantoms([pid])]
+
+    def query_phantoms(self, pids: list[int]) -> list[Region]:
+        phantoms = self._data.phantoms
+        return [Region(*phantoms[pid][1]) if pid in phantoms else Region(-1) for pid in pids]
+
+    def show_popup(
+        self,
+        content: str,
+        flags: int = 0,
+        location: Point = -1,
+        max_width: int = 320,
+        max_height: int = 240,
+        on_navigate: Callable[[str], Any] | None = None,
+        on_hide: Callable[[], Any] | None = None,
+    ) -> None:
+        if location < 0:
+            location = self.sel()[0].b if len(self.sel()) else 0
+        self._data.popup = {"content": content, "flags": flags, "location": location, "on_navigate": on_navigate}
+
+    def update_popup(self, content: str) -> None:
+        if self._data.popup:
+            self._data.popup["content"] = content
+
+    def is_popup_visible(self) -> bool:
+        return self._data.popup is not None
+
+    def hide_popup(self) -> None:
+        self._data.popup = None
+
+
+class Window:
+    def __init__(self, window_id: int) -> None:
+        self.window_id = window_id
+
+    def __eq__(self, rhs: object) -> bool:
+        return isinstance(rhs, Window) and self.window_id == rhs.window_id
+
+    def __hash__(self) -> int:
+        return self.window_id
+
+    def __bool__(self) -> bool:
+        return self.window_id != 0
+
+    def __repr__(self) -> str:
+        return f"Window({self.window_id!r})"
+
+    @property
+    def _data(self) -> _WindowData:
+        return _windows[self.window_id]
+
+    def id(self) -> int:
+        return self.window_id
+
+    def is_valid(self) -> bool:
+        return self.window_id in _windows
+
+    def settings(self) -> Settings:
+        return self._data.settings
+
+    def num_groups(self) -> int:
+        return 1
+
+    def active_group(self) -> int:
+        return 0
+
+    def active_view(self) -> View | None:
+        return View(self._data.active_view_id) if self._data.active_view_id in _views else None
+
+    def active_view_in_group(self, group: int) -> View | None:
+        return self.active_view() if group == 0 else None
+
+    def active_sheet(self) -> Sheet | None:
+        return view.sheet() if (view := self.active_view()) else None
+
+    def views(self, *, include_transient: bool = False) -> list[View]:
+        return [
+            View(view_id) for view_id in self._data.view_ids if include_transient or not _views[view_id].is_transient
+        ]
+
+    def views_in_group(self, group: int) -> list[View]:
+        return self.views() if group == 0 else []
+
+    def focus_view(self, view: View) -> None:
+        if view.view_id not in self._data.view_ids or self._data.active_view_id == view.view_id:
+            return
+        if previous_view := self.active_view():
+            _dispatch("on_deactivated", previous_view)
+        self._data.active_view_id = view.view_id
+        _active_window_id[0] = self.window_id
+        _dispatch("on_activated", view)
+
+    def new_file(self, flags: int = 0, syntax: str = "") -> View:
+        view = self._new_view(_new_buffer(), is_transient=bool(flags & TRANSIENT))
+        _dispatch("on_new", view)
+        self.focus_view(view)
+        return view
+
+    def open_file(self, fname: str, flags: int = 0, group: int = -1) -> View:
+        path = os.path.abspath(fname)
+        for view in self.views(include_transient=True):
+            if view.file_name() == path:
+                self.focus_view(view)
+                return view
+        buffer = _new_buffer(Path(path).read_text(encoding="utf-8"), path)
+        view = self._new_view(buffer, is_transient=bool(flags & TRANSIENT))
+        _dispatch("on_load", view)
+        self.focus_view(view)
+        return view
+
+    def clone_view(self, view: View) -> View:
+        clone = self._new_view(_buffers[view.buffer_id()])
+        _dispatch("on_clone", clone)
+        self.focus_view(clone)
+        return clone
+
+    def extract_variables(self) -> dict[str, str]:
+        variables = {"packages": packages_path(), "platform": platform().capitalize()}
+        if (view := self.active_view()) and (file_name := view.file_name()):
+            path = Path(file_name)
+            variables.update(
+                file=str(path),
+                file_path=str(path.parent),
+                file_name=path.name,
+                file_base_name=path.stem,
+                file_extension=path.suffix.lstrip("."),
+            )
+        return variables
+
+    def run_command(self, cmd: str, args: dict[str, Any] | None = None) -> None:
+        _dispatch("run_window_command", self, cmd, args or {})
+
+    def status_message(self, msg: str) -> None:
+        status_message(msg)
+
+    def _new_view(self, buffer: _BufferData, is_transient: bool = False) -> View:
+        view_id = next(_ids)
+        _views[view_id] = _ViewData(view_id, buffer.buffer_id, is_transient)
+        buffer.view_ids.append(view_id)
+        self._data.view_ids.append(view_id)
+        if len(buffer.view_ids) == 1:
+            _dispatch("on_new_buffer", Buffer(buffer.buffer_id))
+        return View(view_id)
+
+
+# -------------- #
+# internal data  #
+# -------------- #
+
+
+class _BufferData:
+    def __init__(self, buffer_id: int, text: str = "", file_name: str | None = None) -> None:
+        self.buffer_id = buffer_id
+        self.text = text
+        self.file_name = file_name
+        self.change_count = 0
+        self.saved_change_count = 0
+        self.view_ids: list[int] = []
+        self.regions: dict[str, list[Region]] = {}
+        self._line_begins: list[int] | None = None
+
+    def get_line_begins(self) -> list[int]:
+        if self._line_begins is None:
+            self._line_begins = [0, *(m.end() for m in re.finditer("\n", self.text))]
+        return self._line_begins
+
+    def replace(self, begin: int, end: int, new_text: str) -> None:
+        """Replace `[begin, end)` with `new_text` and notify listeners."""
+        if not self.view_ids:
+            return
+        primary_view = View(self.view_ids[0])
+        pos_a = self._historic_position(primary_view, begin)
+        pos_b = self._historic_position(primary_view, end)
+
+        self.text = self.text[:begin] + new_text + self.text[end:]
+        self.change_count += 1
+        self._line_begins = None
+
+        def shift(point: int) -> int:
+            if point < begin:
+                return point
+            if point >= end:
+                return point + len(new_text) - (end - begin)
+            return begin + len(new_text)
+
+        def shift_region(region: Region) -> Region:
+            return Region(shift(region.a), shift(region.b))
+
+        for key, regions in self.regions.items():
+            self.regions[key] = [shift_region(region) for region in regions]
+        for view_id in self.view_ids:
+            view_data = _views[view_id]
+            for phantom_id, (key, region, *rest) in tuple(view_data.phantoms.items()):
+                view_data.phantoms[phantom_id] = (key, shift_region(region), *rest)  # type: ignore
+            selection = view_data.selection
+            regions = [shift_region(region) for region in selection]
+            selection.clear()
+            selection.add_all(regions)
+
+        _dispatch("on_text_changed", Buffer(self.buffer_id), [TextChange(pos_a, pos_b, new_text)])
+        for view_id in tuple(self.view_ids):
+            _dispatch("on_modified", View(view_id))
+
+    @staticmethod
+    def _historic_position(view: View, point: int) -> HistoricPosition:
+        row, col = view.rowcol(point)
+        return HistoricPosition(point, row, col, view.rowcol_utf16(point)[1], view.rowcol_utf8(point)[1])
+
+
+class _ViewData:
+    def __init__(self, view_id: int, buffer_id: int, is_transient: bool = False) -> None:
+        self.view_id = view_id
+        self.buffer_id = buffer_id
+        self.sheet_id = next(_ids)
+        self.is_transient = is_transient
+        self.is_read_only = False
+        self.is_scratch = False
+        self.name = ""
+        self.settings = Settings(next(_ids))
+        self.selection = Selection(view_id)
+        self.phantoms: dict[int, tuple[str, Region, str, int, Callable[[str], Any] | None]] = {}
+        self.popup: dict[str, Any] | None = None
+        self.statuses: dict[str, str] = {}
+        self.viewport_row = 0
+
+
+class _WindowData:
+    def __init__(self, window_id: int) -> None:
+        self.window_id = window_id
+        self.settings = Settings(next(_ids))
+        self.view_ids: list[int] = []
+        self.active_view_id = 0
+
+
+_DATA_DIR = Path(tempfile.gettempdir()) / "sublime-headless"
+
+_ids = itertools.count(1)
+_timers: list[tuple[float, int, Callable[[], Any]]] = []
+_timers_lock = threading.Lock()
+_windows: dict[int, _WindowData] = {}
+_active_window_id = [0]
+_views: dict[int, _ViewData] = {}
+_buffers: dict[int, _BufferData] = {}
+_settings_files: dict[str, Settings] = {}
+_package_paths: dict[str, str] = {}
+_clipboard = [""]
+_messages: list[tuple[str, str]] = []
+
+
+def _new_window() -> Window:
+    window_id = next(_ids)
+    _windows[window_id] = _WindowData(window_id)
+    _active_window_id[0] = _active_window_id[0] or window_id
+    return Window(window_id)
+
+
+def _new_buffer(text: str = "", file_name: str | None = None) -> _BufferData:
+    buffer_id = next(_ids)
+    buffer = _buffers[buffer_id] = _BufferData(buffer_id, text, file_name)
+    return buffer
+
+
+def _to_region(x: Region | Point) -> Region:
+    return Region(x.a, x.b) if isinstance(x, Region) else Region(x)
+
+
+def _compile_pattern(pattern: str, flags: int) -> re.Pattern:
+    if flags & LITERAL:
+        pattern = re.escape(pattern)
+    return re.compile(pattern, re.IGNORECASE if flags & IGNORECASE else 0)
+
+
+def _resource_to_path(name: str) -> Path | None:
+    parts = name.split("/", 2)
+    if len(parts) != 3 or parts[0] != "Packages":
+        return None
+    if (package_dir := _package_paths.get(parts[1])) is None:
+        package_dir = os.path.join(packages_path(), parts[1])
+    return Path(package_dir, parts[2])
+
+
+def _strip_json_extensions(data: str) -> str:
+    """Remove comments and trailing commas from JSON."""
+    tokens = re.finditer(r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*.*?\*/|,(?=\s*[}\]])', data, re.DOTALL)
+    pieces: list[str] = []
+    last = 0
+    for m in tokens:
+        if m.group().startswith('"'):
+            continue
+        pieces.append(data[last : m.start()])
+        last = m.end()
+    pieces.append(data[last:])
+    return "".join(pieces)
+
+
+def _dispatch(event: str, *args: Any) -> None:
+    # events are handled by "sublime_plugin" if it has been imported
+    if sublime_plugin := sys.modules.get("sublime_plugin"):
+        sublime_plugin._on_event(event, *args)
+
+
+# -------------- #
+# headless only  #
+# -------------- #
+
+
+def add_package_path(package_name: str, package_dir: str | os.PathLike) -> None:
+    """
+    @brief Map resources of `Packages/<package_name>/` to the directory.
+
+    @param package_name The package name
+    @param package_dir  The package directory
+    """
+    _package_paths[package_name] = str(package_dir)
+
+
+def run_timers(timeout_s: float = 0) -> int:
+    """
+    @brief Run callbacks queued by `set_timeout()` and `set_timeout_async()` in the current thread.
+
+    @param timeout_s Also wait for and run callbacks which will be due within this period (in second)
+
+    @return The amount of callbacks which have been run.
+    """
+    deadline_s = time.time() + timeout_s
+    count = 0
+    while True:
+        with _timers_lock:
+            if not _timers or _timers[0][0] > deadline_s:
+                return count
+            due_s, _, callback = heappop(_timers)
+
+        if (wait_s := due_s - time.time()) > 0:
+            time.sleep(wait_s)
+        callback()
+        count += 1
+
+
+def reset() -> None:
+    """
+    @brief Forget all windows, views, buffers, settings, timers and messages.
+    """
+    with _timers_lock:
+        _timers.clear()
+    _windows.clear()
+    _views.clear()
+    _buffers.clear()
+    _settings_files.clear()
+    _active_window_id[0] = 0
+    _clipboard[0] = ""
+    _messages.clear()
@@ -0,0 +1,350 @@
+"""
+A headless stand-in for Sublime Text's `sublime_plugin` module. See the companion `sublime` module.
+
+Listener and command classes are registered when they are defined. Events are dispatched by the `sublime`
+module, and `*_async` callbacks are queued to `sublime.set_timeout_async()`, which run by `sublime.run_timers()`.
+
+Things that don't exist in a real Sublime Text are grouped at the bottom of this module:
+
+- `load_plugin_package()` imports a plugin package like Sublime Text does and calls its `plugin_loaded()`.
+- `unload_plugin_package()` calls `plugin_unloaded()` and forgets the plugin package.
+- `dispatch()` triggers an event manually, such as `on_hover`.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import types
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+import sublime
+
+
+class Command:
+    def name(self) -> str:
+        class_name = self.__class__.__name__
+        name = "".join(f"_{char.lower()}" if char.isupper() else char for char in class_name).lstrip("_")
+        return name[: -len("_command")] if name.endswith("_command") else name
+
+    def is_enabled_(self, args: dict[str, Any]) -> bool:
+        return self._call_with_args(self.is_enabled, args)
+
+    def is_enabled(self) -> bool:
+        return True
+
+    def is_visible_(self, args: dict[str, Any]) -> bool:
+        return self._call_with_args(self.is_visible, args)
+
+    def is_visible(self) -> bool:
+        return True
+
+    def is_checked_(self, args: dict[str, Any]) -> bool:
+        return self._call_with_args(self.is_checked, args)
+
+    def is_checked(self) -> bool:
+        return False
+
+    def description_(self, args: dict[str, Any]) -> str:
+        return self._call_with_args(self.description, args)
+
+    def description(self) -> str:
+        return ""
+
+    def filter_args(self, args: dict[str, Any]) -> dict[str, Any]:
+        if "event" in args and not self.want_event():
+            args = {key: value for key, value in args.items() if key != "event"}
+        return args
+
+    def want_event(self) -> bool:
+        return False
+
+    def input(self, args: dict[str, Any]) -> None:
+        return None
+
+    def _call_with_args(self, method: Callable[..., Any], args: dict[str, Any]) -> Any:
+        try:
+            return method(**self.filter_args(args))
+        except TypeError:
+            return method()
+
+
+class ApplicationCommand(Command):
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        _register(cls)
+
+    def run_(self, edit_token: int, args: dict[str, Any]) -> None:
+        if self.is_enabled_(args):
+            self.run(**self.filter_args(args))
+
+    def run(self, **kwargs: Any) -> None:
+        pass
+
+
+class WindowCommand(Command):
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        _register(cls)
+
+    def __init__(self, window: sublime.Window) -> None:
+        self.window = window
+
+    def run_(self, edit_token: int, args: dict[str, Any]) -> None:
+        if self.is_enabled_(args):
+            self.run(**self.filter_args(args))
+
+    def run(self, **kwargs: Any) -> None:
+        pass
+
+
+class TextCommand(Command):
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        _register(cls)
+
+    def __init__(self, view: sublime.View) -> None:
+        self.view = view
+
+    def run_(self, edit_token: int, args: dict[str, Any]) -> None:
+        if self.is_enabled_(args):
+            self.run(sublime.Edit(edit_token), **self.filter_args(args))
+
+    def run(self, edit: sublime.Edit, **kwargs: Any) -> None:
+        pass
+
+
+class EventListener:
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        _register(cls)
+
+
+class ViewEventListener:
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        _register(cls)
+
+    @classmethod
+    def is_applicable(cls, settings: sublime.Settings) -> bool:
+        return True
+
+    @classmethod
+    def applies_to_primary_view_only(cls) -> bool:
+        return True
+
+    def __init__(self, view: sublime.View) -> None:
+        self.view = view
+
+
+class TextChangeListener:
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        _register(cls)
+
+    @classmethod
+    def is_applicable(cls, buffer: sublime.Buffer) -> bool:
+        return False
+
+    def __init__(self) -> None:
+        self.buffer: sublime.Buffer | None = None
+
+    def attach(self, buffer: sublime.Buffer) -> None:
+        if self.buffer:
+            raise ValueError("already attached to a buffer")
+        self.buffer = buffer
+        _text_change_listeners.setdefault(buffer.id(), []).append(self)
+
+    def detach(self) -> None:
+        if not self.buffer:
+            raise ValueError("not attached to a buffer")
+        listeners = _text_change_listeners.get(self.buffer.id(), [])
+        if self in listeners:
+            listeners.remove(self)
+        self.buffer = None
+
+    def is_attached(self) -> bool:
+        return self.buffer is not None
+
+
+# -------------- #
+# internal       #
+# -------------- #
+
+_classes: dict[tuple[str, str], type] = {
+    # (module name, class name): class,
+}
+_event_listeners: dict[type, EventListener] = {}
+_view_event_listeners: dict[int, list[ViewEventListener]] = {}
+_text_change_listeners: dict[int, list[TextChangeListener]] = {}
+
+
+def _register(cls: type) -> None:
+    _classes[(cls.__module__, cls.__qualname__)] = cls
+
+
+def _iter_classes(base: type) -> list[type]:
+    return [cls for cls in _classes.values() if issubclass(cls, base)]
+
+
+def _find_command_class(base: type, cmd: str) -> type | None:
+    for cls in _iter_classes(base):
+        if Command.name(cls.__new__(cls)) == cmd:
+            return cls
+    return None
+
+
+def _get_view_event_listeners(view: sublime.View) -> list[ViewEventListener]:
+    if (listeners := _view_event_listeners.get(view.id())) is None:
+        listeners = _view_event_listeners[view.id()] = _new_view_event_listeners(view, _iter_classes(ViewEventListener))
+    return listeners
+
+
+def _new_view_event_listeners(view: sublime.View, classes: list[type]) -> list[ViewEventListener]:
+    return [
+        cls(view)
+        for cls in classes
+        if cls.is_applicable(view.settings()) and (view.is_primary() or not cls.applies_to_primary_view_only())
+    ]
+
+
+def _get_event_listeners() -> list[EventListener]:
+    for cls in _iter_classes(EventListener):
+        if cls not in _event_listeners:
+            _event_listeners[cls] = cls()
+    return list(_event_listeners.values())
+
+
+def _attach_text_change_listeners(buffer: sublime.Buffer) -> None:
+    for cls in _iter_classes(TextChangeListener):
+        if cls.is_applicable(buffer):
+            cls().attach(buffer)
+
+
+def _call(obj: object, method_name: str, *args: Any, view: sublime.View | None = None) -> None:
+    if method := getattr(obj, method_name, None):
+        method(*args)
+    if method := getattr(obj, f"{method_name}_async", None):
+        sublime.set_timeout_async(partial(_call_async, method, args, view))
+
+
+def _call_async(method: Callable[..., Any], args: tuple[Any, ...], view: sublime.View | None) -> None:
+    # the view may have been closed before this is called
+    if view is None or view.is_valid():
+        method(*args)
+
+
+def _on_event(event: str, *args: Any) -> None:
+    """Handle an event from the `sublime` module."""
+    if event == "on_new_buffer":
+        _attach_text_change_listeners(args[0])
+    elif event == "on_text_changed":
+        buffer, changes = args
+        for text_change_listener in tuple(_text_change_listeners.get(buffer.id(), [])):
+            _call(text_change_listener, "on_text_changed", changes)
+    elif event == "run_text_command":
+        view, cmd, cmd_args = args
+        if cls := _find_command_class(TextCommand, cmd):
+            cls(view).run_(0, cmd_args)
+    elif event == "run_window_command":
+        window, cmd, cmd_args = args
+        if cls := _find_command_class(WindowCommand, cmd):
+            cls(window).run_(0, cmd_args)
+    elif event == "run_application_command":
+        cmd, cmd_args = args
+        if cls := _find_command_class(ApplicationCommand, cmd):
+            cls().run_(0, cmd_args)
+    else:
+        view, *event_args = args
+        for view_event_listener in _get_view_event_listeners(view):
+            _call(view_event_listener, event, *event_args, view=view)
+        for event_listener in _get_event_listeners():
+            _call(event_listener, event, view, *event_args, view=view)
+
+        if event == "on_close":
+            _view_event_listeners.pop(view.id(), None)
+            for buffer_id in tuple(_text_change_listeners):
+                if not sublime.Buffer(buffer_id):
+                    del _text_change_listeners[buffer_id]
+
+
+# -------------- #
+# headless only  #
+# -------------- #
+
+
+def dispatch(event: str, view: sublime.View, *args: Any) -> None:
+    """
+    @brief Trigger a view event, whose `*_async` callbacks will be queued as well.
+
+    @param event The event name, such as `"on_hover"`
+    @param view  The view
+    @param args  Extra arguments of the event, such as `(point, sublime.HOVER_TEXT)` for `"on_hover"`
+    """
+    _on_event(event, view, *args)
+
+
+def load_plugin_package(package_name: str, package_dir: str | os.PathLike, entry_module: str = "boot") -> Any:
+    """
+    @brief Import the entry module of a plugin package and call its `plugin_loaded()`.
+
+    @param package_name The package name
+    @param package_dir  The package directory
+    @param entry_module The name of the module which should be imported
+
+    @return The imported entry module.
+    """
+    sublime.add_package_path(package_name, package_dir)
+
+    package = types.ModuleType(package_name)
+    package.__path__ = [str(package_dir)]
+    package.__package__ = package_name
+    sys.modules[package_name] = package
+
+    old_classes = set(_classes.values())
+    module = importlib.import_module(f"{package_name}.{entry_module}")
+    new_classes = [cls for cls in _iter_classes(ViewEventListener) if cls not in old_classes]
+
+    views = [view for window in sublime.windows() for view in window.views(include_transient=True)]
+    for buffer in {view.buffer() for view in views}:
+        _attach_text_change_listeners(buffer)
+    # like Sublime Text, view event listeners are created for views which have been opened
+    for view in views:
+        if (listeners := _view_event_listeners.get(view.id())) is None:
+            _get_view_event_listeners(view)
+        else:
+            listeners.extend(_new_view_event_listeners(view, new_classes))
+    if plugin_loaded := getattr(module, "plugin_loaded", None):
+        plugin_loaded()
+    return module
+
+
+def unload_plugin_package(package_name: str, entry_module: str = "boot") -> None:
+    """
+    @brief Call `plugin_unloaded()` of a plugin package and forget everything from it.
+
+    @param package_name The package name
+    @param entry_module The name of the module which has been imported
+    """
+    module = sys.modules.get(f"{package_name}.{entry_module}")
+    if plugin_unloaded := getattr(module, "plugin_unloaded", None):
+        plugin_unloaded()
+
+    def is_from_package(obj: object) -> bool:
+        module_name = obj.__class__.__module__ if not isinstance(obj, type) else obj.__module__
+        return module_name == package_name or module_name.startswith(f"{package_name}.")
+
+    for key, cls in tuple(_classes.items()):
+        if is_from_package(cls):
+            del _classes[key]
+    for cls in tuple(_event_listeners):
+        if is_from_package(cls):
+            del _event_listeners[cls]
+    for listeners in (*_view_event_listeners.values(), *_text_change_listeners.values()):
+        listeners[:] = [listener for listener in listeners if not is_from_package(listener)]
+    for module_name in tuple(sys.modules):
+        if module_name == package_name or module_name.startswith(f"{package_name}."):
+            del sys.modules[module_name]
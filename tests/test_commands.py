@@ -0,0 +1,67 @@
+"""
+Tests of commands.
+
+Usage: python -m pytest tests/test_commands.py
+"""
+
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+import sublime
+
+TEXT = "see https://example.com/a here"
+
+
+class TestContextMenuLookup(unittest.TestCase):
+    def setUp(self) -> None:
+        self.views: list[sublime.View] = []
+
+    def tearDown(self) -> None:
+        for view in self.views:
+            view.close()
+
+    def new_view(self) -> sublime.View:
+        view = sublime.active_window().new_file()
+        view.run_command("append", {"characters": TEXT})
+        self.views.append(view)
+        return view
+
+    def build_menu(self, view: sublime.View) -> int:
+        """Build the context menu at the URI and return how many times URIs are looked up."""
+        from OpenUri.plugin.commands.copy_uri import CopyUriFromContextMenuCommand
+        from OpenUri.plugin.helpers import find_uri_regions_by_regions
+
+        command = CopyUriFromContextMenuCommand(view)
+        event = {"x": float(TEXT.index("https")), "y": 0.0}
+        with mock.patch(
+            "OpenUri.plugin.commands.abstract.find_uri_regions_by_regions",
+            wraps=find_uri_regions_by_regions,
+        ) as find_uri_regions:
+            # ST asks several times for the same event while building a menu
+            self.assertTrue(command.is_visible(event))
+            self.assertEqual(command.description(event), "Copy https://example.com/a")
+        return find_uri_regions.call_count
+
+    def test_lookup_is_memoized(self) -> None:
+        from OpenUri.plugin.shared import global_get
+
+        view = self.new_view()
+        self.assertEqual(self.build_menu(view), 1)
+        self.assertEqual(self.build_menu(view), 0)
+
+        # the view is modified
+        view.run_command("append", {"characters": " https://example.com/b"})
+        self.assertEqual(self.build_menu(view), 1)
+        self.assertEqual(self.build_menu(view), 0)
+
+        # settings are reloaded
+        settings = global_get("settings")
+        settings.set("uri_search_radius", settings.get("uri_search_radius"))
+        sublime.run_timers()
+        self.assertEqual(self.build_menu(view), 1)
+        self.assertEqual(self.build_menu(view), 0)
+
+        # another view at the same point
+        self.assertEqual(self.build_menu(self.new_view()), 1)
@@ -0,0 +1,203 @@
+"""
+Differential tests of `UriDetector`.
+URI regions which are detected chunk by chunk must be the same as what the regex finds in the whole text at once.
+
+Usage: python -m pytest tests/test_detector.py
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import sublime
+
+URI_CHARS = "abc/.,:;!?-_=&#%()[]"
+TEXT_CHARS = "abc de\n.,:("
+
+
+def generate_text(rng: random.Random, size: int, max_uri_length: int, separator: str = " ") -> str:
+    """
+    @brief Generate text with URIs which have lots of trailing punctuations and brackets.
+
+    @param rng            The random number generator
+    @param size           The min size of the text
+    @param max_uri_length The max length of a URI's path
+    @param separator      The separator between URIs and other words
+
+    @return The text
+    """
+    parts: list[str] = []
+    length = 0
+    while length < size:
+        if rng.random() < 0.3:
+            part = "https://example.com/" + "".join(rng.choices(URI_CHARS, k=rng.randint(0, max_uri_length)))
+        else:
+            part = "".join(rng.choices(TEXT_CHARS, k=rng.randint(1, 50)))
+        parts.append(part)
+        length += len(part) + len(separator)
+    return separator.join(parts)
+
+
+class TestUriDetector(unittest.TestCase):
+    def setUp(self) -> None:
+        from OpenUri.plugin.shared import global_get
+
+        self.regex_obj = global_get("uri_regex_obj")
+        self.views: list[sublime.View] = []
+
+    def tearDown(self) -> None:
+        for view in self.views:
+            view.close()
+
+    def new_view(self, text: str) -> sublime.View:
+        view = sublime.active_window().new_file()
+        view.run_command("append", {"characters": text})
+        self.views.append(view)
+        return view
+
+    def find_all(self, view: sublime.View) -> list[tuple[int, int]]:
+        return [m.span() for m in self.regex_obj.finditer(view.substr(sublime.Region(0, view.size())))]
+
+    def detect(self, view: sublime.View, chunk_size: int, **kwargs) -> list[tuple[int, int]]:
+        from OpenUri.plugin.detector import UriDetectorsManager
+
+        detector = UriDetectorsManager.get_detector(view.buffer_id())
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100, chunk_size=chunk_size, **kwargs))
+        return list(detector.uri_regions)
+
+    def test_uri_across_chunk_boundary(self) -> None:
+        # the unclosed bracket makes the regex backtrack far before the boundary of a truncated text
+        uri = "https://example.com/" + "a" * 50 + "(" + "b" * 300 + ")."
+        view = self.new_view("x " * 475 + uri + " tail")
+        self.assertEqual(self.detect(view, 1000), [(950, 950 + len(uri) - 1)])
+
+    def test_chunked_scan(self) -> None:
+        rng = random.Random(0)
+        for separator in (" ", ""):
+            for chunk_size in (500, 2000):
+                for _ in range(30):
+                    view = self.new_view(generate_text(rng, 20000, 3000, separator))
+                    self.assertEqual(self.detect(view, chunk_size), self.find_all(view))
+
+    def test_chunked_scan_with_executor(self) -> None:
+        rng = random.Random(1)
+        with ThreadPoolExecutor(2) as executor:
+            for _ in range(30):
+                view = self.new_view(generate_text(rng, 20000, 1000))
+                self.assertEqual(
+                    self.detect(view, 1000, executor=executor, parallel_chunks=3),
+                    self.find_all(view),
+                )
+
+    def test_text_regions_are_clamped(self) -> None:
+        from OpenUri.plugin.detector import UriDetector
+
+        texts: list[str] = []
+
+        class RecordingExecutor(ThreadPoolExecutor):
+            def submit(self, fn, /, *args, **kwargs):
+                texts.append(args[1])
+                return super().submit(fn, *args, **kwargs)
+
+        view = self.new_view("word " * 20000)
+        with RecordingExecutor(1) as executor:
+            for region in ((0, 300), (50000, 51500)):
+                list(UriDetector.scan_region(view, self.regex_obj, (), region, 1000, 100, 0, executor, 4))
+
+        # the small region is scanned in the current thread and texts don't go beyond the region + overlap
+        self.assertEqual([len(text) for text in texts], [1000 + 100 * 2, 500 + 100 * 2])
+
+    def test_incremental_detection(self) -> None:
+        rng = random.Random(2)
+        view = self.new_view(generate_text(rng, 20000, 500))
+        self.assertEqual(self.detect(view, 2000), self.find_all(view))
+
+        for _ in range(100):
+            # changes are replayed on known regions by the text change listener
+            for _ in range(rng.randint(1, 3)):
+                begin = rng.randint(0, view.size())
+                end = min(view.size(), begin + rng.choice((0, 0, 1, 5, 50)))
+                text = rng.choice(("", " ", ".", "(", ")", "https://", "www.", "example.com/a", "\n"))
+                view.sel().clear()
+                view.sel().add(sublime.Region(begin, end))
+                view.run_command("insert", {"characters": text})
+            self.assertEqual(self.detect(view, 2000), self.find_all(view))
+
+    def edit(self, view: sublime.View, point: int, text: str) -> list[sublime.TextChange]:
+        position = sublime.HistoricPosition(point, 0, point, point, point)
+        view.sel().clear()
+        view.sel().add(sublime.Region(point, point))
+        view.run_command("insert", {"characters": text})
+        return [sublime.TextChange(position, position, text)]
+
+    def test_multi_cursor_changes(self) -> None:
+        from OpenUri.plugin.detector import UNORDERED_CHANGES_MAX, UriDetector
+
+        rng = random.Random(4)
+        view = self.new_view(generate_text(rng, 200000, 500))
+        detector = UriDetector()
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100))
+
+        for order, text in (("descending", "x"), ("ascending", " https://example.com "), ("unordered", "")):
+            points = sorted(rng.sample(range(view.size()), UNORDERED_CHANGES_MAX * 20))
+            changes: list[sublime.TextChange] = []
+            if order == "descending":
+                for point in reversed(points):
+                    changes += self.edit(view, point, text)
+            elif order == "ascending":
+                for i, point in enumerate(points):
+                    changes += self.edit(view, point + i * len(text), text)
+            else:
+                rng.shuffle(points)
+                for point in points:
+                    changes += self.edit(view, point, text)
+            # a keystroke with many cursors is reported as a single batch
+            detector.push_changes(changes, view.change_count())
+
+            self.assertTrue(detector.detect(view, self.regex_obj, margin=100, region=(0, 0)))
+            # too many unordered changes are not replayed
+            self.assertEqual(bool(detector.scanned_regions), order != "unordered")
+            self.assertTrue(detector.detect(view, self.regex_obj, margin=100))
+            self.assertEqual(detector.uri_regions, self.find_all(view))
+
+    def test_changes_reported_late(self) -> None:
+        from OpenUri.plugin.detector import UriDetector
+
+        edit = self.edit
+
+        view = self.new_view(generate_text(random.Random(3), 20000, 500))
+        detector = UriDetector()
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100))
+
+        # reported before the detection
+        changes = edit(view, 1000, "https://example.com ")
+        detector.push_changes(changes, view.change_count())
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100, region=(0, 0)))
+        self.assertTrue(detector.scanned_regions)
+
+        # reported soon after the detection begins, which waits for it
+        changes = edit(view, 2000, "https://example.com ")
+        threading.Timer(0.02, detector.push_changes, (changes, view.change_count())).start()
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100, region=(0, 0)))
+        self.assertTrue(detector.scanned_regions)
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100))
+        self.assertEqual(detector.uri_regions, self.find_all(view))
+
+        # reported after the detection has adopted the buffer, which must not be replayed again
+        changes = edit(view, 3000, "https://example.com ")
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100))
+        detector.push_changes(changes, view.change_count())
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100))
+        self.assertEqual(detector.uri_regions, self.find_all(view))
+
+        # two batches reported with the same change count and the detection runs between them
+        changes = edit(view, 1050, "https://example.com/a ")
+        late_changes = edit(view, 1100, "https://example.com/b ")
+        detector.push_changes(changes, view.change_count())
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100, region=(0, 0)))
+        detector.push_changes(late_changes, view.change_count())
+        self.assertTrue(detector.detect(view, self.regex_obj, margin=100))
+        self.assertEqual(detector.uri_regions, self.find_all(view))
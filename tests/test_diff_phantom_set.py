@@ -0,0 +1,54 @@
+"""
+Tests of `DiffPhantomSet`.
+
+Usage: python -m pytest tests/test_diff_phantom_set.py
+"""
+
+from __future__ import annotations
+
+import unittest
+
+import sublime
+
+
+class TestDiffPhantomSet(unittest.TestCase):
+    def setUp(self) -> None:
+        from OpenUri.plugin.ui.diff_phantom_set import DiffPhantomSet
+
+        self.view = sublime.active_window().new_file()
+        self.view.run_command("append", {"characters": "".join(f"see https://example.com/{i}\n" for i in range(10))})
+        self.phantom_set = DiffPhantomSet(self.view, "test")
+        self.built_regions: list[tuple[int, int]] = []
+
+    def tearDown(self) -> None:
+        del self.phantom_set
+        self.view.close()
+
+    def new_phantom(self, region: sublime.Region) -> sublime.Phantom:
+        self.built_regions.append(region.to_tuple())
+        return sublime.Phantom(sublime.Region(region.end()), self.view.substr(region), sublime.LAYOUT_INLINE)
+
+    def rendered_contents(self) -> list[str]:
+        return sorted(content for _, _, content, *_ in self.view._data.phantoms.values())
+
+    def update(self, regions: list[sublime.Region], context: object) -> list[tuple[int, int]]:
+        self.built_regions = []
+        self.phantom_set.update_by_regions(regions, self.new_phantom, context)
+        self.assertEqual(self.rendered_contents(), sorted(map(self.view.substr, regions)))
+        self.assertEqual(len(self.phantom_set), len(regions))
+        return self.built_regions
+
+    def test_update_by_regions(self) -> None:
+        regions = self.view.find_all(r"https://\S+")
+
+        self.assertEqual(self.update(regions[:5], 1), [r.to_tuple() for r in regions[:5]])
+        # only added regions are built
+        self.assertEqual(self.update(regions[2:8], 1), [r.to_tuple() for r in regions[5:8]])
+        self.assertEqual(self.update(regions[3:4], 1), [])
+        # everything is built with a new context
+        self.assertEqual(self.update(regions, 2), [r.to_tuple() for r in regions])
+
+        self.view.run_command("append", {"characters": "https://example.com/new"})
+        regions = self.view.find_all(r"https://\S+")
+        self.assertEqual(self.update(regions, 3), [r.to_tuple() for r in regions])
+        self.assertEqual(self.update([], 3), [])
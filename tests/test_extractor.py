@@ -0,0 +1,125 @@
+"""
+Tests of extracting URIs.
+
+Usage: python -m pytest tests/test_extractor.py
+"""
+
+from __future__ import annotations
+
+import tempfile
+import unittest
+from collections.abc import Generator
+from pathlib import Path
+from unittest import mock
+
+import sublime
+
+
+def iter_uris_then_fail(*args, **kwargs) -> Generator[tuple[int, list[str]], None, None]:
+    yield 0, ["https://example.com/partial"]
+    raise RuntimeError("The view has been modified during extracting URIs.")
+
+
+def run_rescheduled_timers() -> int:
+    # callbacks which are scheduled by callbacks are not run in the same round
+    count = 0
+    while callbacks := sublime.run_timers():
+        count += callbacks
+    return count
+
+
+class TestExtractUris(unittest.TestCase):
+    def setUp(self) -> None:
+        self.view = sublime.active_window().new_file()
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.view.close()
+        self.temp_dir.cleanup()
+
+    def extract_uris(self, *args, **kwargs) -> None:
+        from OpenUri.plugin.extractor import extract_uris
+
+        extract_uris(self.view, *args, **kwargs)
+        run_rescheduled_timers()
+
+    def test_clipboard(self) -> None:
+        from OpenUri.plugin.extractor import ClipboardUriWriter
+
+        sublime.set_clipboard("old")
+        self.extract_uris(ClipboardUriWriter())
+        self.assertEqual(sublime.get_clipboard(), "old")
+
+        with mock.patch("OpenUri.plugin.extractor.iter_uris_by_chunks", iter_uris_then_fail):
+            self.extract_uris(ClipboardUriWriter())
+        self.assertEqual(sublime.get_clipboard(), "old")
+
+        self.view.run_command("append", {"characters": "see https://example.com/a and https://example.com/b"})
+        self.extract_uris(ClipboardUriWriter())
+        self.assertEqual(sublime.get_clipboard(), "https://example.com/a\nhttps://example.com/b")
+
+    def test_file(self) -> None:
+        from OpenUri.plugin.extractor import FileUriWriter
+
+        path = Path(self.temp_dir.name) / "uris.txt"
+        path.write_text("old", encoding="utf-8")
+
+        with mock.patch("OpenUri.plugin.extractor.iter_uris_by_chunks", iter_uris_then_fail):
+            self.extract_uris(FileUriWriter(path))
+        self.assertEqual(path.read_text(encoding="utf-8"), "old")
+
+        self.view.run_command("append", {"characters": "see https://example.com/a"})
+        self.extract_uris(FileUriWriter(path))
+        self.assertEqual(path.read_text(encoding="utf-8"), "https://example.com/a")
+        # no temporary file is left
+        self.assertEqual([p.name for p in Path(self.temp_dir.name).iterdir()], ["uris.txt"])
+
+    def test_chunk_by_chunk(self) -> None:
+        from OpenUri.plugin.extractor import ClipboardUriWriter, extract_uris
+        from OpenUri.plugin.settings import get_settings_snapshot
+
+        chunk_size = get_settings_snapshot().detection_chunk_size
+        self.view.run_command("append", {"characters": f"https://example.com/a {'x ' * chunk_size}https://b.com"})
+        sublime.run_timers()
+
+        sublime.set_clipboard("old")
+        extract_uris(self.view, ClipboardUriWriter())
+        # the rest chunks are scanned in later callbacks
+        self.assertEqual(sublime.get_clipboard(), "old")
+        self.assertGreater(run_rescheduled_timers(), 1)
+        self.assertEqual(sublime.get_clipboard(), "https://example.com/a\nhttps://b.com")
+
+
+class TestCopyUriFromViewCommand(unittest.TestCase):
+    def setUp(self) -> None:
+        self.view = sublime.active_window().new_file()
+        self.view.run_command("append", {"characters": "https://example.com/b https://example.com/a"})
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "uris.txt"
+
+    def tearDown(self) -> None:
+        self.view.close()
+        self.temp_dir.cleanup()
+
+    def test_file_is_streamed_by_default(self) -> None:
+        self.view.run_command("copy_uri_from_view", {"output": "file", "output_path": str(self.path)})
+        run_rescheduled_timers()
+        self.assertEqual(self.path.read_text(encoding="utf-8"), "https://example.com/b\nhttps://example.com/a")
+
+        self.view.run_command("copy_uri_from_view", {"output": "file", "output_path": str(self.path), "sort": True})
+        run_rescheduled_timers()
+        self.assertEqual(self.path.read_text(encoding="utf-8"), "https://example.com/a\nhttps://example.com/b")
+
+    def test_output_path_is_asked(self) -> None:
+        with mock.patch.object(sublime.Window, "folders", return_value=[], create=True), mock.patch.object(
+            sublime.Window, "show_input_panel", create=True
+        ) as show_input_panel:
+            self.view.run_command("copy_uri_from_view", {"output": "file"})
+
+        (_, initial_text, on_done, *_), _ = show_input_panel.call_args
+        self.assertEqual(initial_text, str(Path.home() / "untitled.uris.txt"))
+
+        # the callback is called after the command returns
+        on_done(str(self.path))
+        run_rescheduled_timers()
+        self.assertEqual(self.path.read_text(encoding="utf-8"), "https://example.com/b\nhttps://example.com/a")
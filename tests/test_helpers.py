@@ -0,0 +1,47 @@
+"""
+Tests of helpers.
+
+Usage: python -m pytest tests/test_helpers.py
+"""
+
+from __future__ import annotations
+
+import unittest
+
+import sublime
+
+
+class TestFindUriRegionsByRegions(unittest.TestCase):
+    def test_detected_and_scanned_results_agree(self) -> None:
+        from OpenUri.plugin.detector import UriDetectorsManager
+        from OpenUri.plugin.helpers import find_uri_regions_by_regions
+        from OpenUri.plugin.settings import get_settings_snapshot
+        from OpenUri.plugin.shared import global_get
+
+        settings = global_get("settings")
+        selectors = settings.get("expand_uri_regions_selectors")
+        view = sublime.active_window().new_file()
+        view.run_command("append", {"characters": "".join(f"see https://example.com/{i} here\n" for i in range(100))})
+        cursors = [(point, point) for point in range(0, view.size(), 97)]
+
+        try:
+            # the headless view is all of "text.plain"
+            for expand_selectors in ([], ["text.plain"]):
+                settings.set("expand_uri_regions_selectors", expand_selectors)
+                sublime.run_timers()
+                snapshot = get_settings_snapshot()
+
+                # scanned by the regex since nothing has been detected
+                UriDetectorsManager.delete_detector(view.buffer_id())
+                scanned = find_uri_regions_by_regions(view, cursors)
+
+                detector = UriDetectorsManager.get_detector(view.buffer_id())
+                detector.detect(view, global_get("uri_regex_obj"), snapshot.expand_uri_regions_selectors)
+                detected = find_uri_regions_by_regions(view, cursors)
+
+                self.assertTrue(detected)
+                self.assertEqual(scanned, detected)
+        finally:
+            settings.set("expand_uri_regions_selectors", selectors)
+            sublime.run_timers()
+            view.close()
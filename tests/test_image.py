@@ -0,0 +1,125 @@
+"""
+Tests of images.
+
+Usage: python -m pytest tests/test_image.py
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+import zlib
+from pathlib import Path
+from unittest import mock
+
+import sublime
+
+
+class TestColoredImagesManager(unittest.TestCase):
+    def tearDown(self) -> None:
+        from OpenUri.plugin.ui.image import clear_image_caches
+
+        clear_image_caches()
+
+    def test_undecodable_image(self) -> None:
+        from OpenUri.plugin.libs import png
+        from OpenUri.plugin.ui.image import ColoredImagesManager
+
+        for error in (zlib.error("broken"), png.FormatError("broken"), RuntimeError("unexpected")):
+            with mock.patch("OpenUri.plugin.ui.image.get_colored_image_src_by_color", side_effect=error) as mocked:
+                rgba_code = "#12345678"
+                self.assertEqual(ColoredImagesManager.get_ready_color("phantom", rgba_code), "")
+                try:
+                    sublime.run_timers()
+                except RuntimeError:
+                    pass
+                self.assertEqual(mocked.call_args_list.count(mock.call("phantom", rgba_code)), 1)
+                self.assertFalse(ColoredImagesManager._pending)
+
+                # the original image is used and it's not prepared again
+                self.assertEqual(ColoredImagesManager.get_ready_color("phantom", rgba_code), "")
+                sublime.run_timers()
+                self.assertEqual(mocked.call_args_list.count(mock.call("phantom", rgba_code)), 1)
+
+            ColoredImagesManager.clear()
+
+    def test_undecodable_image_file(self) -> None:
+        from OpenUri.plugin import _init_images, get_image_info
+        from OpenUri.plugin.shared import global_get
+        from OpenUri.plugin.ui.image import ColoredImagesManager
+
+        def get_broken_image_info(img_name: str) -> dict:
+            return {**get_image_info(img_name), "bytes": b"\x89PNG\r\n\x1a\nbroken"}
+
+        try:
+            with mock.patch("OpenUri.plugin.get_image_info", get_broken_image_info):
+                _init_images()
+            sublime.run_timers()
+
+            # images are still loaded and the original ones are used since they can't be colored
+            self.assertEqual(global_get("images.phantom.bytes"), b"\x89PNG\r\n\x1a\nbroken")
+            self.assertEqual(ColoredImagesManager.get_ready_color("phantom", "#12345678"), "")
+            sublime.run_timers()
+            self.assertIn(("phantom", "#12345678"), ColoredImagesManager._failed)
+        finally:
+            _init_images()
+            sublime.run_timers()
+
+
+class TestImageCaches(unittest.TestCase):
+    def test_scope_colors_are_bounded(self) -> None:
+        from OpenUri.plugin.ui.image import SCOPE_COLOR_CACHE, ScopeColorResolver
+
+        view = sublime.active_window().new_file()
+        resolver = ScopeColorResolver(view)
+        for i in range(SCOPE_COLOR_CACHE.max_items + 100):
+            resolver.resolve_scope(f"scope.{i}")
+        view.close()
+
+        self.assertEqual(len(SCOPE_COLOR_CACHE), SCOPE_COLOR_CACHE.max_items)
+        self.assertIn(f"scope.{SCOPE_COLOR_CACHE.max_items + 99}", ScopeColorResolver.list_seen_scopes())
+        self.assertNotIn("scope.0", ScopeColorResolver.list_seen_scopes())
+
+    def test_scope_colors_of_changed_color_scheme(self) -> None:
+        from OpenUri.plugin.ui.image import SCOPE_COLOR_CACHE, ScopeColorResolver
+        from OpenUri.plugin.ui.image_prewarmer import ImagePrewarmer
+
+        view = sublime.active_window().new_file()
+        view.settings().set("color_scheme", "Old.sublime-color-scheme")
+        sublime.run_timers()
+        old_resolver = ScopeColorResolver(view)
+        old_resolver.resolve_scope("string")
+        ImagePrewarmer._color_schemes.add(old_resolver.color_scheme)
+
+        # the same color scheme setting with different styles, such as "auto" following the OS theme
+        with mock.patch.object(sublime.View, "style", return_value={"background": "#000000"}):
+            self.assertNotEqual(ScopeColorResolver(view).color_scheme, old_resolver.color_scheme)
+
+        view.settings().set("color_scheme", "New.sublime-color-scheme")
+        sublime.run_timers()
+        view.close()
+
+        self.assertNotIn(old_resolver.color_scheme, {color_scheme for color_scheme, _ in SCOPE_COLOR_CACHE.keys()})
+        self.assertNotIn(old_resolver.color_scheme, ImagePrewarmer._color_schemes)
+
+    def test_prune_colored_image_cache_dir(self) -> None:
+        from OpenUri.plugin.ui.image import prune_colored_image_cache_dir
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir) / "v2"
+            outdated_dir = Path(temp_dir) / "v1"
+            for directory in (cache_dir, outdated_dir):
+                directory.mkdir()
+            (outdated_dir / "outdated.png").write_bytes(b"0" * 10)
+            for i in range(5):
+                path = cache_dir / f"{i}.png"
+                path.write_bytes(b"0" * 10)
+                os.utime(path, (i, i))
+            (cache_dir / "partial.tmp").write_bytes(b"0")
+
+            with mock.patch("OpenUri.plugin.ui.image.get_colored_image_cache_dir", return_value=cache_dir):
+                prune_colored_image_cache_dir(30)
+
+            self.assertFalse(outdated_dir.exists())
+            self.assertEqual(sorted(path.name for path in cache_dir.iterdir()), ["2.png", "3.png", "4.png"])
@@ -0,0 +1,64 @@
+"""
+Tests of `UriLauncher`.
+
+Usage: python -m pytest tests/test_launcher.py
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+
+class StubBrowser:
+    """Records opened URIs. Opening blocks until it's allowed and "https://broken.com" fails."""
+
+    def __init__(self, last_uri: str) -> None:
+        self.last_uri = last_uri
+        self.opened: list[str] = []
+        self.is_allowed = threading.Event()
+        self.is_done = threading.Event()
+
+    def open(self, uri: str, autoraise: bool = True) -> bool:
+        self.is_allowed.wait(5)
+        if uri == "https://broken.com":
+            raise RuntimeError("The browser is broken.")
+        self.opened.append(uri)
+        if uri == self.last_uri:
+            self.is_done.set()
+        return True
+
+
+class TestUriLauncher(unittest.TestCase):
+    def tearDown(self) -> None:
+        from OpenUri.plugin.launcher import UriLauncher
+
+        UriLauncher.clear()
+
+    def test_open(self) -> None:
+        from OpenUri.plugin.launcher import UriLauncher
+
+        uris = ["https://a.com", "https://broken.com", "https://b.com", "https://a.com", "https://c.com"]
+        browser = StubBrowser(uris[-1])
+        settings = SimpleNamespace(browser_concurrency=1, browser_rate_limit=0)
+
+        UriLauncher.clear()
+        with mock.patch("OpenUri.plugin.launcher.webbrowser.get", return_value=browser) as get_browser, mock.patch(
+            "OpenUri.plugin.launcher.get_settings_snapshot", return_value=settings
+        ):
+            # the UI thread doesn't wait for the browser, which is blocked now
+            begin_s = time.perf_counter()
+            for uri in uris:
+                UriLauncher.open(uri)
+            self.assertLess(time.perf_counter() - begin_s, 1)
+
+            browser.is_allowed.set()
+            self.assertTrue(browser.is_done.wait(5))
+
+        # in the queued order, where the URI being opened isn't queued again and a failure doesn't stop others
+        self.assertEqual(browser.opened, ["https://a.com", "https://b.com", "https://c.com"])
+        # the controller is cached
+        get_browser.assert_called_once_with(None)
@@ -0,0 +1,119 @@
+"""
+Tests of the PNG codec, which must decode images the same as `png.Reader`.
+
+Usage: python -m pytest tests/test_png_codec.py
+"""
+
+from __future__ import annotations
+
+import io
+import random
+import struct
+import unittest
+import zlib
+from unittest import mock
+
+
+def write_png(width: int, height: int, rows: list[list[int]], **kwargs) -> bytes:
+    from OpenUri.plugin.libs import png
+
+    buffer = io.BytesIO()
+    png.Writer(width, height, **kwargs).write(buffer, rows)
+    return buffer.getvalue()
+
+
+def write_filtered_png(
+    width: int, height: int, color_type: int, planes: int, samples: bytes, rng: random.Random
+) -> bytes:
+    """Write an 8-bit image whose scanlines are filtered by random filter types, which `png.Writer` never does."""
+    from OpenUri.plugin.png_codec import PNG_SIGNATURE, _pack_chunk
+
+    def paeth(a: int, b: int, c: int) -> int:
+        p = a + b - c
+        pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+        return a if pa <= pb and pa <= pc else b if pb <= pc else c
+
+    stride = width * planes
+    data = bytearray()
+    prev_line = bytes(stride)
+    for y in range(height):
+        line = samples[y * stride : (y + 1) * stride]
+        filter_type = rng.randrange(5)
+        data.append(filter_type)
+        for i, x in enumerate(line):
+            a = line[i - planes] if i >= planes else 0
+            b = prev_line[i]
+            c = prev_line[i - planes] if i >= planes else 0
+            predictor = (0, a, b, (a + b) >> 1, paeth(a, b, c))[filter_type]
+            data.append((x - predictor) & 0xFF)
+        prev_line = line
+
+    return b"".join((
+        PNG_SIGNATURE,
+        _pack_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)),
+        _pack_chunk(b"IDAT", zlib.compress(bytes(data))),
+        _pack_chunk(b"IEND", b""),
+    ))
+
+
+class TestPngCodec(unittest.TestCase):
+    def assert_same_as_reader(self, img_bytes: bytes) -> None:
+        from OpenUri.plugin.libs import png
+        from OpenUri.plugin.png_codec import decode_png_to_rgba8
+
+        w, h, rows, _ = png.Reader(bytes=img_bytes).asRGBA8()
+        self.assertEqual(decode_png_to_rgba8(img_bytes), (w, h, b"".join(map(bytes, rows))))
+
+    def test_round_trip(self) -> None:
+        from OpenUri.plugin.png_codec import decode_png_to_rgba8, encode_rgba8_to_png
+
+        rng = random.Random(0)
+        for width, height in ((1, 1), (7, 3), (16, 16)):
+            pixels = bytes(rng.randrange(256) for _ in range(width * height * 4))
+            img_bytes = encode_rgba8_to_png(width, height, pixels)
+            self.assertEqual(decode_png_to_rgba8(img_bytes), (width, height, pixels))
+            self.assert_same_as_reader(img_bytes)
+
+    def test_same_as_reader(self) -> None:
+        rng = random.Random(1)
+        width, height = 9, 5
+
+        def random_rows(planes: int, max_value: int = 255) -> list[list[int]]:
+            return [[rng.randint(0, max_value) for _ in range(width * planes)] for _ in range(height)]
+
+        palette = [(rng.randrange(256), rng.randrange(256), rng.randrange(256)) for _ in range(6)]
+        palette_with_alpha = [(*color, rng.randrange(256)) for color in palette[:3]] + palette[3:]
+        for img_bytes in (
+            write_png(width, height, random_rows(4), greyscale=False, alpha=True),
+            write_png(width, height, random_rows(3), greyscale=False),
+            write_png(width, height, random_rows(1), greyscale=True),
+            write_png(width, height, random_rows(2), greyscale=True, alpha=True),
+            write_png(width, height, random_rows(1, len(palette) - 1), palette=palette),
+            write_png(width, height, random_rows(1, len(palette) - 1), palette=palette_with_alpha),
+            # not decoded by the fast path
+            write_png(width, height, random_rows(4, 65535), greyscale=False, alpha=True, bitdepth=16),
+            write_png(width, height, random_rows(1, 3), greyscale=True, bitdepth=2),
+            write_png(width, height, random_rows(3), greyscale=False, interlace=True),
+        ):
+            self.assert_same_as_reader(img_bytes)
+
+        # all filter types
+        for color_type, planes in ((0, 1), (2, 3), (4, 2), (6, 4)):
+            samples = bytes(rng.randrange(256) for _ in range(width * height * planes))
+            self.assert_same_as_reader(write_filtered_png(width, height, color_type, planes, samples, rng))
+
+    def test_fallback_to_reader(self) -> None:
+        from OpenUri.plugin.libs import png
+        from OpenUri.plugin.png_codec import _decode_simple_png, decode_png_to_rgba8
+
+        rows = [[0, 1, 2, 3] * 2, [3, 2, 1, 0] * 2]
+        img_bytes = write_png(8, 2, rows, greyscale=True, bitdepth=2)
+        self.assertIsNone(_decode_simple_png(img_bytes))
+
+        with mock.patch.object(png, "Reader", wraps=png.Reader) as reader:
+            self.assertEqual(decode_png_to_rgba8(img_bytes)[:2], (8, 2))
+        reader.assert_called_once_with(bytes=img_bytes)
+
+        # broken images are reported by the general codec
+        with self.assertRaises(png.Error):
+            decode_png_to_rgba8(img_bytes[:-20])
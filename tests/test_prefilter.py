@@ -0,0 +1,117 @@
+"""
+Tests of `PrefilteredPattern`, which must find the same matches as the plain regex.
+
+Usage: python -m pytest tests/test_prefilter.py
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import unittest
+
+import sublime
+
+# chars which are interesting to case folding, word boundaries and the default path regex
+NOISE_FRAGMENTS = (
+    " ",
+    "\n",
+    "x",
+    "_",
+    "1",
+    ".",
+    ":",
+    "/",
+    "(",
+    ")",
+    "[",
+    "<",
+    "é",
+    "\u0130",  # "İ", whose lowercase has 2 chars
+    "\u0131",  # "ı"
+    "\u017f",  # "ſ"
+    "\u212a",  # Kelvin sign
+    "example.com",
+    "/path?q=1",
+)
+
+
+def random_case(rng: random.Random, text: str) -> str:
+    return "".join(char.upper() if rng.random() < 0.5 else char for char in text)
+
+
+def generate_text(rng: random.Random, literals: list[str], size: int) -> str:
+    parts: list[str] = []
+    for _ in range(size):
+        if rng.random() < 0.3:
+            literal = random_case(rng, rng.choice(literals))
+            # a literal may be cut, doubled or glued to a word
+            parts.append(rng.choice((literal, literal[:-1], literal * 2, "a" + literal)))
+        else:
+            parts.append(rng.choice(NOISE_FRAGMENTS))
+    return "".join(parts)
+
+
+class TestPrefilteredPattern(unittest.TestCase):
+    def assert_same_matches(self, regex_obj: re.Pattern[str], literals: list[str], text: str) -> None:
+        from OpenUri.plugin.prefilter import PrefilteredPattern
+
+        expected = [m.span() for m in regex_obj.finditer(text)]
+        self.assertEqual([m.span() for m in PrefilteredPattern(regex_obj, literals).finditer(text)], expected, text)
+
+    def test_leading_literal(self) -> None:
+        from OpenUri.plugin.prefilter import get_regex_leading_literal
+        from OpenUri.plugin.shared import global_get
+
+        uri_path_regexes = global_get("settings").get("uri_path_regexes")
+        self.assertEqual(get_regex_leading_literal(uri_path_regexes["www"]), "www.")
+        self.assertEqual(get_regex_leading_literal(uri_path_regexes["@default"]), "")
+        self.assertEqual(get_regex_leading_literal(uri_path_regexes["ascii_only"]), "")
+
+        self.assertEqual(get_regex_leading_literal(r"\b\bfoo\.bar"), "foo.bar")
+        self.assertEqual(get_regex_leading_literal(r"fooo?"), "foo")
+        self.assertEqual(get_regex_leading_literal(r"foo+"), "foo")
+        self.assertEqual(get_regex_leading_literal(r"foo\d"), "foo")
+        self.assertEqual(get_regex_leading_literal(r"foo|bar"), "")
+        self.assertEqual(get_regex_leading_literal(r"foo(?:a|b)"), "foo")
+        self.assertEqual(get_regex_leading_literal(r"foo[|]"), "foo")
+
+    def test_same_as_regex(self) -> None:
+        rng = random.Random(0)
+        for regex, literals in (
+            (r"\bfoo\w*", ["foo"]),
+            (r"(?<=\s)ba[rz]+", ["bar", "baz"]),
+            (r"\bk\S+", ["k"]),
+            (r"\bs\S+|\bi\S+", ["s", "i"]),
+        ):
+            regex_obj = re.compile(regex, re.IGNORECASE)
+            for _ in range(200):
+                self.assert_same_matches(regex_obj, literals, generate_text(rng, literals, 30))
+
+    def test_same_as_uri_regex(self) -> None:
+        from OpenUri.plugin.helpers import compile_uri_regex
+        from OpenUri.plugin.shared import global_get
+
+        settings = global_get("settings")
+        detect_schemes = settings.get("detect_schemes")
+        try:
+            # every configured scheme
+            settings.set(
+                "detect_schemes",
+                {scheme: {**scheme_settings, "enabled": True} for scheme, scheme_settings in detect_schemes.items()},
+            )
+            sublime.run_timers()
+            uri_regex_obj, activated_schemes = compile_uri_regex()
+        finally:
+            settings.set("detect_schemes", detect_schemes)
+            sublime.run_timers()
+
+        assert uri_regex_obj
+        self.assertEqual(len(activated_schemes), len(detect_schemes))
+        # "www." is the leading literal of the path regex of the empty scheme
+        self.assertEqual(set(uri_regex_obj.literals), {scheme or "www." for scheme in detect_schemes})
+
+        rng = random.Random(1)
+        literals = list(uri_regex_obj.literals)
+        for _ in range(300):
+            self.assert_same_matches(uri_regex_obj.regex_obj, literals, generate_text(rng, literals, 40))
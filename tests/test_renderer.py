@@ -0,0 +1,110 @@
+"""
+Tests of `Renderer`.
+
+Usage: python -m pytest tests/test_renderer.py
+"""
+
+from __future__ import annotations
+
+import unittest
+from unittest import mock
+
+import sublime
+
+
+class TestRenderer(unittest.TestCase):
+    def setUp(self) -> None:
+        from OpenUri.plugin.renderer import Renderer
+
+        self.renderer = Renderer()
+        self.view = sublime.active_window().new_file()
+        self.view.run_command("append", {"characters": "see https://example.com"})
+
+    def tearDown(self) -> None:
+        self.view.close()
+
+    def test_progressive_publishing_is_throttled(self) -> None:
+        from OpenUri.plugin.detector import UriDetector
+        from OpenUri.plugin.renderer import PROGRESSIVE_PUBLISH_INTERVAL_S
+
+        with mock.patch.object(UriDetector, "detect", return_value=False) as detect, mock.patch(
+            "OpenUri.plugin.renderer.get_setting_show_open_button", return_value="always"
+        ), mock.patch("OpenUri.plugin.renderer.update_phantom_set") as update_phantom_set, mock.patch(
+            "OpenUri.plugin.renderer.get_timestamp", return_value=100.0
+        ) as get_timestamp:
+            for _ in range(3):
+                self.assertFalse(self.renderer._detect_uris_globally(self.view))
+            self.assertEqual(update_phantom_set.call_count, 1)
+
+            get_timestamp.return_value += PROGRESSIVE_PUBLISH_INTERVAL_S
+            self.assertFalse(self.renderer._detect_uris_globally(self.view))
+            self.assertEqual(update_phantom_set.call_count, 2)
+
+            # the final result is always published
+            detect.return_value = True
+            self.assertTrue(self.renderer._detect_uris_globally(self.view))
+            self.assertEqual(update_phantom_set.call_count, 3)
+
+    def test_requests_are_coalesced(self) -> None:
+        self.renderer.is_running = True
+        with mock.patch.object(self.renderer, "_update_view") as update_view, mock.patch.object(
+            sublime, "set_timeout_async", wraps=sublime.set_timeout_async
+        ) as set_timeout_async:
+            self.renderer.request_update(self.view, 1000)
+            # an earlier request wins and needs an earlier timer
+            self.renderer.request_update(self.view)
+            self.assertEqual(set_timeout_async.call_count, 2)
+            # the existing timer will handle these requests
+            for _ in range(3):
+                self.renderer.request_update(self.view)
+            self.assertEqual(set_timeout_async.call_count, 2)
+
+            sublime.run_timers()
+            self.assertEqual([call.args[0].id() for call in update_view.call_args_list], [self.view.id()])
+
+        # the later timer finds nothing to do
+        sublime.run_timers(1.5)
+        self.assertEqual(update_view.call_count, 1)
+        self.assertFalse(self.renderer._timer_due_timestamps)
+        self.assertFalse(self.renderer._view_due_timestamps)
+
+    def test_idle(self) -> None:
+        from OpenUri.plugin.detector import UriDetector
+        from OpenUri.plugin.utils import view_is_dirty_val
+
+        with mock.patch.object(UriDetector, "detect") as detect, mock.patch.object(
+            sublime, "set_timeout_async"
+        ) as set_timeout_async:
+            # requests are ignored before started
+            self.renderer.request_update(self.view)
+
+            self.renderer.is_running = True
+            # a view which is not modified is not detected again
+            view_is_dirty_val(self.view, False)
+            self.renderer._update_view(self.view)
+            # a timer without due views doesn't schedule another one
+            self.renderer._on_timer(0)
+
+        detect.assert_not_called()
+        set_timeout_async.assert_not_called()
+
+    def test_rerender_generation(self) -> None:
+        from OpenUri.plugin import _init_images
+        from OpenUri.plugin.shared import global_get
+        from OpenUri.plugin.utils import view_is_dirty_val
+
+        renderer = global_get("renderer")
+        settings = global_get("settings")
+
+        for change in (
+            lambda: settings.set("uri_search_radius", settings.get("uri_search_radius")),
+            _init_images,
+        ):
+            generation = renderer.rerender_generation
+            view_is_dirty_val(self.view, False)
+            with mock.patch.object(renderer, "_update_view"):
+                change()
+                sublime.run_timers()
+            # views are re-rendered even if they are not modified
+            self.assertGreater(renderer.rerender_generation, generation)
+            self.assertTrue(view_is_dirty_val(self.view))
@@ -0,0 +1,35 @@
+"""
+Tests of plugin settings.
+
+Usage: python -m pytest tests/test_settings.py
+"""
+
+from __future__ import annotations
+
+import unittest
+
+import sublime
+
+
+class TestSettingsSnapshot(unittest.TestCase):
+    def test_partial_draw_uri_regions(self) -> None:
+        from OpenUri.plugin.settings import get_settings_snapshot
+        from OpenUri.plugin.shared import global_get
+
+        settings = global_get("settings")
+        draw_uri_regions = settings.get("draw_uri_regions")
+        try:
+            settings.set("draw_uri_regions", {"enabled": "always"})
+            sublime.run_timers()
+            snapshot = get_settings_snapshot()
+        finally:
+            settings.set("draw_uri_regions", draw_uri_regions)
+            sublime.run_timers()
+
+        self.assertEqual(snapshot.draw_uri_regions_enabled, "always")
+        self.assertEqual(snapshot.draw_uri_regions_scope, "string")
+        self.assertEqual(snapshot.draw_uri_regions_icon, "")
+        self.assertEqual(
+            snapshot.draw_uri_regions_flags,
+            sublime.HIDE_ON_MINIMAP | sublime.DRAW_SOLID_UNDERLINE | sublime.DRAW_NO_FILL | sublime.DRAW_NO_OUTLINE,
+        )